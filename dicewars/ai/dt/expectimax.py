@@ -0,0 +1,250 @@
+import configparser
+import logging
+import time
+
+from dicewars.client.ai_driver import BattleCommand, EndTurnCommand, TransferCommand
+from dicewars.ai.kb.move_selection import get_transfer_from_endangered, get_transfer_to_border
+from dicewars.ai.probabilities import battle_table
+from dicewars.ai.simulation import Rules, Simulation, TranspositionTable
+
+
+DEFAULT_FISCHER_INCREMENT = 2.25
+
+
+def read_config(config_path='dicewars.config'):
+    config = configparser.ConfigParser()
+    config.read(config_path)
+    return config
+
+
+def fischer_increment(config):
+    """Read the increment of the Fischer clock from the [AI_DRIVER] section
+    """
+    if 'AI_DRIVER' not in config:
+        return DEFAULT_FISCHER_INCREMENT
+    return config['AI_DRIVER'].getfloat('FischerIncrement', DEFAULT_FISCHER_INCREMENT)
+
+
+def game_rules(config):
+    """Read the rules the server plays by from the [GAME] section, defaults without it
+    """
+    if 'GAME' not in config:
+        return Rules()
+    return Rules.from_config(config['GAME'])
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class AI:
+    """Agent using an iterative-deepening single-turn expectimax search
+
+    Only the agent's own attacks within the current turn are searched.
+    Every attack is a chance node weighing the outcomes by exact battle
+    probabilities, ending the turn is evaluated by a static heuristic.
+    The opponents' turns are not searched, there are no min nodes, their
+    replies only enter the heuristic through the expected losses and the
+    income of the strongest opponent.
+
+    The search deepens until the time budgeted for the move runs out, the
+    budget is derived from the time left on the Fischer clock and its
+    increment. Transfers are made as by kb.stei_adt.
+
+    As the depth reached depends on time, games of this agent are not
+    reproducible by seeds.
+    """
+    MAX_MOVE_TIME = 0.5
+    INCREMENT_SHARE = 0.5
+    EXPECTED_MOVES_LEFT = 40
+    SAFETY_INCREMENTS = 4
+
+    MAX_DEPTH = 8
+    BRANCHING = 6
+    MIN_SUCCESS_PROBABILITY = 0.2
+
+    REGION_WEIGHT = 1.0
+    AREA_WEIGHT = 0.5
+    DICE_WEIGHT = 0.1
+    LOSS_WEIGHT = 1.0
+    OPPONENT_REGION_WEIGHT = 0.3
+    WIN_VALUE = 1e6
+
+    def __init__(self, player_name, board, players_order, max_transfers):
+        self.player_name = player_name
+        self.players_order = players_order
+        self.logger = logging.getLogger('AI')
+        self.max_transfers = max_transfers
+        self.reserved_evacs = max_transfers // 3
+        self.stage = 'attack'
+
+        config = read_config()
+        self.increment = fischer_increment(config)
+        self.rules = game_rules(config)
+        self.success_rows = battle_table(self.rules.max_dice_per_area).success_rows
+        self.table = TranspositionTable()
+        self.nb_nodes = 0
+        self.search_time = 0.0
+
+    def ai_turn(self, board, nb_moves_this_turn, nb_transfers_this_turn, nb_turns_this_game, time_left):
+        if nb_transfers_this_turn + self.reserved_evacs < self.max_transfers:
+            transfer = get_transfer_to_border(board, self.player_name)
+            if transfer:
+                return TransferCommand(transfer[0], transfer[1])
+
+        if self.stage == 'attack':
+            attack = self.search(board, time_left)
+            if attack:
+                return BattleCommand(attack[0], attack[1])
+            self.stage = 'evac'
+
+        if self.stage == 'evac' and nb_transfers_this_turn < self.max_transfers:
+            transfer = get_transfer_from_endangered(board, self.player_name)
+            if transfer:
+                return TransferCommand(transfer[0], transfer[1])
+
+        self.logger.info('Searched {} nodes in {:.2f}s so far, {:.0f} nodes/s'.format(
+            self.nb_nodes, self.search_time, self.nodes_per_second()
+        ))
+        self.stage = 'attack'
+        return EndTurnCommand()
+
+    def nodes_per_second(self):
+        if self.search_time == 0.0:
+            return 0.0
+        return self.nb_nodes / self.search_time
+
+    def move_budget(self, time_left):
+        """Decide how long to search for the next move
+
+        A share of the increment is spent every move, together with a part of
+        the time saved beyond a reserve of several increments.
+        """
+        spare_time = max(0.0, time_left - self.SAFETY_INCREMENTS * self.increment)
+        budget = self.INCREMENT_SHARE * self.increment + spare_time / self.EXPECTED_MOVES_LEFT
+        return min(budget, self.MAX_MOVE_TIME, 0.5 * time_left)
+
+    def search(self, board, time_left):
+        """Find the best attack, None if ending the turn is better
+
+        Returns
+        -------
+        (int, int)
+            Names of the source and target areas
+        """
+        start = time.perf_counter()
+        self.deadline = start + self.move_budget(time_left)
+        nb_nodes_before = self.nb_nodes
+
+        simulation = Simulation(board, self.players_order, self.player_name, rules=self.rules)
+
+        best_attack = None
+        depth = 0
+        try:
+            for depth in range(1, self.MAX_DEPTH + 1):
+                best_attack = self.best_attack(simulation, depth)
+        except SearchTimeout:
+            depth -= 1
+
+        elapsed = time.perf_counter() - start
+        self.search_time += elapsed
+        self.logger.debug('Depth {} reached in {:.3f}s, {} nodes'.format(depth, elapsed, self.nb_nodes - nb_nodes_before))
+
+        if best_attack is None:
+            return None
+        return simulation.names[best_attack[0]], simulation.names[best_attack[1]]
+
+    def best_attack(self, simulation, depth):
+        best_value = self.evaluate(simulation)
+        best_attack = None
+        for src, dst in self.candidate_attacks(simulation):
+            value = self.attack_value(simulation, src, dst, depth)
+            if value > best_value:
+                best_value = value
+                best_attack = (src, dst)
+        return best_attack
+
+    def candidate_attacks(self, simulation):
+        """Get the most promising attacks of the current state
+        """
+        rows = self.success_rows
+        dice = simulation.dice
+        max_dice = simulation.rules.max_dice_per_area
+
+        candidates = []
+        for src, dst in simulation.possible_attacks():
+            probability = rows[dice[src]][dice[dst]]
+            if probability >= self.MIN_SUCCESS_PROBABILITY or dice[src] == max_dice:
+                candidates.append((probability, src, dst))
+        candidates.sort(key=lambda candidate: candidate[0], reverse=True)
+        return [(src, dst) for _, src, dst in candidates[:self.BRANCHING]]
+
+    def attack_value(self, simulation, src, dst, depth):
+        """Expected value of an attack
+        """
+        probability = self.success_rows[simulation.dice[src]][simulation.dice[dst]]
+
+        simulation.battle(src, dst, won=True)
+        value = probability * self.value(simulation, depth - 1)
+        simulation.undo()
+
+        simulation.battle(src, dst, won=False)
+        value += (1.0 - probability) * self.value(simulation, depth - 1)
+        simulation.undo()
+
+        return value
+
+    def value(self, simulation, depth):
+        """Value of a state where the agent may go on attacking
+        """
+        self.nb_nodes += 1
+        if self.nb_nodes & 0xff == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        if simulation.winner() == self.player_name:
+            return self.WIN_VALUE
+
+        key = (simulation.hash, depth)
+        known = self.table.get(key)
+        if known is not None:
+            return known
+
+        best_value = self.evaluate(simulation)
+        if depth > 0:
+            for src, dst in self.candidate_attacks(simulation):
+                best_value = max(best_value, self.attack_value(simulation, src, dst, depth))
+
+        self.table.put(key, best_value)
+        return best_value
+
+    def evaluate(self, simulation):
+        """Estimate value of ending the turn in a state
+
+        Income of dice, areas and dice held are rewarded, areas likely to be
+        lost before the next turn and the income of the strongest opponent
+        are penalized.
+        """
+        me = self.player_name
+        owners = simulation.owners
+        dice = simulation.dice
+        rows = self.success_rows
+
+        expected_loss = 0.0
+        total_dice = 0
+        for area in simulation.player_areas[me]:
+            total_dice += dice[area]
+            hold = 1.0
+            for n in simulation.neighbours[area]:
+                if owners[n] != me and dice[n] > 1:
+                    hold *= 1.0 - rows[dice[n]][dice[area]]
+            expected_loss += 1.0 - hold
+
+        opponent_region = max(
+            [size for player, size in simulation.largest_region.items() if player != me] or [0]
+        )
+
+        return (self.REGION_WEIGHT * simulation.largest_region[me]
+                + self.AREA_WEIGHT * len(simulation.player_areas[me])
+                + self.DICE_WEIGHT * total_dice
+                - self.LOSS_WEIGHT * expected_loss
+                - self.OPPONENT_REGION_WEIGHT * opponent_region)
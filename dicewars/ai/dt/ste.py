@@ -1,6 +1,5 @@
 import logging
-from ..utils import possible_attacks
-from ..utils import probability_of_holding_area, probability_of_successful_attack
+from ..utils import BoardArrays
 
 from dicewars.client.ai_driver import BattleCommand, EndTurnCommand
 
@@ -52,12 +51,11 @@ class AI:
         """
         turns = []
 
-        for source, target in possible_attacks(self.board, self.player_name):
-            area_name = source.get_name()
-            atk_power = source.get_dice()
-            atk_prob = probability_of_successful_attack(self.board, area_name, target.get_name())
-            hold_prob = atk_prob * probability_of_holding_area(self.board, target.get_name(), atk_power - 1, self.player_name)
+        attacks = BoardArrays(self.board).analyse_attacks(self.player_name)
+        hold_probs = attacks.success * attacks.hold
+        for area_name, target, atk_power, hold_prob in zip(attacks.sources.tolist(), attacks.targets.tolist(),
+                                                           attacks.atk_dice.tolist(), hold_probs.tolist()):
             if hold_prob >= 0.2 or atk_power == 8:
-                turns.append([area_name, target.get_name(), hold_prob])
+                turns.append([area_name, target, hold_prob])
 
         return sorted(turns, key=lambda turn: turn[2], reverse=True)
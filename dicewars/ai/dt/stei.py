@@ -1,6 +1,5 @@
 import logging
-from ..utils import probability_of_holding_area, probability_of_successful_attack
-from ..utils import possible_attacks
+from ..utils import BoardArrays
 
 from dicewars.client.ai_driver import BattleCommand, EndTurnCommand
 
@@ -72,15 +71,15 @@ class AI:
         respect to preference * hold probability
         """
         turns = []
-        for source, target in possible_attacks(self.board, self.player_name):
-            atk_power = source.get_dice()
-            atk_prob = probability_of_successful_attack(self.board, source.get_name(), target.get_name())
-            hold_prob = atk_prob * probability_of_holding_area(self.board, target.get_name(), atk_power - 1, self.player_name)
+        attacks = BoardArrays(self.board).analyse_attacks(self.player_name)
+        hold_probs = attacks.success * attacks.hold
+        for source, target, atk_power, hold_prob in zip(attacks.sources.tolist(), attacks.targets.tolist(),
+                                                        attacks.atk_dice.tolist(), hold_probs.tolist()):
             if hold_prob >= self.treshold or atk_power == 8:
                 preference = hold_prob
-                if source.get_name() in self.largest_region:
+                if source in self.largest_region:
                     preference *= self.score_weight
-                turns.append([source.get_name(), target.get_name(), preference, hold_prob])
+                turns.append([source, target, preference, hold_prob])
 
         return sorted(turns, key=lambda turn: turn[2], reverse=True)
 
@@ -99,9 +98,6 @@ class AI:
         """
         self.largest_region = []
 
-        players_regions = self.board.get_players_regions(self.player_name)
-        max_region_size = max(len(region) for region in players_regions)
-        max_sized_regions = [region for region in players_regions if len(region) == max_region_size]
-
-        self.largest_region = max_sized_regions[0]
-        return max_region_size
+        regions = self.board.get_regions(self.player_name)
+        self.largest_region = regions.get_largest_regions()[0]
+        return regions.largest_size
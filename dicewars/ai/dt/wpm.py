@@ -0,0 +1,187 @@
+"""Weights of the Win Probability Maximization agents
+
+dt.wpm_c, dt.wpm_d and dt.wpm_s estimate the probability of winning by
+a logistic model of features of the players, starting with the player
+to move, with one weight vector per number of players. Weights found in
+WEIGHTS_FILE replace those built into the agents. fit_weights() fits
+them from recorded games, see scripts/fit-wpm-weights.py.
+"""
+from functools import lru_cache
+import os
+
+import numpy
+
+
+WEIGHTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'wpm_weights.npz')
+
+
+def weights_key(agent, nb_players):
+    return '{}-{}'.format(agent, nb_players)
+
+
+@lru_cache(maxsize=None)
+def _read_weights(path, mtime_ns, size):
+    with numpy.load(path) as weights:
+        return dict(weights)
+
+
+def read_weights(path=WEIGHTS_FILE):
+    """Get all weights stored in a weight file
+
+    Returns
+    -------
+    dict of str: numpy.ndarray
+        Weights by weights_key(), empty if there is no such file
+    """
+    if not os.path.exists(path):
+        return {}
+    stat = os.stat(path)
+    return _read_weights(path, stat.st_mtime_ns, stat.st_size)
+
+
+def load_weights(agent, nb_players, default, path=WEIGHTS_FILE):
+    """Get weights of an agent for a number of players
+
+    Parameters
+    ----------
+    agent : str
+        'wpm_c', 'wpm_d' or 'wpm_s'
+    nb_players : int
+    default : numpy.ndarray
+        Weights built into the agent, used if the file does not have any
+
+    Returns
+    -------
+    numpy.ndarray
+    """
+    return read_weights(path).get(weights_key(agent, nb_players), default)
+
+
+def write_weights(weights, path=WEIGHTS_FILE):
+    """Store weights, keeping those of the file not given
+
+    Parameters
+    ----------
+    weights : dict of (str, int): numpy.ndarray
+        Weights by agent and number of players
+    """
+    stored = dict(read_weights(path))
+    for (agent, nb_players), w in weights.items():
+        stored[weights_key(agent, nb_players)] = numpy.asarray(w, dtype=numpy.float64)
+    with open(path + '.tmp', 'wb') as f:
+        numpy.savez(f, **stored)
+    os.replace(path + '.tmp', path)
+
+
+def log_features(scores, dice):
+    """Features of dt.wpm_c, logarithms of score + 1 and dice + 1 of every player
+    """
+    features = numpy.empty((scores.shape[0], 2 * scores.shape[1]))
+    features[:, 0::2] = numpy.log(scores + 1.0)
+    features[:, 1::2] = numpy.log(dice + 1.0)
+    return features
+
+
+def dice_features(scores, dice):
+    """Features of dt.wpm_d, logarithms of dice of every player, 0 if there are none
+    """
+    return numpy.log(numpy.maximum(dice, 1.0))
+
+
+def score_features(scores, dice):
+    """Features of dt.wpm_s, scores of every player
+    """
+    return numpy.asarray(scores, dtype=numpy.float64)
+
+
+FEATURES = {
+    'wpm_c': log_features,
+    'wpm_d': dice_features,
+    'wpm_s': score_features,
+}
+
+
+def log_loss(features, won, weights):
+    """Mean negative log-likelihood and accuracy of a logistic model
+    """
+    logits = features @ weights
+    # log(1 + exp(-z)) for winners and log(1 + exp(z)) for losers
+    loss = numpy.logaddexp(0.0, numpy.where(won, -logits, logits))
+    accuracy = ((logits > 0) == won.astype(bool)).mean()
+    return loss.mean(), accuracy
+
+
+def fit_logistic(datasets, l2=1.0, nb_iterations=25, tolerance=1e-9):
+    """Fit logistic models without intercept by Newton's method
+
+    Parameters
+    ----------
+    datasets : dict of key: (numpy.ndarray, numpy.ndarray)
+        Features of shape (n, d) and outcomes of shape (n,) of every model
+    l2 : float
+        Weight of the L2 penalty, added to the summed log-likelihood
+    nb_iterations : int
+        Maximal number of Newton steps
+    tolerance : float
+        Fitting stops once no weight changes by more than this
+
+    Returns
+    -------
+    dict of key: numpy.ndarray
+    """
+    weights = {}
+    for key, (features, won) in datasets.items():
+        won = won.astype(numpy.float64)
+        w = numpy.zeros(features.shape[1])
+        penalty = l2 * numpy.eye(features.shape[1])
+        for _ in range(nb_iterations):
+            p = 0.5 * (1.0 + numpy.tanh(0.5 * (features @ w)))
+            gradient = features.T @ (p - won) + l2 * w
+            hessian = (features * (p * (1.0 - p))[:, None]).T @ features + penalty
+            step = numpy.linalg.solve(hessian, gradient)
+            w -= step
+            if numpy.abs(step).max() <= tolerance:
+                break
+        weights[key] = w
+    return weights
+
+
+def fit_weights(scores, dice, won, agents=tuple(FEATURES), l2=1.0, held_out=None):
+    """Fit weights of agents for every number of players
+
+    Parameters
+    ----------
+    scores, dice : dict of int: numpy.ndarray
+        Scores and dice of players of shape (n, nb_players) by the number
+        of players, the player to move being first
+    won : dict of int: numpy.ndarray
+        Whether the player to move won, of shape (n,)
+    agents : iterable of str
+        Agents to fit the weights of
+    l2 : float
+    held_out : dict of int: numpy.ndarray
+        Boolean masks of records used for evaluation only
+
+    Returns
+    -------
+    dict of (str, int): numpy.ndarray
+        Weights by agent and number of players
+    dict of (str, int): (float, float)
+        Log-loss and accuracy on held out records, if any
+    """
+    datasets = {}
+    evaluation_sets = {}
+    for agent in agents:
+        for nb_players in scores:
+            features = FEATURES[agent](scores[nb_players], dice[nb_players])
+            mask = numpy.zeros(len(features), dtype=bool) if held_out is None else held_out[nb_players]
+            datasets[agent, nb_players] = features[~mask], won[nb_players][~mask]
+            if mask.any():
+                evaluation_sets[agent, nb_players] = features[mask], won[nb_players][mask]
+
+    weights = fit_logistic(datasets, l2)
+    evaluation = {
+        key: log_loss(features, outcome, weights[key])
+        for key, (features, outcome) in evaluation_sets.items()
+    }
+    return weights, evaluation
@@ -1,12 +1,37 @@
 import numpy
 import logging
+import warnings
 
 from ..utils import probability_of_successful_attack, sigmoid
 from ..utils import possible_attacks
+from .wpm import load_weights
 
 from dicewars.client.ai_driver import BattleCommand, EndTurnCommand
 
 
+WEIGHTS = {
+    2: numpy.array([1.30214778, 2.25563871, -1.30214778, -2.25563871]),
+    3: numpy.array([1.03427841, 0.50262886, -0.78619448, -0.31264667,
+                    -0.74070513, -0.3344083]),
+    4: numpy.array([1.04279419, 0.25416893, -0.64830571, -0.15321224,
+                    -0.64217824, -0.11354054, -0.59113493, -0.19902261]),
+    5: numpy.array([0.88792394, 0.23898045, -0.50630318, -0.10684734,
+                    -0.48406202, -0.12877724, -0.48004353, -0.17429738,
+                    -0.51195613, -0.12572176]),
+    6: numpy.array([0.84452717, 0.20915755, -0.4275969, -0.12319906,
+                    -0.438397, -0.11476484, -0.44610219, -0.10640943,
+                    -0.42926595, -0.15994294, -0.40215393, -0.12508173]),
+    7: numpy.array([0.77043331, 0.22744643, -0.34448306, -0.16104125,
+                    -0.34304867, -0.16545059, -0.36316993, -0.14238659,
+                    -0.37359036, -0.13535348, -0.34917492, -0.13725688,
+                    -0.36908313, -0.11803061]),
+    8: numpy.array([0.71518557, 0.2580538, -0.3303392, -0.13374949,
+                    -0.3288953, -0.16076534, -0.31261043, -0.14316612,
+                    -0.31785557, -0.16003507, -0.31410674, -0.16487769,
+                    -0.33290964, -0.12624279, -0.33843017, -0.14888412]),
+}
+
+
 class AI:
     """Agent using Win Probability Maximization (WPM) using logarithms
     of player scores and dice
@@ -40,28 +65,8 @@ class AI:
         while self.player_name != self.players_order[0]:
             self.players_order.append(self.players_order.pop(0))
 
-        self.weights = {
-            2: numpy.array([1.30214778, 2.25563871, -1.30214778, -2.25563871]),
-            3: numpy.array([1.03427841, 0.50262886, -0.78619448, -0.31264667,
-                            -0.74070513, -0.3344083]),
-            4: numpy.array([1.04279419, 0.25416893, -0.64830571, -0.15321224,
-                            -0.64217824, -0.11354054, -0.59113493, -0.19902261]),
-            5: numpy.array([0.88792394, 0.23898045, -0.50630318, -0.10684734,
-                            -0.48406202, -0.12877724, -0.48004353, -0.17429738,
-                            -0.51195613, -0.12572176]),
-            6: numpy.array([0.84452717, 0.20915755, -0.4275969, -0.12319906,
-                            -0.438397, -0.11476484, -0.44610219, -0.10640943,
-                            -0.42926595, -0.15994294, -0.40215393, -0.12508173]),
-            7: numpy.array([0.77043331, 0.22744643, -0.34448306, -0.16104125,
-                            -0.34304867, -0.16545059, -0.36316993, -0.14238659,
-                            -0.37359036, -0.13535348, -0.34917492, -0.13725688,
-                            -0.36908313, -0.11803061]),
-            8: numpy.array([0.71518557, 0.2580538, -0.3303392, -0.13374949,
-                            -0.3288953, -0.16076534, -0.31261043, -0.14316612,
-                            -0.31785557, -0.16003507, -0.31410674, -0.16487769,
-                            -0.33290964, -0.12624279, -0.33843017, -0.14888412]),
-        }[self.players]
-        numpy.warnings.filterwarnings('ignore')
+        self.weights = load_weights('wpm_c', self.players, WEIGHTS[self.players])
+        warnings.filterwarnings('ignore')
 
     def ai_turn(self, board, nb_moves_this_turn, nb_transfers_this_turn, nb_turns_this_game, time_left):
         """AI agent's turn
@@ -203,10 +208,10 @@ class AI:
         int
             score of the player
         """
-        players_regions = self.board.get_players_regions(self.player_name, skip_area=skip_area)
-        max_region_size = max(len(region) for region in players_regions)
-
-        return max_region_size
+        regions = self.board.get_regions(player_name)
+        if skip_area is None:
+            return regions.largest_size
+        return regions.get_size_without(skip_area)
 
     def get_largest_region(self):
         """Get size of the largest region, including the areas within
@@ -223,11 +228,8 @@ class AI:
         """
         self.largest_region = []
 
-        players_regions = self.board.get_players_regions(self.player_name)
-        max_region_size = max(len(region) for region in players_regions)
-        max_sized_regions = [region for region in players_regions if len(region) == max_region_size]
-
-        for region in max_sized_regions:
+        regions = self.board.get_regions(self.player_name)
+        for region in regions.get_largest_regions():
             for area in region:
                 self.largest_region.append(area)
-        return max_region_size
+        return regions.largest_size
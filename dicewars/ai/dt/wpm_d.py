@@ -1,12 +1,25 @@
 import numpy
 import logging
+import warnings
 
 from ..utils import probability_of_successful_attack, sigmoid
 from ..utils import possible_attacks
+from .wpm import load_weights
 
 from dicewars.client.ai_driver import BattleCommand, EndTurnCommand
 
 
+WEIGHTS = {
+    2: numpy.array([3.06600354, -3.06600354]),
+    3: numpy.array([1.16329046, -0.81105584, -0.80085993]),
+    4: numpy.array([0.91252927, -0.55857427, -0.51781521, -0.57183507]),
+    5: numpy.array([0.80138262, -0.43013021, -0.4388323, -0.48048114, -0.45301658]),
+    6: numpy.array([0.74465716, -0.40179109, -0.39851363, -0.39515928, -0.43863283, -0.38371555]),
+    7: numpy.array([0.72382109, -0.39171476, -0.39423241, -0.38390144, -0.38401564, -0.36980703, -0.36138501]),
+    8: numpy.array([0.72340846, -0.35936507, -0.38758583, -0.35487285, -0.37616735, -0.37974499, -0.34989554, -0.37451491]),
+}
+
+
 class AI:
     """Agent using Win Probability Maximization (WPM) using logarithms of player dice
 
@@ -40,16 +53,8 @@ class AI:
         while self.player_name != self.players_order[0]:
             self.players_order.append(self.players_order.pop(0))
 
-        self.weights = {
-            2: numpy.array([3.06600354, -3.06600354]),
-            3: numpy.array([1.16329046, -0.81105584, -0.80085993]),
-            4: numpy.array([0.91252927, -0.55857427, -0.51781521, -0.57183507]),
-            5: numpy.array([0.80138262, -0.43013021, -0.4388323, -0.48048114, -0.45301658]),
-            6: numpy.array([0.74465716, -0.40179109, -0.39851363, -0.39515928, -0.43863283, -0.38371555]),
-            7: numpy.array([0.72382109, -0.39171476, -0.39423241, -0.38390144, -0.38401564, -0.36980703, -0.36138501]),
-            8: numpy.array([0.72340846, -0.35936507, -0.38758583, -0.35487285, -0.37616735, -0.37974499, -0.34989554, -0.37451491]),
-        }[self.players]
-        numpy.warnings.filterwarnings('ignore')
+        self.weights = load_weights('wpm_d', self.players, WEIGHTS[self.players])
+        warnings.filterwarnings('ignore')
 
     def ai_turn(self, board, nb_moves_this_turn, nb_transfers_this_turn, nb_turns_this_game, time_left):
         """AI agent's turn
@@ -185,10 +190,10 @@ class AI:
         int
             score of the player
         """
-        players_regions = self.board.get_players_regions(self.player_name, skip_area=skip_area)
-        max_region_size = max(len(region) for region in players_regions)
-
-        return max_region_size
+        regions = self.board.get_regions(player_name)
+        if skip_area is None:
+            return regions.largest_size
+        return regions.get_size_without(skip_area)
 
     def get_largest_region(self):
         """Get size of the largest region, including the areas within
@@ -205,11 +210,8 @@ class AI:
         """
         self.largest_region = []
 
-        players_regions = self.board.get_players_regions(self.player_name)
-        max_region_size = max(len(region) for region in players_regions)
-        max_sized_regions = [region for region in players_regions if len(region) == max_region_size]
-
-        for region in max_sized_regions:
+        regions = self.board.get_regions(self.player_name)
+        for region in regions.get_largest_regions():
             for area in region:
                 self.largest_region.append(area)
-        return max_region_size
+        return regions.largest_size
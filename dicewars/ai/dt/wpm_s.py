@@ -3,10 +3,22 @@ import logging
 
 from ..utils import probability_of_successful_attack, sigmoid
 from ..utils import possible_attacks
+from .wpm import load_weights
 
 from dicewars.client.ai_driver import BattleCommand, EndTurnCommand
 
 
+WEIGHTS = {
+    2: numpy.array([0.51862355, -0.417179]),
+    3: numpy.array([0.24112347, -0.20702862, -0.20097175]),
+    4: numpy.array([0.26457488, -0.20733951, -0.19326027, -0.20171941]),
+    5: numpy.array([0.26777938, -0.1878346, -0.18560973, -0.20005864, -0.18976791]),
+    6: numpy.array([0.2700982, -0.18000744, -0.18290534, -0.1815374, -0.20105069, -0.1808327]),
+    7: numpy.array([0.27109102, -0.18051686, -0.18232428, -0.17905882, -0.17959111, -0.17958394, -0.17634735]),
+    8: numpy.array([0.277179, -0.16852433, -0.18678373, -0.17492631, -0.17996621, -0.1790844, -0.16977776, -0.18876063]),
+}
+
+
 class AI:
     """Agent using Win Probability Maximization (WPM) using player scores
 
@@ -40,15 +52,7 @@ class AI:
         while self.player_name != self.players_order[0]:
             self.players_order.append(self.players_order.pop(0))
 
-        self.weights = {
-            2: numpy.array([0.51862355, -0.417179]),
-            3: numpy.array([0.24112347, -0.20702862, -0.20097175]),
-            4: numpy.array([0.26457488, -0.20733951, -0.19326027, -0.20171941]),
-            5: numpy.array([0.26777938, -0.1878346, -0.18560973, -0.20005864, -0.18976791]),
-            6: numpy.array([0.2700982, -0.18000744, -0.18290534, -0.1815374, -0.20105069, -0.1808327]),
-            7: numpy.array([0.27109102, -0.18051686, -0.18232428, -0.17905882, -0.17959111, -0.17958394, -0.17634735]),
-            8: numpy.array([0.277179, -0.16852433, -0.18678373, -0.17492631, -0.17996621, -0.1790844, -0.16977776, -0.18876063]),
-        }[self.players]
+        self.weights = load_weights('wpm_s', self.players, WEIGHTS[self.players])
 
     def ai_turn(self, board, nb_moves_this_turn, nb_transfers_this_turn, nb_turns_this_game, time_left):
         """AI agent's turn
@@ -134,10 +138,10 @@ class AI:
         int
             score of the player
         """
-        players_regions = self.board.get_players_regions(self.player_name, skip_area=skip_area)
-        max_region_size = max(len(region) for region in players_regions)
-
-        return max_region_size
+        regions = self.board.get_regions(player_name)
+        if skip_area is None:
+            return regions.largest_size
+        return regions.get_size_without(skip_area)
 
     def get_largest_region(self):
         """Get size of the largest region, including the areas within
@@ -154,11 +158,8 @@ class AI:
         """
         self.largest_region = []
 
-        players_regions = self.board.get_players_regions(self.player_name)
-        max_region_size = max(len(region) for region in players_regions)
-        max_sized_regions = [region for region in players_regions if len(region) == max_region_size]
-
-        for region in max_sized_regions:
+        regions = self.board.get_regions(self.player_name)
+        for region in regions.get_largest_regions():
             for area in region:
                 self.largest_region.append(area)
-        return max_region_size
+        return regions.largest_size
@@ -0,0 +1,141 @@
+"""Exact probabilities of battles
+
+A battle is won by the attacker if the sum of its dice is strictly greater
+than the sum of the defender's dice. Probabilities are computed from exact
+counts of dice rolls giving every sum, so they are correctly rounded, and
+tables of outcomes for every pair of dice counts are computed once and then
+only looked up.
+
+Counting needs no numpy, so that AIs which only look up the probabilities
+do not import it. Flat numpy arrays are built for vectorized lookups only.
+"""
+from functools import lru_cache
+
+from dicewars.lazy import lazy_import
+
+numpy = lazy_import('numpy')
+
+
+DIE_SIDES = 6
+DEFAULT_MAX_DICE = 8
+
+
+def success_rows(max_dice, sides=DIE_SIDES):
+    """Get probabilities of winning a battle, computed from counts of rolls
+
+    Returns
+    -------
+    list of list of float
+        Element [atk][df] is the probability that atk dice beat df dice,
+        correctly rounded
+    """
+    max_sum = max_dice * sides
+    counts = [[1] + [0] * max_sum]
+    for n in range(1, max_dice + 1):
+        previous = counts[-1]
+        counts.append([
+            sum(previous[s - face] for face in range(1, sides + 1) if s - face >= 0)
+            for s in range(max_sum + 1)
+        ])
+
+    # Numbers of rolls of the defender summing to less than s
+    below = []
+    for distribution in counts:
+        row = [0]
+        for count in distribution[:-1]:
+            row.append(row[-1] + count)
+        below.append(row)
+
+    return [
+        [
+            sum(c * b for c, b in zip(counts[atk], below[df])) / sides ** (atk + df)
+            for df in range(max_dice + 1)
+        ]
+        for atk in range(max_dice + 1)
+    ]
+
+
+class BattleTable:
+    """Probabilities of winning a battle for every pair of dice counts
+
+    Attributes
+    ----------
+    max_dice : int
+        Largest number of dice in an area covered by the table
+    stride : int
+        Number of entries per attacker's dice count in flat arrays
+    success : numpy.ndarray
+        Flat array of attack success probabilities, the probability for
+        atk and df dice is at index atk * stride + df
+    success_rows : list of list of float
+        The same probabilities as nested lists, for scalar lookups
+    """
+    def __init__(self, max_dice, sides=DIE_SIDES):
+        self.max_dice = max_dice
+        self.sides = sides
+        self.stride = max_dice + 1
+
+        self.success_rows = _success_rows(max_dice, sides)
+        self.success = numpy.array(self.success_rows).ravel()
+
+    def success_probability(self, atk, df):
+        """Get probability of the attacker winning
+
+        Parameters
+        ----------
+        atk : int
+            Number of dice the attacker has
+        df : int
+            Number of dice the defender has
+
+        Returns
+        -------
+        float
+        """
+        return self.success_rows[atk][df]
+
+    def success_probabilities(self, atk, df):
+        """Get probabilities of attackers winning for arrays of dice counts
+
+        Parameters
+        ----------
+        atk : numpy.ndarray of int
+        df : numpy.ndarray of int
+
+        Returns
+        -------
+        numpy.ndarray of float
+        """
+        return self.success[numpy.asarray(atk) * self.stride + numpy.asarray(df)]
+
+
+_success_rows = lru_cache(maxsize=None)(success_rows)
+
+
+@lru_cache(maxsize=None)
+def battle_table(max_dice=DEFAULT_MAX_DICE, sides=DIE_SIDES):
+    """Get table of battle outcomes, computed on the first request
+    """
+    return BattleTable(max_dice, sides)
+
+
+DEFAULT_ROWS = _success_rows(DEFAULT_MAX_DICE)
+
+
+def attack_success_probability(atk, df):
+    """Get probability of the attacker winning, for any number of dice
+
+    Parameters
+    ----------
+    atk : int
+        Number of dice the attacker has
+    df : int
+        Number of dice the defender has
+
+    Returns
+    -------
+    float
+    """
+    if atk > DEFAULT_MAX_DICE or df > DEFAULT_MAX_DICE:
+        return _success_rows(max(atk, df))[atk][df]
+    return DEFAULT_ROWS[atk][df]
@@ -0,0 +1,470 @@
+"""Fast-forward simulation of the game for search-based AIs
+
+`Simulation` keeps the state of a game in flat lists indexed by positions of
+areas in the board. Battles, transfers and ends of turn are carried out the
+same way `dicewars.server.game.Game` does, including the order in which dice
+are rolled and deployed, and every move can be taken back by `undo()`. The
+state is identified by an incrementally updated Zobrist hash, which can key
+a `TranspositionTable`.
+"""
+import random
+from collections import OrderedDict, deque
+
+
+class Rules:
+    """Rules of the game set by the [GAME] section of the config
+
+    Defaults match dicewars.config.
+    """
+    def __init__(self, max_dice_per_area=8, battle_wear_min=4, reserve_production_cap=64,
+                 reserve_type='complement', reserve_cap=24, deployment_method='unlimited',
+                 max_pass_rounds=8, max_battles_per_game=10000):
+        if reserve_type not in ['constant', 'complement']:
+            raise ValueError(f'Unsupported reserve type: {reserve_type}')
+        if deployment_method not in ['unlimited', 'limited']:
+            raise ValueError(f'Unknown deployement method "{deployment_method}"')
+
+        self.max_dice_per_area = max_dice_per_area
+        self.battle_wear_min = battle_wear_min
+        self.reserve_production_cap = reserve_production_cap
+        self.reserve_type = reserve_type
+        self.reserve_cap = reserve_cap
+        self.deployment_method = deployment_method
+        self.max_pass_rounds = max_pass_rounds
+        self.max_battles_per_game = max_battles_per_game
+
+        # see LimitedDeployment of the server
+        self.limited_deployment = []
+        total = 0
+        for nb_areas in range(1, 41):
+            total += max_dice_per_area - len([i for i in range(1, 5) if nb_areas > i*7 + 0.5])
+            self.limited_deployment.append(total)
+
+    @classmethod
+    def from_config(cls, game_config):
+        """
+        Parameters
+        ----------
+        game_config : configparser.SectionProxy
+            The [GAME] section of the config
+        """
+        return cls(
+            max_dice_per_area=game_config.getint('MaxDicePerArea'),
+            battle_wear_min=game_config.getint('BattleWearMinimum'),
+            reserve_production_cap=game_config.getint('ReserveProductionCap'),
+            reserve_type=game_config.get('ReserveType'),
+            reserve_cap=game_config.getint('ReserveSizeCap'),
+            deployment_method=game_config['DeploymentMethod'],
+            max_pass_rounds=game_config.getint('MaximumNoBattleRounds'),
+            max_battles_per_game=game_config.getint('MaximumBattlesPerGame'),
+        )
+
+    def max_deployed_dice(self, nb_areas):
+        if self.deployment_method == 'unlimited':
+            return nb_areas * self.max_dice_per_area
+        return self.limited_deployment[nb_areas - 1]
+
+
+class Simulation:
+    """State of a game with reversible moves
+
+    Areas are referred to by their positions in the board, see `names` and
+    `positions` for the translation. Each player's areas are kept in the
+    order the server keeps them in, which decides where dice are deployed.
+    That order is only known to the server, unless the Simulation follows the
+    game from its start, it is the order of the board grouped by regions.
+
+    Attributes
+    ----------
+    names : list of int
+        Name of the area at every position
+    positions : dict of int: int
+        Position of every area
+    neighbours : list of list of int
+        Positions of adjacent areas
+    owners : list of int
+    dice : list of int
+    player_areas : dict of int: list of int
+        Positions of areas of every player, in the order of the server
+    largest_region : dict of int: int
+        Score of every player
+    reserves : dict of int: int
+    current_player : int
+    hash : int
+        Zobrist hash of owners, dice, reserves and the current player
+    """
+    def __init__(self, board, players_order, current_player, reserves=None, rules=None,
+                 player_areas=None, nb_battles=0, nb_consecutive_end_of_turns=0, zobrist_seed=0):
+        """
+        Parameters
+        ----------
+        board : Board
+            Client board
+        players_order : list of int
+        current_player : int
+        reserves : dict of int: int
+            Dice in reserves of players, none by default
+        rules : Rules
+        player_areas : dict of int: list of int
+            Names of each player's areas in the order of the server
+        nb_battles : int
+            Battles fought so far
+        nb_consecutive_end_of_turns : int
+            Turns ended since the last battle or transfer
+        zobrist_seed : int
+            Seed of the random keys of the hash
+        """
+        self.rules = rules if rules is not None else Rules()
+
+        areas = list(board.areas.values())
+        self.names = [area.get_name() for area in areas]
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        self.neighbours = [[self.positions[n] for n in area.get_adjacent_areas_names()] for area in areas]
+        self.owners = [area.get_owner_name() for area in areas]
+        self.dice = [area.get_dice() for area in areas]
+
+        self.players_order = list(players_order)
+        self.current_player = current_player
+        self.reserves = {player: 0 for player in self.players_order}
+        if reserves is not None:
+            self.reserves.update({int(player): reserve for player, reserve in reserves.items()})
+
+        if player_areas is None:
+            player_areas = {player: [] for player in self.players_order}
+            for name, owner in zip(self.names, self.owners):
+                player_areas[owner].append(name)
+        self.player_areas = {}
+        self.largest_region = {}
+        for player in self.players_order:
+            self.player_areas[player], self.largest_region[player] = self.__regions(
+                [self.positions[name] for name in player_areas.get(player, [])], player
+            )
+
+        self.nb_players_alive = len([p for p in self.players_order if self.player_areas[p]])
+        self.nb_battles = nb_battles
+        self.nb_consecutive_end_of_turns = nb_consecutive_end_of_turns
+
+        rng = random.Random(zobrist_seed)
+        nb_owners = max(self.players_order) + 1
+        self.dice_stride = self.rules.max_dice_per_area + 1
+        self.area_stride = nb_owners * self.dice_stride
+        self.area_keys = [rng.getrandbits(64) for _ in range(len(areas) * self.area_stride)]
+        self.reserve_stride = self.rules.reserve_production_cap + 1
+        self.reserve_keys = [rng.getrandbits(64) for _ in range(nb_owners * self.reserve_stride)]
+        self.player_keys = [rng.getrandbits(64) for _ in range(nb_owners)]
+        self.hash = self.compute_hash()
+
+        self.history = []
+
+    def compute_hash(self):
+        """Compute the Zobrist hash of the state from scratch
+        """
+        h = self.player_keys[self.current_player]
+        for i in range(len(self.names)):
+            h ^= self.area_keys[i * self.area_stride + self.owners[i] * self.dice_stride + self.dice[i]]
+        for player, reserve in self.reserves.items():
+            h ^= self.reserve_keys[player * self.reserve_stride + reserve]
+        return h
+
+    ##########
+    # MOVES  #
+    ##########
+    def possible_attacks(self):
+        """Get attacks the current player may carry out
+
+        Returns
+        -------
+        list of (int, int)
+            Positions of source and target areas
+        """
+        player = self.current_player
+        owners = self.owners
+        dice = self.dice
+        return [
+            (src, dst)
+            for src in self.player_areas[player] if dice[src] >= 2
+            for dst in self.neighbours[src] if owners[dst] != player
+        ]
+
+    def possible_transfers(self):
+        """Get transfers of the current player which move some dice
+
+        Returns
+        -------
+        list of (int, int)
+            Positions of source and target areas
+        """
+        player = self.current_player
+        owners = self.owners
+        dice = self.dice
+        max_dice = self.rules.max_dice_per_area
+        return [
+            (src, dst)
+            for src in self.player_areas[player] if dice[src] >= 2
+            for dst in self.neighbours[src] if owners[dst] == player and dice[dst] < max_dice
+        ]
+
+    def battle(self, src, dst, won=None, rng=random):
+        """Carry out a battle
+
+        Parameters
+        ----------
+        src, dst : int
+            Positions of attacking and attacked areas
+        won : bool
+            Outcome of the battle, dice are rolled if None
+        rng : random.Random
+            Generator rolling the dice
+
+        Returns
+        -------
+        bool
+            True if the attacker won
+        """
+        atk_dice = self.dice[src]
+        def_dice = self.dice[dst]
+        atk_name = self.owners[src]
+        def_name = self.owners[dst]
+
+        if won is None:
+            atk_pwr = def_pwr = 0
+            for i in range(atk_dice):
+                atk_pwr += rng.randint(1, 6)
+            for i in range(def_dice):
+                def_pwr += rng.randint(1, 6)
+            won = atk_pwr > def_pwr
+
+        self.__push_history([(src, atk_name, atk_dice), (dst, def_name, def_dice)])
+        self.nb_battles += 1
+        self.nb_consecutive_end_of_turns = 0
+
+        self.__set_area(src, atk_name, 1)
+        if won:
+            self.__set_area(dst, atk_name, atk_dice - 1)
+            self.__save_players([atk_name, def_name])
+            self.player_areas[atk_name], self.largest_region[atk_name] = self.__regions(
+                self.player_areas[atk_name] + [dst], atk_name
+            )
+            self.player_areas[def_name], self.largest_region[def_name] = self.__regions(
+                [area for area in self.player_areas[def_name] if area != dst], def_name
+            )
+            if not self.player_areas[def_name]:
+                self.nb_players_alive -= 1
+        else:
+            battle_wear = atk_dice // self.rules.battle_wear_min
+            self.__set_area(dst, def_name, max(1, def_dice - battle_wear))
+
+        return won
+
+    def transfer(self, src, dst):
+        """Carry out a transfer
+
+        Parameters
+        ----------
+        src, dst : int
+            Positions of source and destination areas
+        """
+        src_dice = self.dice[src]
+        dst_dice = self.dice[dst]
+        self.__push_history([(src, self.owners[src], src_dice), (dst, self.owners[dst], dst_dice)])
+        self.nb_consecutive_end_of_turns = 0
+
+        dice_moved = min(self.rules.max_dice_per_area - dst_dice, src_dice - 1)
+        self.__set_area(src, self.owners[src], src_dice - dice_moved)
+        self.__set_area(dst, self.owners[dst], dst_dice + dice_moved)
+
+    def end_turn(self, rng=random):
+        """End turn of the current player, deploying dice
+
+        Parameters
+        ----------
+        rng : random.Random
+            Generator choosing areas for deployed dice
+        """
+        rules = self.rules
+        player = self.current_player
+        areas = self.player_areas[player]
+        dice = self.dice
+
+        changes = []
+        self.__push_history(changes)
+        self.nb_consecutive_end_of_turns += 1
+
+        free_dice = min(self.reserves[player] + self.largest_region[player], rules.reserve_production_cap)
+        dice_deployed = sum(dice[area] for area in areas)
+        room_for_deployment = max(rules.max_deployed_dice(len(areas)) - dice_deployed, 0)
+        available_for_deployment = min(free_dice, room_for_deployment)
+        reserve_dice = max(0, free_dice - available_for_deployment)
+
+        candidates = list(areas)
+        changed = set()
+        while available_for_deployment and candidates:
+            area = rng.choice(candidates)
+            if dice[area] >= rules.max_dice_per_area:
+                candidates.remove(area)
+            else:
+                if area not in changed:
+                    changed.add(area)
+                    changes.append((area, player, dice[area]))
+                self.__set_area(area, player, dice[area] + 1)
+                available_for_deployment -= 1
+
+        if rules.reserve_type == 'constant':
+            reserve_cap = rules.reserve_cap
+        else:
+            reserve_cap = rules.reserve_cap - len(areas)
+        self.__set_reserve(player, max(0, min(reserve_dice, reserve_cap)))
+
+        self.__set_current_player(self.__next_player())
+
+    def undo(self):
+        """Take back the last move
+        """
+        (area_changes, players, reserves, self.current_player, self.nb_battles,
+         self.nb_consecutive_end_of_turns, self.nb_players_alive, self.hash) = self.history.pop()
+
+        for area, owner, dice in area_changes:
+            self.owners[area] = owner
+            self.dice[area] = dice
+        for player, (areas, largest_region) in players.items():
+            self.player_areas[player] = areas
+            self.largest_region[player] = largest_region
+        self.reserves.update(reserves)
+
+    ###########
+    # RESULTS #
+    ###########
+    def is_over(self):
+        """Check whether the server would end the game
+        """
+        return self.winner() is not None or self.is_cancelled()
+
+    def is_cancelled(self):
+        """Check whether the game ended without a winner because of a limit
+        """
+        if self.nb_consecutive_end_of_turns // self.nb_players_alive == self.rules.max_pass_rounds:
+            return True
+        return self.nb_battles == self.rules.max_battles_per_game
+
+    def winner(self):
+        """Get the player owning all areas, None if there is no such player
+        """
+        owner = self.owners[0]
+        if len(self.player_areas[owner]) == len(self.names):
+            return owner
+        return None
+
+    ###########
+    # HELPERS #
+    ###########
+    def __push_history(self, area_changes):
+        self.history.append((
+            area_changes, {}, {}, self.current_player, self.nb_battles,
+            self.nb_consecutive_end_of_turns, self.nb_players_alive, self.hash,
+        ))
+
+    def __save_players(self, players):
+        saved = self.history[-1][1]
+        for player in players:
+            saved[player] = (self.player_areas[player], self.largest_region[player])
+
+    def __set_area(self, area, owner, dice):
+        old_key = area * self.area_stride + self.owners[area] * self.dice_stride + self.dice[area]
+        new_key = area * self.area_stride + owner * self.dice_stride + dice
+        self.hash ^= self.area_keys[old_key] ^ self.area_keys[new_key]
+        self.owners[area] = owner
+        self.dice[area] = dice
+
+    def __set_reserve(self, player, reserve):
+        self.history[-1][2][player] = self.reserves[player]
+        offset = player * self.reserve_stride
+        self.hash ^= self.reserve_keys[offset + self.reserves[player]] ^ self.reserve_keys[offset + reserve]
+        self.reserves[player] = reserve
+
+    def __set_current_player(self, player):
+        self.hash ^= self.player_keys[self.current_player] ^ self.player_keys[player]
+        self.current_player = player
+
+    def __next_player(self):
+        """See Game.set_next_player() of the server
+        """
+        nb_players = len(self.players_order)
+        idx = self.players_order.index(self.current_player)
+        while True:
+            idx = (idx + 1) % nb_players
+            player = self.players_order[idx]
+            if self.player_areas[player]:
+                return player
+
+    def __regions(self, areas, player):
+        """Order areas by regions, see Player.update_regions() of the server
+
+        Returns
+        -------
+        (list of int, int)
+            Reordered areas and size of the largest region
+        """
+        owners = self.owners
+        neighbours = self.neighbours
+        largest_region_size = 0
+        ordered = []
+        seen = set()
+
+        for first_area in areas:
+            if first_area in seen:
+                continue
+
+            seen.add(first_area)
+            to_visit = deque([first_area])
+            region_size = 0
+            while to_visit:
+                area = to_visit.popleft()
+                ordered.append(area)
+                region_size += 1
+                for n in neighbours[area]:
+                    if n not in seen and owners[n] == player:
+                        seen.add(n)
+                        to_visit.append(n)
+
+            largest_region_size = max(largest_region_size, region_size)
+
+        return ordered, largest_region_size
+
+
+class TranspositionTable:
+    """Results of search keyed by Zobrist hashes, bounded in size
+
+    Once full, the least recently used entry is evicted for a new one.
+
+    Attributes
+    ----------
+    hits, misses : int
+        Statistics of lookups
+    """
+    def __init__(self, max_entries=1 << 16):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
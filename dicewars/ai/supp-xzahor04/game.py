@@ -39,6 +39,7 @@ class AI:
         # get areas that we can attack from
         attacks = possible_attacks(board, self.player_name)
 
+        candidates = []
         for source, target in attacks:
 
             new_board = copy.deepcopy(board)
@@ -53,9 +54,12 @@ class AI:
 
             # current game state
             state_old, areas_names = self.get_state(new_board, new_target)
+            candidates.append((source, target, state_old, areas_names))
 
-            # get move
-            final_move = self.get_action(state_old)
+        # get moves for all attacks at once
+        final_moves = self.get_actions([state_old for _, _, state_old, _ in candidates])
+
+        for (source, target, state_old, areas_names), final_move in zip(candidates, final_moves):
             self.num_actions += 1
 
             self.states_old.append((state_old, areas_names, final_move))
@@ -181,11 +185,19 @@ class AI:
         self.trainer.train_step(state, action, reward, next_state, done)
 
     def get_action(self, state):
-        final_move = [0,0]
+        return self.get_actions([state])[0]
+
+    def get_actions(self, states):
+        if not states:
+            return []
+
+        with torch.no_grad():
+            predictions = self.model(torch.tensor(np.array(states), dtype=torch.float))
 
-        state0 = torch.tensor(state, dtype=torch.float)
-        prediction = self.model(state0)
-        move = torch.argmax(prediction).item()
-        final_move[move] = 1
+        final_moves = []
+        for move in torch.argmax(predictions, dim=1).tolist():
+            final_move = [0,0]
+            final_move[move] = 1
+            final_moves.append(final_move)
 
-        return final_move
+        return final_moves
@@ -1,9 +1,13 @@
-import numpy
 from dicewars.client.game.board import Board
 from dicewars.client.game.area import Area
+from dicewars.ai.probabilities import attack_success_probability, battle_table, DEFAULT_MAX_DICE
 from typing import Iterator, Tuple
 import pickle
 
+from dicewars.lazy import lazy_import
+
+numpy = lazy_import('numpy')
+
 
 def sigmoid(a):
     """Logistic sigmoid
@@ -73,7 +77,7 @@ def probability_of_successful_attack(board, atk_area, target_area):
 
 
 def attack_succcess_probability(atk, df):
-    """Dictionary with pre-calculated probabilities for each combination of dice
+    """Probability of attack success for a combination of dice
 
     Parameters
     ----------
@@ -86,78 +90,7 @@ def attack_succcess_probability(atk, df):
     -------
     float
     """
-    return {
-        2: {
-            1: 0.83796296,
-            2: 0.44367284,
-            3: 0.15200617,
-            4: 0.03587963,
-            5: 0.00610497,
-            6: 0.00076625,
-            7: 0.00007095,
-            8: 0.00000473,
-        },
-        3: {
-            1: 0.97299383,
-            2: 0.77854938,
-            3: 0.45357510,
-            4: 0.19170096,
-            5: 0.06071269,
-            6: 0.01487860,
-            7: 0.00288998,
-            8: 0.00045192,
-        },
-        4: {
-            1: 0.99729938,
-            2: 0.93923611,
-            3: 0.74283050,
-            4: 0.45952825,
-            5: 0.22044235,
-            6: 0.08342284,
-            7: 0.02544975,
-            8: 0.00637948,
-        },
-        5: {
-            1: 0.99984997,
-            2: 0.98794010,
-            3: 0.90934714,
-            4: 0.71807842,
-            5: 0.46365360,
-            6: 0.24244910,
-            7: 0.10362599,
-            8: 0.03674187,
-        },
-        6: {
-            1: 0.99999643,
-            2: 0.99821685,
-            3: 0.97529981,
-            4: 0.88395347,
-            5: 0.69961639,
-            6: 0.46673060,
-            7: 0.25998382,
-            8: 0.12150697,
-        },
-        7: {
-            1: 1.00000000,
-            2: 0.99980134,
-            3: 0.99466336,
-            4: 0.96153588,
-            5: 0.86237652,
-            6: 0.68516499,
-            7: 0.46913917,
-            8: 0.27437553,
-        },
-        8: {
-            1: 1.00000000,
-            2: 0.99998345,
-            3: 0.99906917,
-            4: 0.98953404,
-            5: 0.94773146,
-            6: 0.84387382,
-            7: 0.67345564,
-            8: 0.47109073,
-        },
-    }[atk][df]
+    return attack_success_probability(atk, df)
 
 
 def possible_attacks(board: Board, player_name: int) -> Iterator[Tuple[Area, Area]]:
@@ -173,6 +106,132 @@ def possible_attacks(board: Board, player_name: int) -> Iterator[Tuple[Area, Are
                 yield (area, adjacent_area)
 
 
+class BoardArrays:
+    """Board as arrays, for analysis of all moves at once
+
+    Areas are indexed by their position in the board. Adjacency is kept in
+    compressed sparse row form, neighbours of area i are
+    indices[indptr[i]:indptr[i+1]].
+
+    Attributes
+    ----------
+    names : numpy.ndarray of int
+        Names of areas
+    positions : dict of int: int
+        Position of every area
+    indptr : numpy.ndarray of int
+    indices : numpy.ndarray of int
+    owners : numpy.ndarray of int
+    dice : numpy.ndarray of int
+    """
+    def __init__(self, board: Board):
+        areas = list(board.areas.values())
+        self.names = numpy.array([area.get_name() for area in areas])
+        self.positions = {area.get_name(): i for i, area in enumerate(areas)}
+
+        degrees = [len(area.get_adjacent_areas_names()) for area in areas]
+        self.indptr = numpy.zeros(len(areas) + 1, dtype=int)
+        numpy.cumsum(degrees, out=self.indptr[1:])
+        self.indices = numpy.array([self.positions[n] for area in areas for n in area.get_adjacent_areas_names()], dtype=int)
+        self.owners = numpy.array([area.get_owner_name() for area in areas])
+        self.dice = numpy.array([area.get_dice() for area in areas])
+
+        self.edge_sources = numpy.repeat(numpy.arange(len(areas)), degrees)
+        self.table = battle_table(max(DEFAULT_MAX_DICE, int(self.dice.max())))
+
+    def possible_attacks(self, player_name):
+        """Get all attacks of a player, in the order of `possible_attacks()`
+
+        Returns
+        -------
+        (numpy.ndarray of int, numpy.ndarray of int)
+            Positions of attacking and attacked areas
+        """
+        sources = self.edge_sources
+        targets = self.indices
+        valid = (self.owners[sources] == player_name) & (self.dice[sources] >= 2) & (self.owners[targets] != player_name)
+        return sources[valid], targets[valid]
+
+    def holding_probabilities(self, areas, dice, player_name):
+        """Estimate probabilities of holding areas until next turn
+
+        Vectorized `probability_of_holding_area()`, neighbours not owned by
+        the player and having more than one die are considered attackers.
+
+        Parameters
+        ----------
+        areas : numpy.ndarray of int
+            Positions of areas
+        dice : numpy.ndarray of int
+            Dice the player would have in each of the areas
+        player_name : int
+
+        Returns
+        -------
+        numpy.ndarray of float
+        """
+        areas = numpy.asarray(areas, dtype=int)
+        if len(areas) == 0:
+            return numpy.ones(0)
+
+        starts = self.indptr[areas]
+        counts = self.indptr[areas + 1] - starts
+        first = numpy.cumsum(counts) - counts
+        rows = numpy.repeat(numpy.arange(len(areas)), counts)
+        neighbours = self.indices[numpy.arange(counts.sum()) - first[rows] + starts[rows]]
+
+        enemy_dice = self.dice[neighbours]
+        threats = (self.owners[neighbours] != player_name) & (enemy_dice > 1)
+        factors = numpy.where(threats, 1.0 - self.table.success_probabilities(enemy_dice, numpy.asarray(dice)[rows]), 1.0)
+
+        holding = numpy.ones(len(areas))
+        nonempty = counts > 0
+        holding[nonempty] = numpy.multiply.reduceat(factors, first[nonempty])
+        return holding
+
+    def analyse_attacks(self, player_name):
+        """Evaluate all attacks of a player at once
+
+        Returns
+        -------
+        AttackAnalysis
+        """
+        sources, targets = self.possible_attacks(player_name)
+        atk_dice = self.dice[sources]
+        def_dice = self.dice[targets]
+        success = self.table.success_probabilities(atk_dice, def_dice)
+        hold = self.holding_probabilities(targets, atk_dice - 1, player_name)
+        return AttackAnalysis(self.names[sources], self.names[targets], atk_dice, def_dice, success, hold)
+
+
+class AttackAnalysis:
+    """Attacks of a player evaluated by `BoardArrays.analyse_attacks()`
+
+    Attributes
+    ----------
+    sources : numpy.ndarray of int
+        Names of attacking areas
+    targets : numpy.ndarray of int
+        Names of attacked areas
+    atk_dice : numpy.ndarray of int
+    def_dice : numpy.ndarray of int
+    success : numpy.ndarray of float
+        Probabilities of winning the battles
+    hold : numpy.ndarray of float
+        Probabilities of holding the conquered areas until next turn
+    """
+    def __init__(self, sources, targets, atk_dice, def_dice, success, hold):
+        self.sources = sources
+        self.targets = targets
+        self.atk_dice = atk_dice
+        self.def_dice = def_dice
+        self.success = success
+        self.hold = hold
+
+    def __len__(self):
+        return len(self.sources)
+
+
 def save_state(f, board, player_name, players_order):
     save_game = {
         'player_name': player_name,
@@ -0,0 +1,145 @@
+"""Evaluation of the Q-network with NumPy only
+
+Weights of `Linear_QNet` are exported from model.pth into model.npz, which
+loads without torch. The exporting itself does not need torch either, the
+archive written by torch.save() is read by a restricted unpickler.
+"""
+import collections
+from functools import lru_cache
+import os
+import pickle
+import zipfile
+
+import numpy as np
+
+
+MODEL_FOLDER_PATH = os.path.dirname(os.path.abspath(__file__))
+TORCH_FILE = os.path.join(MODEL_FOLDER_PATH, 'model.pth')
+NUMPY_FILE = os.path.join(MODEL_FOLDER_PATH, 'model.npz')
+
+STORAGE_DTYPES = {
+    'FloatStorage': np.float32,
+    'DoubleStorage': np.float64,
+    'HalfStorage': np.float16,
+    'LongStorage': np.int64,
+    'IntStorage': np.int32,
+}
+
+
+def _rebuild_tensor(storage, storage_offset, size, stride, *args):
+    itemsize = storage.dtype.itemsize
+    return np.lib.stride_tricks.as_strided(
+        storage[storage_offset:], shape=size, strides=[s * itemsize for s in stride]
+    ).copy()
+
+
+class _StateDictUnpickler(pickle.Unpickler):
+    """Unpickler of state dicts saved by torch, producing numpy arrays
+
+    Only the few globals a state dict of tensors refers to are allowed.
+    """
+    def __init__(self, data, archive, prefix):
+        super().__init__(data)
+        self.archive = archive
+        self.prefix = prefix
+
+    def find_class(self, module, name):
+        if (module, name) == ('collections', 'OrderedDict'):
+            return collections.OrderedDict
+        if (module, name) == ('torch._utils', '_rebuild_tensor_v2'):
+            return _rebuild_tensor
+        if module == 'torch' and name in STORAGE_DTYPES:
+            return STORAGE_DTYPES[name]
+        raise pickle.UnpicklingError('{}.{} is not allowed in a state dict'.format(module, name))
+
+    def persistent_load(self, pid):
+        typename, dtype, key, location, numel = pid
+        if typename != 'storage':
+            raise pickle.UnpicklingError('Unknown persistent id {}'.format(typename))
+        data = self.archive.read('{}/data/{}'.format(self.prefix, key))
+        return np.frombuffer(data, dtype=dtype, count=numel)
+
+
+def read_torch_state_dict(path=TORCH_FILE):
+    """Read tensors of a state dict saved by torch.save()
+
+    Returns
+    -------
+    dict of str: numpy.ndarray
+    """
+    with zipfile.ZipFile(path) as archive:
+        pickle_name = next(name for name in archive.namelist() if name.endswith('/data.pkl'))
+        prefix = pickle_name[:-len('/data.pkl')]
+        with archive.open(pickle_name) as data:
+            state_dict = _StateDictUnpickler(data, archive, prefix).load()
+    return {name: np.asarray(tensor) for name, tensor in state_dict.items()}
+
+
+@lru_cache(maxsize=None)
+def _read_weights(numpy_path, torch_path):
+    if os.path.exists(numpy_path):
+        with np.load(numpy_path) as weights:
+            return dict(weights)
+    return read_torch_state_dict(torch_path)
+
+
+def export_weights(torch_path=TORCH_FILE, numpy_path=NUMPY_FILE):
+    """Convert model.pth into a NumPy weight file
+    """
+    np.savez(numpy_path, **read_torch_state_dict(torch_path))
+
+
+class NumpyQNet:
+    """Linear_QNet evaluated by NumPy, in float32 as by torch
+    """
+    def __init__(self, weights):
+        """
+        Parameters
+        ----------
+        weights : dict of str: numpy.ndarray
+            State dict of Linear_QNet
+        """
+        self.w1 = np.ascontiguousarray(weights['linear1.weight'].T, dtype=np.float32)
+        self.b1 = np.asarray(weights['linear1.bias'], dtype=np.float32)
+        self.w2 = np.ascontiguousarray(weights['linear2.weight'].T, dtype=np.float32)
+        self.b2 = np.asarray(weights['linear2.bias'], dtype=np.float32)
+
+    @classmethod
+    def load(cls, numpy_path=NUMPY_FILE, torch_path=TORCH_FILE):
+        """Load exported weights, or read them from the torch file if there are none
+
+        The files are read once per process, an AI client playing many games
+        constructs its AI from weights already loaded.
+        """
+        return cls(_read_weights(numpy_path, torch_path))
+
+    def predict(self, states):
+        """Evaluate a batch of states in one pass
+
+        Parameters
+        ----------
+        states : numpy.ndarray
+            Array of shape (n, 7)
+
+        Returns
+        -------
+        numpy.ndarray
+            Q-values of shape (n, 2)
+        """
+        x = np.asarray(states, dtype=np.float32)
+        hidden = np.maximum(x @ self.w1 + self.b1, 0.0)
+        return hidden @ self.w2 + self.b2
+
+    def get_actions(self, states):
+        """Get one-hot actions for a batch of states, see AI.get_action()
+
+        Returns
+        -------
+        list of list of int
+        """
+        actions = []
+        for move in np.argmax(self.predict(states), axis=1).tolist():
+            final_move = [0, 0]
+            final_move[move] = 1
+            actions.append(final_move)
+        return actions
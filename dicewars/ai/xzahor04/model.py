@@ -4,6 +4,8 @@ import torch.optim as optim
 import torch.nn.functional as F
 import os
 
+from dicewars.ai.xzahor04.inference import export_weights
+
 class Linear_QNet(nn.Module):
     def __init__(self, input_size, hidden_size, output_size):
         super().__init__()
@@ -22,6 +24,7 @@ class Linear_QNet(nn.Module):
 
         file_name = os.path.join(model_folder_path, file_name)
         torch.save(self.state_dict(), file_name)
+        export_weights(file_name, os.path.splitext(file_name)[0] + '.npz')
 
     def load(self, file_name='model.pth'):
         model_folder_path = './dicewars/ai/xzahor04'
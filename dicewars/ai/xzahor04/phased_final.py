@@ -2,7 +2,6 @@ from copy import deepcopy
 import logging
 import numpy as np
 from random import random
-import torch
 from collections import deque
 
 from dicewars.client.ai_driver import BattleCommand, EndTurnCommand, TransferCommand
@@ -11,9 +10,10 @@ from dicewars.client.game.board import Board
 # For typing hints
 from typing import Dict, Tuple, List
 from dicewars.client.game.area import Area
+from dicewars.ai.probabilities import attack_success_probability
 
 # NN
-from dicewars.ai.xzahor04.model import Linear_QNet, QTrainer
+from dicewars.ai.xzahor04.inference import NumpyQNet
 
 MAX_MEMORY = 100000
 BATCH_SIZE = 1000
@@ -46,9 +46,7 @@ class AI:
         self.states_old = []
         self.num_actions = 0
         self.memory = deque(maxlen=MAX_MEMORY) # popleft()
-        self.model = Linear_QNet(7, 256, 2)
-        self.model.load()
-        self.trainer = QTrainer(self.model, lr=0.001, gamma=0.9)
+        self.model = NumpyQNet.load()
 
     def ai_turn(self, board, nb_moves_this_turn, nb_transfers_this_turn, nb_turns_this_game, time_left, sim=None):
         """AI agent's turn
@@ -164,14 +162,7 @@ class AI:
         A list of two values predicting whether a move should be taken based on `state`.
         If it should be taken, then [1,0] is returned, [0,1] otherwise.
         """
-        final_move = [0,0]
-
-        state0 = torch.tensor(state, dtype=torch.float)
-        prediction = self.model(state0)
-        move = torch.argmax(prediction).item()
-        final_move[move] = 1
-
-        return final_move
+        return self.model.get_actions([state])[0]
 
     def get_state(self, board, defender_area):
 
@@ -690,13 +681,14 @@ class AI:
         # Print out possible attacks
         #AI_Debug.print_possible_attacks(attacks)
 
+        # Get predictions for NN for all attacks at once
+        states = [self.get_state(board, board.get_area(attack[1][0][1]))[0] for attack in attacks]
+        keep_areas = [action[0] for action in self.model.get_actions(states)] if attacks else []
+
         # Go through all possible attacks
-        for attack in attacks:
+        for attack, keep_area in zip(attacks, keep_areas):
             # Check if we are able to win first fight
             if AI_Utils.attack_win_loss(attack[0][1], attack[1][0][1]):
-                # Attack is successful, get state for NN and its prediction
-                state, _unused = self.get_state(board, board.get_area(attack[1][0][1]))
-                keep_area = self.get_action(state)[0]
 
                 # Check if we will be able to keep our area after attack
                 if keep_area:
@@ -1034,7 +1026,7 @@ class AI_Utils:
         return False
 
     def attack_succcess_probability(atk, df):
-        """Dictionary with pre-calculated probabilities for each combination of dice
+        """Probability of attack success for a combination of dice
 
         Parameters
         ----------
@@ -1047,79 +1039,7 @@ class AI_Utils:
         -------
         float
         """
-
-        return {
-            2: {
-                1: 0.83796296,
-                2: 0.44367284,
-                3: 0.15200617,
-                4: 0.03587963,
-                5: 0.00610497,
-                6: 0.00076625,
-                7: 0.00007095,
-                8: 0.00000473,
-            },
-            3: {
-                1: 0.97299383,
-                2: 0.77854938,
-                3: 0.45357510,
-                4: 0.19170096,
-                5: 0.06071269,
-                6: 0.01487860,
-                7: 0.00288998,
-                8: 0.00045192,
-            },
-            4: {
-                1: 0.99729938,
-                2: 0.93923611,
-                3: 0.74283050,
-                4: 0.45952825,
-                5: 0.22044235,
-                6: 0.08342284,
-                7: 0.02544975,
-                8: 0.00637948,
-            },
-            5: {
-                1: 0.99984997,
-                2: 0.98794010,
-                3: 0.90934714,
-                4: 0.71807842,
-                5: 0.46365360,
-                6: 0.24244910,
-                7: 0.10362599,
-                8: 0.03674187,
-            },
-            6: {
-                1: 0.99999643,
-                2: 0.99821685,
-                3: 0.97529981,
-                4: 0.88395347,
-                5: 0.69961639,
-                6: 0.46673060,
-                7: 0.25998382,
-                8: 0.12150697,
-            },
-            7: {
-                1: 1.00000000,
-                2: 0.99980134,
-                3: 0.99466336,
-                4: 0.96153588,
-                5: 0.86237652,
-                6: 0.68516499,
-                7: 0.46913917,
-                8: 0.27437553,
-            },
-            8: {
-                1: 1.00000000,
-                2: 0.99998345,
-                3: 0.99906917,
-                4: 0.98953404,
-                5: 0.94773146,
-                6: 0.84387382,
-                7: 0.67345564,
-                8: 0.47109073,
-            },
-        }[atk][df]
+        return attack_success_probability(atk, df)
 
 
 class AI_Debug:
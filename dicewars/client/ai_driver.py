@@ -1,5 +1,3 @@
-import copy
-import json
 from json.decoder import JSONDecodeError
 import logging
 import signal
@@ -60,8 +58,8 @@ class AIDriver:
 
         self.ai_disabled = False
         try:
-            board_copy = copy.deepcopy(self.board)
-            players_order_copy = copy.deepcopy(self.game.players_order)
+            board_copy = self.board.copy()
+            players_order_copy = list(self.game.players_order)
             with FixedTimer(time_limit_constructor):
                 self.ai = ai_constructor(
                     self.player_name,
@@ -84,50 +82,73 @@ class AIDriver:
         self.timer = FischerTimer(fischer_init, fischer_increment)
 
     def run(self):
-        """Main AI agent loop
+        """Main AI agent loop, returns once the game is over
+
+        Returns
+        -------
+        dict
+            The message ending the game, 'game_end' or 'close_socket' if
+            the connection was closed
         """
         game = self.game
 
         while True:
             message = game.input_queue.get(block=True, timeout=None)
             try:
-                if not self.handle_server_message(message):
-                    exit(0)
+                if not self.process_message(message):
+                    return message
             except JSONDecodeError:
                 self.logger.error("Invalid message from server.")
                 exit(1)
 
-            self.current_player_name = game.current_player.get_name()
+    def process_message(self, message):
+        """Update the game with a server message and make a move if it is our turn
 
-            if self.current_player_name == self.player_name and not self.waitingForResponse:
-                if self.ai_disabled:
-                    self.logger.warning("The AI has already misbehaved, just end-turning.")
-                    self.send_message('end_turn')
-                    continue
-
-                try:
-                    board_copy = copy.deepcopy(self.board)
-                    with self.timer as time_left:
-                        command = self.ai.ai_turn(
-                            board_copy,
-                            self.moves_this_turn,
-                            self.transfers_this_turn,
-                            self.turns_finished,
-                            time_left
-                        )
-                    self.process_command(command)
-                except TimeoutError:
-                    self.logger.warning("Forced 'end_turn' because of timeout")
-                    self.send_message('end_turn')
-                    self.time_left_last_time = -1.0
-                except Exception:
-                    self.logger.error("The AI crashed during attempt to make a move:\n", exc_info=True)
-                    self.send_message('end_turn')
-                    self.ai_disabled = True
+        Returns
+        -------
+        bool
+            False once the game has ended, True otherwise
+        """
+        if not self.handle_server_message(message):
+            return False
 
-                if not self.waitingForResponse:
-                    self.logger.warning("Forced 'end_turn' because the implementation did nothing")
-                    self.send_message('end_turn')
+        self.current_player_name = self.game.current_player.get_name()
+
+        if self.game.awaiting_state:
+            # the board is stale until the requested game state arrives
+            return True
+
+        if self.current_player_name == self.player_name and not self.waitingForResponse:
+            if self.ai_disabled:
+                self.logger.warning("The AI has already misbehaved, just end-turning.")
+                self.send_message('end_turn')
+                return True
+
+            try:
+                board_copy = self.board.copy()
+                with self.timer as time_left:
+                    command = self.ai.ai_turn(
+                        board_copy,
+                        self.moves_this_turn,
+                        self.transfers_this_turn,
+                        self.turns_finished,
+                        time_left
+                    )
+                self.process_command(command)
+            except TimeoutError:
+                self.logger.warning("Forced 'end_turn' because of timeout")
+                self.send_message('end_turn')
+                self.time_left_last_time = -1.0
+            except Exception:
+                self.logger.error("The AI crashed during attempt to make a move:\n", exc_info=True)
+                self.send_message('end_turn')
+                self.ai_disabled = True
+
+            if not self.waitingForResponse:
+                self.logger.warning("Forced 'end_turn' because the implementation did nothing")
+                self.send_message('end_turn')
+
+        return True
 
     def handle_server_message(self, msg):
         """Process message from the server
@@ -151,9 +172,16 @@ class AIDriver:
             self.game.process_end_turn_msg(msg)
             self.waitingForResponse = False
 
+        elif msg['type'] == 'game_state':
+            self.game.process_game_state_msg(msg)
+
         elif msg['type'] == 'game_end':
             self.logger.info("Player {} has won".format(msg['winner']))
-            self.game.socket.close()
+            self.game.close()
+            return False
+
+        elif msg['type'] == 'close_socket':
+            self.logger.error("Connection closed by the server.")
             return False
 
         return True
@@ -216,7 +244,7 @@ class AIDriver:
         self.waitingForResponse = True
 
         try:
-            self.game.socket.send(str.encode(json.dumps(msg)))
+            self.game.socket.send(self.game.encode_message(msg))
         except BrokenPipeError:
             self.logger.error("Connection to server broken.")
             exit(1)
@@ -1,7 +1,7 @@
 import logging
 import itertools
 
-from PyQt5.QtWidgets import QWidget, QGridLayout, QPushButton
+from PyQt5.QtWidgets import QWidget, QGridLayout, QPushButton, QSpinBox
 
 from .ui import Battle, MainWindow, Score, StatusArea
 
@@ -74,8 +74,25 @@ class DebuggerUI(QWidget):
         grid.addWidget(self.change_labels, 8, 9, 1, 1)
         grid.addWidget(self.status_area, 9, 8, 1, 3)
 
+        if self.game.replay is not None:
+            self.event_selector = QSpinBox()
+            self.event_selector.setRange(0, self.game.replay.nb_events)
+            self.event_selector.setValue(self.game.event)
+            self.event_selector.setPrefix('Event ')
+            self.event_selector.valueChanged.connect(self.handle_event_selection)
+            grid.addWidget(self.event_selector, 8, 10, 1, 1)
+
         self.setLayout(grid)
 
+    def handle_event_selection(self, event):
+        """Show the state of the replayed game before the event
+        """
+        self.game.seek(event)
+        self.main_area.board = self.game.board
+        self.main_area.deactivate_area()
+        for widget in (self.main_area, self.score_area, self.status_area):
+            widget.update()
+
     def handle_change_labels_button(self):
         name, fn = next(self.area_text_fn_it)
         self.main_area.set_area_text_fn(fn)
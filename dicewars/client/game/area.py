@@ -15,13 +15,37 @@ class Area:
         neighbours : list of int
         hexes : list of list of int
             Hex coordinates of for all Area's hexes
+
+        Attributes
+        ----------
+        board : Board
+            Board keeping track of the Area's owner, None for a standalone Area
         """
+        self.board = None
         self.name = int(name)
         self.owner_name = int(owner)
         self.dice = int(dice)
         self.neighbours = [int(n) for n in neighbours]
         self.hexes = [[int(i) for i in h] for h in hexes]
 
+    def copy(self):
+        """Copy the Area's owner and dice
+
+        Neighbours and hexes do not change during the game, so the copy
+        shares them with the original.
+        """
+        area = Area.__new__(Area)
+        area.board = None
+        area.name = self.name
+        area.owner_name = self.owner_name
+        area.dice = self.dice
+        area.neighbours = self.neighbours
+        area.hexes = self.hexes
+        return area
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
     def get_adjacent_areas_names(self) -> List[int]:
         """Return names of adjacent areas
         """
@@ -58,7 +82,10 @@ class Area:
     def set_owner(self, name: int) -> None:
         """Set owner name
         """
+        previous_owner = self.owner_name
         self.owner_name = int(name)
+        if self.board is not None and previous_owner != self.owner_name:
+            self.board.owner_changed(self, previous_owner)
 
     ##############
     # UI METHODS #
@@ -1,9 +1,14 @@
 from .area import Area
+from .regions import Regions
 from typing import List, Optional
 
 
 class Board:
     """Game board
+
+    Areas of every player and areas at the border are indexed, the indexes
+    are kept up to date by Area.set_owner(), so that queries about a player
+    take time proportional to the size of the answer.
     """
     def __init__(self, areas, board):
         """
@@ -13,11 +18,56 @@ class Board:
             Dictionary of game areas and their neighbours
         board : dict
             Dictionary describing the game's board
+
+        Attributes
+        ----------
+        positions : dict of int: int
+            Position of every area in the board, areas are listed in this order
+        player_areas : dict of int: set of int
+            Names of areas owned by each player
+        border : set of int
+            Names of areas adjacent to an area of another player
+        player_regions : dict of int: Regions
+            Regions of players, computed when asked for
         """
         self.areas = {}
         for area in areas:
             self.areas[area] = Area(area, areas[area]['owner'], areas[area]['dice'],
                                     board[area]['neighbours'], board[area]['hexes'])
+            self.areas[area].board = self
+
+        self.positions = {area.name: i for i, area in enumerate(self.areas.values())}
+        self.player_areas = {}
+        for area in self.areas.values():
+            self.player_areas.setdefault(area.owner_name, set()).add(area.name)
+        self.border = {area.name for area in self.areas.values() if self.__has_foreign_neighbour(area)}
+        self.player_areas_lists = {}
+        self.player_regions = {}
+
+    def copy(self) -> 'Board':
+        """Get a snapshot of the board
+
+        Takes time proportional to the number of areas, as only owners and
+        dice get copied. Neighbours and hexes are shared with the original.
+        """
+        board = Board.__new__(Board)
+        board.areas = {}
+        for name, area in self.areas.items():
+            board.areas[name] = area.copy()
+            board.areas[name].board = board
+        board.positions = self.positions
+        board.player_areas = {player: set(names) for player, names in self.player_areas.items()}
+        board.border = set(self.border)
+        board.player_areas_lists = {}
+        board.player_regions = {}
+        return board
+
+    def __deepcopy__(self, memo):
+        board = self.copy()
+        memo[id(self)] = board
+        for name, area in self.areas.items():
+            memo[id(area)] = board.areas[name]
+        return board
 
     def get_area(self, idx: int):
         """Get Area given its name
@@ -26,69 +76,101 @@ class Board:
 
     def get_player_areas(self, player_name: int) -> List[Area]:
         """Get all Areas belonging to a player
+
+        Areas are listed in the order of the board.
         """
-        return [area for area in self.areas.values() if area.get_owner_name() == player_name]
+        if player_name not in self.player_areas_lists:
+            names = sorted(self.player_areas.get(player_name, ()), key=self.positions.__getitem__)
+            self.player_areas_lists[player_name] = [self.get_area(name) for name in names]
+        return list(self.player_areas_lists[player_name])
 
     def get_player_border(self, player_name: int) -> List[Area]:
         """Get all Areas belonging to a player which border other players' Areas
         """
-        return [area for area in self.get_player_areas(player_name) if self.is_at_border(area)]
+        border = self.border
+        return [area for area in self.get_player_areas(player_name) if area.name in border]
 
     def get_player_dice(self, player_name: int) -> int:
         """Get the number of all dice of a given player
         """
         return sum([area.get_dice() for area in self.get_player_areas(player_name)])
 
+    def get_regions(self, player_name: int) -> Regions:
+        """Get unbroken regions of a player
+
+        The result is kept until the player gains or loses an area.
+        """
+        if player_name not in self.player_regions:
+            self.player_regions[player_name] = Regions(self, [area.name for area in self.get_player_areas(player_name)])
+        return self.player_regions[player_name]
+
     def get_players_regions(self, player_name: int, skip_area: Optional[int] = None) -> List[List[int]]:
         """Get all unbroken regions belonging to a player.
 
         Returns them as a list of regions, where every region a list of names of area in the region.
         If skip_area is given, it is treated as not belonging to the player.
         """
-        area_names_to_test = [area.get_name() for area in self.get_player_areas(player_name) if area.get_name() != skip_area]
+        regions = self.get_regions(player_name)
+        if skip_area in regions.label:
+            regions = Regions(self, [name for name in regions.area_names if name != skip_area])
 
-        if not area_names_to_test:
+        if not regions.regions:
             return [[]]
-
-        regions = []
-        while area_names_to_test:
-            area_names_in_current_region = self.get_areas_region(area_names_to_test[0], area_names_to_test)
-            assert(len(area_names_in_current_region) > 0)
-            regions.append(area_names_in_current_region)
-
-            for area in area_names_in_current_region:
-                area_names_to_test.remove(area)
-
-        return regions
+        return [list(region) for region in regions.regions]
 
     def get_areas_region(self, area_name: int, available_areas: List[int]) -> List[int]:
         """Get all areas from available_areas which are in the same region as the given one.
 
         Returns them as a list of regions, where every region a list of names of area in the region.
         """
-        to_test = {area_name}
-        current_region = []
+        available_areas = set(available_areas)
+        to_test = [area_name]
+        current_region = [area_name]
+        visited = {area_name}
 
         while to_test:
             current_area = to_test.pop()
+            for neighbour_name in self.get_area(current_area).get_adjacent_areas_names():
+                if neighbour_name in available_areas and neighbour_name not in visited:
+                    visited.add(neighbour_name)
+                    current_region.append(neighbour_name)
+                    to_test.append(neighbour_name)
 
-            if current_area in current_region:
-                continue
+        return current_region
 
-            current_region.append(current_area)
+    def get_largest_region_size(self, player_name: int) -> int:
+        """Get number of areas in the largest region of a player
+        """
+        return self.get_regions(player_name).largest_size
 
-            for neighbour_name in self.get_area(current_area).get_adjacent_areas_names():
-                if neighbour_name in current_region:
-                    continue
-                if neighbour_name in current_region:
-                    continue
+    def is_at_border(self, area: Area) -> bool:
+        if area.board is self:
+            return area.name in self.border
+        return self.__has_foreign_neighbour(area)
 
-                if neighbour_name in available_areas:
-                    to_test.add(neighbour_name)
+    def nb_players_alive(self) -> int:
+        return len([names for names in self.player_areas.values() if names])
 
-        return current_region
+    def owner_changed(self, area: Area, previous_owner: int) -> None:
+        """Update indexes after an Area got a new owner
 
-    def is_at_border(self, area: Area) -> bool:
+        Called by Area.set_owner(), the border status may change for the
+        Area itself and for all of its neighbours.
+        """
+        self.player_areas[previous_owner].discard(area.name)
+        self.player_areas.setdefault(area.owner_name, set()).add(area.name)
+        self.player_areas_lists.pop(previous_owner, None)
+        self.player_areas_lists.pop(area.owner_name, None)
+        self.player_regions.pop(previous_owner, None)
+        self.player_regions.pop(area.owner_name, None)
+
+        for name in [area.name] + area.neighbours:
+            if self.__has_foreign_neighbour(self.get_area(name)):
+                self.border.add(name)
+            else:
+                self.border.discard(name)
+
+    def __has_foreign_neighbour(self, area: Area) -> bool:
         owner = area.get_owner_name()
         neighbourhood_names = area.get_adjacent_areas_names()
 
@@ -98,6 +180,3 @@ class Board:
                 return True
 
         return False
-
-    def nb_players_alive(self) -> int:
-        return len(set(area.get_owner_name() for area in self.areas.values()))
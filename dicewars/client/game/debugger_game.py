@@ -1,5 +1,6 @@
 import pickle
 from queue import Queue
+from .board import Board
 from .player import Player
 
 
@@ -9,20 +10,58 @@ class StaticGame:
     def __init__(self, f):
         self.input_queue = Queue()
         self.players = {}
+        self.replay = None
+        self.event = None
 
         save_game = pickle.load(f)
 
         self.player_name = save_game['player_name']
-        self.board = save_game['board']
-        self.current_player_name = save_game['current_player_name']
         self.players_order = save_game['order']
+        self.set_state(save_game['board'], save_game['current_player_name'])
 
-        self.players = {i: Player(i, player_score(self.board, i)) for i in self.players_order}
+        print("This is player name {}, the players order is {}".format(self.player_name, self.players_order))
 
-        self.current_player = self.players[self.current_player_name]
+    @classmethod
+    def from_replay(cls, replay, event, player_name=None):
+        """Get the state of a recorded game before an event
 
-        print("This is player name {}, the players order is {}".format(self.player_name, self.players_order))
+        Parameters
+        ----------
+        replay : dicewars.replay.ReplayIndex
+        event : int
+        player_name : int
+            Player whose point of view is taken, the one on turn by default
+        """
+        game = cls.__new__(cls)
+        game.input_queue = Queue()
+        game.replay = replay
+        game.players_order = replay.log.header['order']
+        game.seek(event)
+        game.player_name = game.current_player_name if player_name is None else player_name
+        return game
+
+    def seek(self, event):
+        """Move to the state before an event of the replay
+        """
+        state = self.replay.state_before(event)
+        header = self.replay.log.header
+        # keyed by strings, as in messages of the server
+        areas = {str(name): {'owner': state.owner[name], 'dice': state.dice[name]} for name in header['areas']}
+        board = {
+            str(name): {'neighbours': neighbours, 'hexes': hexes}
+            for name, neighbours, hexes in zip(header['areas'], header['neighbours'], header['hexes'])
+        }
+        self.event = event
+        self.set_state(Board(areas, board), state.current_player)
+        for name, player in self.players.items():
+            player.set_reserve(state.reserves.get(name, 0))
+
+    def set_state(self, board, current_player_name):
+        self.board = board
+        self.current_player_name = current_player_name
+        self.players = {i: Player(i, player_score(self.board, i)) for i in self.players_order}
+        self.current_player = self.players[self.current_player_name]
 
 
 def player_score(board, player_name):
-    return max([len(r) for r in board.get_players_regions(player_name)])
+    return board.get_largest_region_size(player_name)
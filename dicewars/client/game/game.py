@@ -7,12 +7,13 @@ from time import sleep
 from .board import Board
 from .player import Player
 from dicewars.client.socket_listener import SocketListener
+from dicewars.protocol import encode_message
 
 
 class Game:
     """Represantation of the game state
     """
-    def __init__(self, addr, port, hello_msg):
+    def __init__(self, addr, port, hello_msg, previous_game=None):
         """
         Parameters
         ----------
@@ -20,16 +21,52 @@ class Game:
             Server address
         port : int
             Server port
+        hello_msg : dict
+            The 'client_desc' message, its 'framing' is used for all
+            following messages
+        previous_game : Game
+            Finished game of a persistent client, its connection to the
+            server is used instead of connecting again
         """
         self.logger = logging.getLogger('CLIENT')
 
         self.buffer = 65535
         self.battle_in_progress = False
+        self.framing = hello_msg.get('framing', 'nul')
+        self.persistent = hello_msg.get('persistent', False)
 
         self.server_address = addr
         self.server_port = port
         self.players = {}
 
+        if previous_game is None:
+            self.connect(hello_msg)
+        else:
+            self.socket = previous_game.socket
+            self.input_queue = previous_game.input_queue
+            self.socket_listener = previous_game.socket_listener
+            try:
+                self.socket.send(self.encode_message(hello_msg))
+            except BrokenPipeError:
+                self.logger.error("Connection to server broken.")
+                exit(1)
+
+        while self.input_queue.empty():
+            pass
+        msg = self.input_queue.get()
+
+        self.logger.debug("Received message: {0}\n".format(msg))  # TODO
+        if msg['type'] == 'game_start':
+            self.process_game_start_msg(msg)
+        else:
+            self.logger.error("Did not receive game state from server.")
+            exit(1)
+
+        self.logger.info("This is player name {}, the players order is {}".format(self.player_name, self.players_order))
+
+    def connect(self, hello_msg):
+        """Connect to the server and introduce the client by a bare JSON hello
+        """
         i = 0
         while True:
             try:
@@ -49,27 +86,22 @@ class Game:
             exit(1)
 
         self.start_socket_daemon()
-        while self.input_queue.empty():
-            pass
-        msg = self.input_queue.get()
-
-        self.logger.debug("Received message: {0}\n".format(msg))  # TODO
-        if msg['type'] == 'game_start':
-            self.player_name = msg['player']
-            self.add_players(int(msg['no_players']), msg['score'])
-            self.board = Board(msg['areas'], msg['board'])
-            self.current_player = self.players[msg['current_player']]
-            self.current_player_name = msg['current_player']
-            self.players_order = msg['order']
-        else:
-            self.logger.error("Did not receive game state from server.")
-            exit(1)
-
-        self.logger.info("This is player name {}, the players order is {}".format(self.player_name, self.players_order))
 
     ##################
     # INITIALIZATION #
     ##################
+    def process_game_start_msg(self, msg):
+        assert msg['type'] == 'game_start'
+
+        self.player_name = msg['player']
+        self.add_players(int(msg['no_players']), msg['score'])
+        self.board = Board(msg['areas'], msg['board'])
+        self.current_player = self.players[msg['current_player']]
+        self.current_player_name = msg['current_player']
+        self.players_order = msg['order']
+        self.state_version = msg.get('version', 0)
+        self.awaiting_state = False
+
     def add_players(self, number_of_players, score):
         """Create Players instances
 
@@ -115,13 +147,37 @@ class Game:
         elif type == 'end_turn':
             msg = {'type': 'end_turn'}
             self.logger.debug("Sending end_turn message.")
+        elif type == 'get_state':
+            msg = {'type': 'get_state'}
+            self.logger.debug("Requesting the full game state.")
 
         try:
-            self.socket.send(str.encode(json.dumps(msg)))
+            self.socket.send(self.encode_message(msg))
         except BrokenPipeError:
             self.logger.error("Connection to server broken.")
             exit(1)
 
+    def encode_message(self, msg):
+        """Serialize message for the server
+
+        Framed messages are always encoded as JSON, the server may lack
+        other encodings.
+
+        Returns
+        -------
+        bytes
+        """
+        if self.framing == 'nul':
+            return str.encode(json.dumps(msg))
+        else:
+            return encode_message(msg, self.framing, 'json')
+
+    def close(self):
+        """Close the connection, unless it is kept for the next game of a persistent client
+        """
+        if not self.persistent:
+            self.socket.close()
+
     def init_socket(self):
         """Socket initialization
         """
@@ -132,14 +188,71 @@ class Game:
         """Start message collecting daemon
         """
         self.input_queue = Queue()
-        self.socket_listener = SocketListener(self.socket, self.buffer, self.input_queue)
+        self.socket_listener = SocketListener(self.socket, self.buffer, self.input_queue, self.framing)
         self.socket_listener.daemon = True
         self.socket_listener.start()
         self.logger.debug("Started socket daemon.")
 
+    def process_game_state_msg(self, msg):
+        assert msg['type'] == 'game_state'
+
+        for area_name, area_data in msg['areas'].items():
+            area = self.board.get_area(area_name)
+            area.set_owner(area_data['owner'])
+            area.set_dice(area_data['dice'])
+
+        for player_name, score in msg['score'].items():
+            self.players[int(player_name)].set_score(score)
+
+        for player_name, reserve in msg.get('reserves', {}).items():
+            self.players[int(player_name)].set_reserve(reserve)
+
+        self.set_current_player(msg['current_player'])
+        self.state_version = msg.get('version', self.state_version)
+        self.awaiting_state = False
+
+    def apply_state_delta(self, msg):
+        """Apply changes of the game state sent to clients asking for 'delta' state updates
+
+        If some state updates went missing, the full state is requested from the server.
+        Changes are dropped until it arrives, as they would apply to a stale state.
+
+        Returns
+        -------
+        bool
+            True if the changes were applied
+        """
+        if self.awaiting_state:
+            return False
+
+        if msg['version'] != self.state_version + 1:
+            self.logger.error("Expected state version {}, got {}. Requesting the full state.".format(
+                self.state_version + 1, msg['version']
+            ))
+            self.awaiting_state = True
+            self.send_message('get_state')
+            return False
+        self.state_version = msg['version']
+
+        for area_name, area_data in msg['areas'].items():
+            area = self.board.get_area(area_name)
+            area.set_owner(area_data['owner'])
+            area.set_dice(area_data['dice'])
+
+        for player_name, score in msg['score'].items():
+            self.players[int(player_name)].set_score(score)
+
+        for player_name, reserve in msg['reserves'].items():
+            self.players[int(player_name)].set_reserve(reserve)
+        return True
+
     def process_battle_msg(self, msg):
         assert msg['type'] == 'battle'
 
+        if 'version' in msg:
+            self.apply_state_delta(msg)
+            return
+
         atk_data = msg['result']['atk']
         def_data = msg['result']['def']
         attacker = self.board.get_area(str(atk_data['name']))
@@ -158,6 +271,10 @@ class Game:
     def process_transfer_msg(self, msg):
         assert msg['type'] == 'transfer'
 
+        if 'version' in msg:
+            self.apply_state_delta(msg)
+            return
+
         src_data = msg['result']['src']
         source = self.board.get_area(str(src_data['name']))
         source.set_dice(src_data['dice'])
@@ -169,7 +286,10 @@ class Game:
     def process_end_turn_msg(self, msg):
         assert msg['type'] == 'end_turn'
 
-        current_player = self.players[self.current_player_name]
+        if 'version' in msg:
+            self.apply_state_delta(msg)
+            self.set_current_player(msg['current_player'])
+            return
 
         for area in msg['areas']:
             owner_name = msg['areas'][area]['owner']
@@ -179,10 +299,13 @@ class Game:
             area_object.set_owner(owner_name)
             area_object.set_dice(msg['areas'][area]['dice'])
 
-        current_player.deactivate()
-        self.current_player_name = msg['current_player']
-        self.current_player = self.players[msg['current_player']]
-        self.players[self.current_player_name].activate()
+        self.set_current_player(msg['current_player'])
 
         for i, player in self.players.items():
             player.set_reserve(msg['reserves'][str(i)])
+
+    def set_current_player(self, player_name):
+        self.players[self.current_player_name].deactivate()
+        self.current_player_name = player_name
+        self.current_player = self.players[player_name]
+        self.current_player.activate()
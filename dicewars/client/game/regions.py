@@ -0,0 +1,142 @@
+from typing import Dict, Iterable, List
+
+
+class Regions:
+    """Unbroken regions of a player's areas
+
+    Areas are labelled by a union-find pass over the adjacency, regions and
+    their areas are listed in the order of the board. Besides the size of the
+    largest region, the size it would have if an area was lost or gained can
+    be queried without labelling the board again.
+    """
+    def __init__(self, board, area_names: Iterable[int]):
+        """
+        Parameters
+        ----------
+        board : Board
+        area_names : list of int
+            Names of the player's areas, in the order of the board
+
+        Attributes
+        ----------
+        regions : list of list of int
+            Names of areas in every region
+        label : dict of int: int
+            Index of the region of every area
+        sizes : list of int
+            Sizes of regions, from the largest one
+        """
+        self.board = board
+        self.area_names = list(area_names)
+        owned = set(self.area_names)
+
+        parent = {name: name for name in self.area_names}
+
+        def find(name):
+            while parent[name] != name:
+                parent[name] = parent[parent[name]]
+                name = parent[name]
+            return name
+
+        for name in self.area_names:
+            for neighbour in board.get_area(name).neighbours:
+                if neighbour in owned:
+                    a, b = find(name), find(neighbour)
+                    if a != b:
+                        parent[b] = a
+
+        self.regions = []
+        self.label = {}
+        root_labels = {}
+        for name in self.area_names:
+            root = find(name)
+            if root not in root_labels:
+                root_labels[root] = len(self.regions)
+                self.regions.append([])
+            self.label[name] = root_labels[root]
+            self.regions[root_labels[root]].append(name)
+
+        self.sizes = sorted((len(region) for region in self.regions), reverse=True)
+        self.largest_size = self.sizes[0] if self.sizes else 0
+        self.largest_pieces = None
+
+    def get_largest_regions(self) -> List[List[int]]:
+        """Get all regions of the largest size
+        """
+        return [region for region in self.regions if len(region) == self.largest_size]
+
+    def get_size_without(self, area_name: int) -> int:
+        """Get size of the largest region if the area was lost
+        """
+        if area_name not in self.label:
+            return self.largest_size
+        if self.largest_pieces is None:
+            self.largest_pieces = self.__find_largest_pieces()
+
+        region_size = len(self.regions[self.label[area_name]])
+        if len(self.sizes) == 1:
+            others = 0
+        elif region_size == self.sizes[0]:
+            others = self.sizes[1]
+        else:
+            others = self.sizes[0]
+        return max(others, self.largest_pieces[area_name])
+
+    def get_size_with(self, area_name: int) -> int:
+        """Get size of the largest region if the area was gained
+        """
+        if area_name in self.label:
+            return self.largest_size
+
+        joined = {self.label[n] for n in self.board.get_area(area_name).neighbours if n in self.label}
+        return max(self.largest_size, 1 + sum(len(self.regions[i]) for i in joined))
+
+    def __find_largest_pieces(self) -> Dict[int, int]:
+        """Find the largest piece each region breaks into when an area is removed
+
+        Articulation areas are found by a depth-first search tracking lowest
+        reachable discovery times. A subtree which cannot reach above an area
+        gets separated from the rest of the region when the area is removed.
+        """
+        largest_pieces = {}
+        neighbours = {name: [n for n in self.board.get_area(name).neighbours if n in self.label]
+                      for name in self.area_names}
+
+        for region in self.regions:
+            root = region[0]
+            discovered = {root: 0}
+            low = {root: 0}
+            subtree = {root: 1}
+            parent = {root: None}
+            separated = {root: 0}
+            largest_pieces[root] = 0
+
+            stack = [(root, iter(neighbours[root]))]
+            while stack:
+                area, to_visit = stack[-1]
+                for n in to_visit:
+                    if n not in discovered:
+                        discovered[n] = low[n] = len(discovered)
+                        subtree[n] = 1
+                        parent[n] = area
+                        separated[n] = 0
+                        largest_pieces[n] = 0
+                        stack.append((n, iter(neighbours[n])))
+                        break
+                    elif n != parent[area]:
+                        low[area] = min(low[area], discovered[n])
+                else:
+                    stack.pop()
+                    up = parent[area]
+                    if up is not None:
+                        subtree[up] += subtree[area]
+                        low[up] = min(low[up], low[area])
+                        if low[area] >= discovered[up]:
+                            separated[up] += subtree[area]
+                            largest_pieces[up] = max(largest_pieces[up], subtree[area])
+
+            for area in region:
+                rest = len(region) - 1 - separated[area]
+                largest_pieces[area] = max(largest_pieces[area], rest)
+
+        return largest_pieces
@@ -1,15 +1,15 @@
 import sys
 import logging
 
-from json import loads
 from threading import Thread
-from json import JSONDecodeError
+
+from dicewars.protocol import get_decoder
 
 
 class SocketListener(Thread):
     """Daemon for collecting messages from the server
     """
-    def __init__(self, sock, buffer, queue):
+    def __init__(self, sock, buffer, queue, framing='nul'):
         """
         Parameters
         ----------
@@ -17,6 +17,8 @@ class SocketListener(Thread):
         buffer : int
         queue : Queue
             Queue of incoming messages
+        framing : str
+            How the server delimits messages, 'nul' or 'length_prefixed'
         """
         Thread.__init__(self)
         self.logger = logging.getLogger('SOCKET')
@@ -24,31 +26,35 @@ class SocketListener(Thread):
         self.socket = sock
         self.queue = queue
         self.buffer = buffer
+        self.decoder = get_decoder(framing)
 
     def run(self):
         """Collect messages from the server
+
+        Received data are buffered until they complete a message, each
+        message is decoded exactly once. Once the connection is closed or
+        broken, 'close_socket' is queued. The thread ends by returning,
+        exit() would close the standard input of the client as well.
         """
-        buffer = ''
         while True:
             try:
-                data = self.socket.recv(self.buffer).decode()
-                messages = data.split('\0')
+                data = self.socket.recv(self.buffer)
+                if not data:
+                    self.queue.put({'type': 'close_socket'})
+                    return
+
+                try:
+                    messages = self.decoder.feed(data)
+                except ValueError as e:
+                    self.logger.error("Cannot decode message from server: {0}".format(e))
+                    self.queue.put({'type': 'close_socket'})
+                    return
+
                 for msg in messages:
-                    if not msg:
-                        continue
-                    buffer += msg
-                    try:
-                        data = loads(buffer)
-                        if data['type'] == 'end_game':
-                            self.socket.close()
-                        self.queue.put(data)
-                        buffer = ''
-                    except JSONDecodeError as e:
-                        self.logger.warning("buffer: {0}\nmsg: {1}\nJSONDecodeError: {2}".format(buffer, msg, e))
-                        self.logger.warning("JSONDecodeError: {0}\nmsg: {1}".format(e, msg))
-                    except JSONError as e:
-                        self.logger.warning("buffer: {0}\nmsg: {1}".format(buffer, msg, e))
-                        self.logger.warning("JSONError: {0}\nmsg: {1}\nJSONError: {2}".format(e, msg))
+                    if msg['type'] == 'end_game':
+                        self.socket.close()
+                    self.queue.put(msg)
 
             except (ConnectionResetError, OSError):
-                exit(1)
+                self.queue.put({'type': 'close_socket'})
+                return
@@ -0,0 +1,117 @@
+"""Measurement of client startup
+
+Records how long the phases of a client startup take and how long each
+module takes to import, similarly to `python -X importtime`. Only the
+standard library is used, so that the profile can be started before
+anything else is imported.
+"""
+import sys
+import time
+
+
+class _TimedLoader:
+    """Loader proxy measuring execution of the module it loads
+    """
+    def __init__(self, loader, name, profile):
+        self._loader = loader
+        self._name = name
+        self._profile = profile
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profile.enter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profile.leave(self._name)
+
+
+class StartupProfile:
+    """Phases of a startup and import times of modules
+
+    Attributes
+    ----------
+    phases : list of (str, float)
+        Names of finished phases and the times they ended, relative to start
+    imports : dict of str: (float, float)
+        Self and cumulative import times of modules
+    """
+    def __init__(self, start=None):
+        """
+        Parameters
+        ----------
+        start : float
+            Value of time.perf_counter() at which the startup began
+        """
+        self.start = time.perf_counter() if start is None else start
+        self.phases = []
+        self.imports = {}
+        self.stack = []
+
+    def install(self):
+        """Start measuring imports of modules not loaded yet
+        """
+        sys.meta_path.insert(0, self)
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, fullname, self)
+                return spec
+        return None
+
+    def enter(self):
+        self.stack.append([time.perf_counter(), 0.0])
+
+    def leave(self, name):
+        started, children = self.stack.pop()
+        cumulative = time.perf_counter() - started
+        self.imports[name] = (cumulative - children, cumulative)
+        if self.stack:
+            self.stack[-1][1] += cumulative
+
+    def phase(self, name):
+        """Mark the end of a phase of the startup
+        """
+        self.phases.append((name, time.perf_counter() - self.start))
+
+    def report(self, nb_imports=10, stream=None):
+        """Write the phases and the slowest imports
+
+        Parameters
+        ----------
+        nb_imports : int
+            Number of modules with the longest cumulative import times listed
+        stream : file
+            Where to write the report, sys.stderr by default
+        """
+        stream = sys.stderr if stream is None else stream
+
+        stream.write('startup time: {:>10} | {:>10} | phase\n'.format('[ms]', 'total [ms]'))
+        previous = 0.0
+        for name, end in self.phases:
+            stream.write('startup time: {:10.1f} | {:10.1f} | {}\n'.format(
+                (end - previous) * 1000, end * 1000, name
+            ))
+            previous = end
+
+        stream.write('import time: {:>10} | {:>10} | {} of {} modules\n'.format(
+            'self [ms]', 'cumulative', min(nb_imports, len(self.imports)), len(self.imports)
+        ))
+        slowest = sorted(self.imports.items(), key=lambda item: item[1][1], reverse=True)
+        for name, (self_time, cumulative) in slowest[:nb_imports]:
+            stream.write('import time: {:10.1f} | {:10.1f} | {}\n'.format(self_time * 1000, cumulative * 1000, name))
+        stream.flush()
@@ -398,6 +398,9 @@ class ClientUI(QWidget):
             self.game.process_end_turn_msg(msg)
             self.game.battle = False
 
+        elif msg['type'] == 'game_state':
+            self.game.process_game_state_msg(msg)
+
         elif msg['type'] == 'game_end':
             if msg['winner'] == self.game.player_name:
                 print("YOU WIN!")
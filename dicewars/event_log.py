@@ -0,0 +1,319 @@
+"""Compact binary logs of games
+
+A log starts with a header describing the game at its start: seeds, key of
+the board in a board library, geometry of the board, owners and dice of
+areas, order and nicknames of players. Events follow, each starting with
+a byte of its type:
+
+    BATTLE_WON, BATTLE_LOST     attacking area u16, defending area u16,
+                                number of dice of the attacker u8 and of the
+                                defender u8, dice of the defending area after
+                                the battle u8, then every die rolled, u8 each
+    TRANSFER                    source u16, destination u16, dice moved u8
+    END_TURN                    next player u8, reserve of the player ending
+                                the turn u16, number of reinforced areas u8,
+                                then area u16 and its dice u8 for each of them
+    GAME_END                    winner i8, -1 if the game was cancelled
+
+All numbers are little-endian. The replayer needs neither the rules nor
+random numbers, it only applies the changes of owners, dice and reserves.
+"""
+import json
+import mmap
+import struct
+import zlib
+
+
+MAGIC = b'DWEL'
+VERSION = 1
+
+BATTLE_WON = 1
+BATTLE_LOST = 2
+TRANSFER = 3
+END_TURN = 4
+GAME_END = 5
+
+EVENT_NAMES = {
+    BATTLE_WON: 'battle',
+    BATTLE_LOST: 'battle',
+    TRANSFER: 'transfer',
+    END_TURN: 'end_turn',
+    GAME_END: 'game_end',
+}
+
+DEFAULT_BUFFER_SIZE = 1 << 16
+
+_header = struct.Struct('<4sBI')
+_battle = struct.Struct('<BHHBBB')
+_transfer = struct.Struct('<BHHB')
+_end_turn = struct.Struct('<BBHB')
+_reinforcement = struct.Struct('<HB')
+_game_end = struct.Struct('<Bb')
+
+
+def is_event_log(path):
+    """Tell whether a file is an event log
+    """
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class EventLogWriter:
+    """Buffered writer of an event log
+
+    Events are collected in memory and written once the buffer fills up,
+    so that recording costs the turn loop just packing a few numbers.
+    """
+    def __init__(self, path, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.file = open(path, 'wb')
+        self.buffer_size = buffer_size
+        self.buffer = bytearray()
+
+    def start(self, game, seeds=None, board_key=None):
+        """Write the header describing the game at its start
+
+        Parameters
+        ----------
+        game : dicewars.server.game.Game
+        seeds : dict of str: int
+            Seeds the board and the game were created with
+        board_key : str
+            Key of the board in a board library
+        """
+        areas = sorted(game.board.areas)
+        description = game.board.get_board()
+        header = {
+            'seeds': seeds or {},
+            'board_key': board_key,
+            'areas': areas,
+            'neighbours': [list(description[name]['neighbours']) for name in areas],
+            'hexes': [[list(h) for h in description[name]['hexes']] for name in areas],
+            'owner': [game.board.areas[name].get_owner_name() for name in areas],
+            'dice': [game.board.areas[name].get_dice() for name in areas],
+            'order': list(game.players_order),
+            'nicknames': {name: player.get_nickname() for name, player in game.players.items()},
+            'reserves': {name: player.get_reserve() for name, player in game.players.items()},
+            'current_player': game.current_player.get_name(),
+        }
+        data = zlib.compress(json.dumps(header).encode())
+        self.buffer += _header.pack(MAGIC, VERSION, len(data))
+        self.buffer += data
+
+    def battle(self, attacker, defender, atk_rolls, def_rolls, conquered, def_dice):
+        self.buffer += _battle.pack(
+            BATTLE_WON if conquered else BATTLE_LOST, attacker, defender, len(atk_rolls), len(def_rolls), def_dice
+        )
+        self.buffer += bytes(atk_rolls)
+        self.buffer += bytes(def_rolls)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def transfer(self, source, destination, dice_moved):
+        self.buffer += _transfer.pack(TRANSFER, source, destination, dice_moved)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def end_turn(self, next_player, reserve, reinforcements):
+        """
+        Parameters
+        ----------
+        next_player : int
+        reserve : int
+            Reserve of the player who ended the turn
+        reinforcements : list of (int, int)
+            Names of areas which received dice and their dice afterwards
+        """
+        self.buffer += _end_turn.pack(END_TURN, next_player, reserve, len(reinforcements))
+        for area, dice in reinforcements:
+            self.buffer += _reinforcement.pack(area, dice)
+        if len(self.buffer) >= self.buffer_size:
+            self.flush()
+
+    def game_end(self, winner):
+        self.buffer += _game_end.pack(GAME_END, winner)
+        self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.buffer.clear()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class ReplayState:
+    """Owners and dice of areas, reserves and the player on turn
+
+    Attributes
+    ----------
+    owner, dice : list of int
+        Indexed by names of areas, the item 0 is unused
+    reserves : dict of int: int
+    current_player : int
+    winner : int
+        None while the game goes on
+    """
+    def __init__(self, owner, dice, reserves, current_player, winner=None):
+        self.owner = owner
+        self.dice = dice
+        self.reserves = reserves
+        self.current_player = current_player
+        self.winner = winner
+
+    def copy(self):
+        return ReplayState(list(self.owner), list(self.dice), dict(self.reserves), self.current_player, self.winner)
+
+
+class EventLog:
+    """Event log read into memory or mapped from a file
+    """
+    def __init__(self, data):
+        """
+        Parameters
+        ----------
+        data : bytes-like
+            Whole content of a log
+        """
+        self.data = data
+        magic, version, length = _header.unpack_from(data, 0)
+        if magic != MAGIC:
+            raise ValueError('Not an event log')
+        if version != VERSION:
+            raise ValueError('Unsupported version {} of event log'.format(version))
+        self.header = json.loads(zlib.decompress(bytes(data[_header.size:_header.size + length])))
+        self.events_offset = _header.size + length
+
+    @classmethod
+    def open(cls, path):
+        """Map a log from a file
+        """
+        with open(path, 'rb') as f:
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    def initial_state(self):
+        areas = self.header['areas']
+        owner = [0] * (max(areas) + 1)
+        dice = [0] * (max(areas) + 1)
+        for name, area_owner, area_dice in zip(areas, self.header['owner'], self.header['dice']):
+            owner[name] = area_owner
+            dice[name] = area_dice
+        reserves = {int(name): reserve for name, reserve in self.header['reserves'].items()}
+        return ReplayState(owner, dice, reserves, self.header['current_player'])
+
+    def events(self, offset=None):
+        """Iterate over events
+
+        Yields
+        ------
+        int
+            Offset of the event
+        tuple
+            Type of the event followed by its fields as in the module
+            docstring, rolls of a battle as bytes
+        """
+        data = self.data
+        offset = self.events_offset if offset is None else offset
+        end = len(data)
+        while offset < end:
+            start = offset
+            kind = data[offset]
+            if kind == BATTLE_WON or kind == BATTLE_LOST:
+                _, atk, dfn, nb_atk, nb_def, def_dice = _battle.unpack_from(data, offset)
+                offset += _battle.size
+                atk_rolls = bytes(data[offset:offset + nb_atk])
+                def_rolls = bytes(data[offset + nb_atk:offset + nb_atk + nb_def])
+                offset += nb_atk + nb_def
+                yield start, (kind, atk, dfn, atk_rolls, def_rolls, def_dice)
+            elif kind == TRANSFER:
+                yield start, _transfer.unpack_from(data, offset)
+                offset += _transfer.size
+            elif kind == END_TURN:
+                _, next_player, reserve, count = _end_turn.unpack_from(data, offset)
+                offset += _end_turn.size
+                reinforcements = [_reinforcement.unpack_from(data, offset + i * _reinforcement.size) for i in range(count)]
+                offset += count * _reinforcement.size
+                yield start, (kind, next_player, reserve, reinforcements)
+            elif kind == GAME_END:
+                yield start, _game_end.unpack_from(data, offset)
+                offset += _game_end.size
+            else:
+                raise ValueError('Unknown event {} at offset {}'.format(kind, offset))
+
+    def replay(self, state=None, offset=None, nb_events=None):
+        """Apply events to a state
+
+        Parameters
+        ----------
+        state : ReplayState
+            State to be changed in place, the initial one by default
+        offset : int
+            Where the first event to apply starts, the first event by default
+        nb_events : int
+            Number of events to apply, all of them by default
+
+        Returns
+        -------
+        ReplayState
+        int
+            Offset of the first event not applied
+        int
+            Number of events applied
+        """
+        if state is None:
+            state = self.initial_state()
+        data = self.data
+        offset = self.events_offset if offset is None else offset
+        end = len(data)
+        limit = -1 if nb_events is None else nb_events
+        owner = state.owner
+        dice = state.dice
+        battle_unpack = _battle.unpack_from
+        transfer_unpack = _transfer.unpack_from
+        end_turn_unpack = _end_turn.unpack_from
+        reinforcement_unpack = _reinforcement.unpack_from
+        battle_size = _battle.size
+        transfer_size = _transfer.size
+        end_turn_size = _end_turn.size
+        reinforcement_size = _reinforcement.size
+
+        nb_applied = 0
+        while offset < end and nb_applied != limit:
+            kind = data[offset]
+            if kind == BATTLE_WON:
+                _, atk, dfn, nb_atk, nb_def, def_dice = battle_unpack(data, offset)
+                owner[dfn] = owner[atk]
+                dice[dfn] = def_dice
+                dice[atk] = 1
+                offset += battle_size + nb_atk + nb_def
+            elif kind == BATTLE_LOST:
+                _, atk, dfn, nb_atk, nb_def, def_dice = battle_unpack(data, offset)
+                dice[dfn] = def_dice
+                dice[atk] = 1
+                offset += battle_size + nb_atk + nb_def
+            elif kind == TRANSFER:
+                _, src, dst, moved = transfer_unpack(data, offset)
+                dice[src] -= moved
+                dice[dst] += moved
+                offset += transfer_size
+            elif kind == END_TURN:
+                _, next_player, reserve, count = end_turn_unpack(data, offset)
+                offset += end_turn_size
+                for _ in range(count):
+                    area, area_dice = reinforcement_unpack(data, offset)
+                    dice[area] = area_dice
+                    offset += reinforcement_size
+                state.reserves[state.current_player] = reserve
+                state.current_player = next_player
+            elif kind == GAME_END:
+                state.winner = _game_end.unpack_from(data, offset)[1]
+                offset += _game_end.size
+            else:
+                raise ValueError('Unknown event {} at offset {}'.format(kind, offset))
+            nb_applied += 1
+
+        return state, offset, nb_applied
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
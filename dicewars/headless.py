@@ -0,0 +1,255 @@
+import importlib
+import json
+import logging
+import random
+from collections import deque
+
+from dicewars.client.ai_driver import AIDriver
+from dicewars.client.game.game import Game as ClientGame
+from dicewars.event_log import EventLogWriter
+from dicewars.server.board_library import library_key
+from dicewars.server.board_setup import setup_board
+from dicewars.server.game import Game
+
+
+def get_ai_constructor(ai_specification):
+    ai_module = importlib.import_module('dicewars.ai.{}'.format(ai_specification))
+
+    return ai_module.AI
+
+
+class RandomStream:
+    """Private state of the `random` module for one participant of a game
+
+    Server and clients normally live in separate processes, each with its
+    own generator. Entering the stream swaps its state in, leaving it swaps
+    the previous state back, so in-process participants do not disturb each
+    other's sequences.
+    """
+    def __init__(self, seed):
+        outer_state = random.getstate()
+        random.seed(seed)
+        self.state = random.getstate()
+        random.setstate(outer_state)
+        self.outer_states = []
+
+    def __enter__(self):
+        self.outer_states.append(random.getstate())
+        random.setstate(self.state)
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.state = random.getstate()
+        random.setstate(self.outer_states.pop())
+
+
+class MessageDecoder:
+    """Decoder of server messages shared by all LoopbackConnections of a game
+
+    A broadcast hands the very same data to every connection, so it is only
+    parsed for the first one. Clients treat the messages as read-only.
+    """
+    def __init__(self):
+        self.last_data = None
+        self.last_msgs = []
+
+    def __call__(self, data):
+        if data is not self.last_data:
+            self.last_msgs = [json.loads(raw_msg) for raw_msg in data.decode().split('\0') if raw_msg]
+            self.last_data = data
+        return self.last_msgs
+
+
+class HeadlessClientGame(ClientGame):
+    """Client side representation of the game fed directly by the server
+    """
+    def __init__(self, connection, msg):
+        """
+        Parameters
+        ----------
+        connection : LoopbackConnection
+            Connection to the server, used in place of a socket
+        msg : dict
+            The 'game_start' message
+        """
+        self.logger = logging.getLogger('CLIENT')
+
+        self.buffer = 65535
+        self.battle_in_progress = False
+        self.framing = 'nul'
+        self.persistent = False
+        self.players = {}
+        self.socket = connection
+
+        self.process_game_start_msg(msg)
+        self.logger.info("This is player name {}, the players order is {}".format(self.player_name, self.players_order))
+
+
+class LoopbackConnection:
+    """In-process replacement of the socket between the server and one client
+
+    The server side uses `sendall()` and `recv()`, the client side uses
+    `send()` and `close()`, just like with a real socket. Messages sent by the
+    server are handed to the client's AIDriver right away, the client's
+    commands are queued until the server asks for them. The client asks for
+    'delta' state updates.
+    """
+    def __init__(self, ai_constructor, nickname, ai_driver_config, random_stream, decoder):
+        """
+        Parameters
+        ----------
+        ai_constructor : callable
+            Constructor of the AI controlling the client
+        nickname : str
+            Nickname the client introduces itself with
+        ai_driver_config : configparser.SectionProxy
+            The [AI_DRIVER] section of the config
+        random_stream : RandomStream
+            Private random state of the client
+        decoder : MessageDecoder
+            Decoder of messages from the server
+        """
+        self.logger = logging.getLogger('HEADLESS')
+        self.ai_constructor = ai_constructor
+        self.ai_driver_config = ai_driver_config
+        self.random_stream = random_stream
+        self.decoder = decoder
+
+        self.driver = None
+        self.finished = False
+
+        self.inbox = deque()
+        self.send(str.encode(json.dumps({
+            'type': 'client_desc',
+            'nickname': nickname,
+            'state_updates': 'delta',
+        })))
+
+    def sendall(self, data):
+        """Deliver a message from the server to the client
+        """
+        for msg in self.decoder(data):
+            self.deliver(msg)
+
+    def recv(self, bufsize):
+        """Pass the oldest command of the client to the server
+        """
+        if not self.inbox:
+            self.logger.error("Server is waiting for a client which has nothing to say")
+            return b''
+        return self.inbox.popleft()
+
+    def send(self, data):
+        """Queue a command from the client for the server
+        """
+        self.inbox.append(data)
+        return len(data)
+
+    def close(self):
+        pass
+
+    def deliver(self, msg):
+        if self.finished:
+            return
+
+        with self.random_stream:
+            if msg['type'] == 'game_start':
+                game = HeadlessClientGame(self, msg)
+                self.driver = AIDriver(game, self.ai_constructor, self.ai_driver_config)
+            elif msg['type'] == 'close_socket':
+                self.finished = True
+            else:
+                self.finished = not self.driver.process_message(msg)
+
+
+class HeadlessGame(Game):
+    """Server side of the game talking to in-process clients over LoopbackConnections
+    """
+    def __init__(self, board, area_ownership, connections, game_config, nicknames_order):
+        """
+        Parameters
+        ----------
+        connections : list of LoopbackConnection
+            One connection per player, in the order of connecting
+        """
+        self.connections = connections
+        super().__init__(board, area_ownership, len(connections), game_config, None, None, nicknames_order)
+
+    def report_summary(self):
+        self.logger.debug("Game finished:\n{}".format(self.summary))
+
+    def create_socket(self):
+        self.socket = None
+
+    def connect_client(self, i):
+        self.add_client(self.connections[i-1], ('headless', i), i)
+
+    def close_connections(self):
+        self.logger.debug("Closing loopback connections")
+        for connection in self.connections:
+            connection.close()
+
+
+def run_headless_game(ais, nicknames, config,
+                      board_seed=None, ownership_seed=None, strength_seed=None,
+                      fixed=None, client_seed=None, board_library=None, game_class=None,
+                      event_log=None):
+    """Play a single game of AIs within the current process
+
+    Reproduces what scripts/server.py and one scripts/client.py per AI do,
+    including the seeding of their random generators, but without any
+    sockets or extra processes.
+
+    Parameters
+    ----------
+    ais : list of str
+        AI specifications, e.g. 'dt.stei', in the order of players
+    nicknames : list of str
+        Nicknames of the AIs, determine the player order
+    config : configparser.ConfigParser
+        Game configuration with [BOARD], [GAME] and [AI_DRIVER] sections
+    board_library : BoardLibrary
+        Pregenerated boards
+    game_class : callable
+        Constructor of the server side of the game, HeadlessGame or its
+        subclass, HeadlessGame by default
+    event_log : str
+        Where to record the events of the game, see dicewars.event_log
+
+    Returns
+    -------
+    GameSummary
+    """
+    if game_class is None:
+        game_class = HeadlessGame
+
+    board_config = config['BOARD']
+    game_config = config['GAME']
+    ai_driver_config = config['AI_DRIVER']
+
+    decoder = MessageDecoder()
+    connections = [
+        LoopbackConnection(get_ai_constructor(ai), nickname, ai_driver_config, RandomStream(client_seed), decoder)
+        for ai, nickname in zip(ais, nicknames)
+    ]
+
+    with RandomStream(board_seed):
+        board, area_ownership = setup_board(
+            board_config, len(ais), board_seed, ownership_seed, strength_seed, board_library,
+        )
+
+        random.seed(fixed)
+        game = game_class(board, area_ownership, connections, game_config, nicknames)
+        if event_log is None:
+            game.run()
+        else:
+            writer = EventLogWriter(event_log)
+            try:
+                game.record_events(writer, {
+                    'board': board_seed, 'ownership': ownership_seed, 'strength': strength_seed, 'fixed': fixed,
+                }, library_key(board_config, len(ais), board_seed, ownership_seed, strength_seed))
+                game.run()
+            finally:
+                writer.close()
+
+    return game.summary
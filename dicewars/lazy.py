@@ -0,0 +1,35 @@
+"""Modules loaded on their first use
+
+lazy_import() gives a module whose code runs only when one of its
+attributes is first accessed, so importing it at the top of another
+module costs nothing until it is used.
+"""
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """Get a module which is executed once its attribute is first accessed
+
+    Parameters
+    ----------
+    name : str
+        Absolute name of the module
+
+    Returns
+    -------
+    module
+        The module itself if it has already been imported
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError('No module named {!r}'.format(name), name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,241 @@
+"""Wire formats of messages between the server and clients
+
+By default, the server terminates every JSON message by '\\0' and clients
+send bare JSON messages. Clients can ask for length-prefixed framing in
+their 'client_desc' hello, then messages in both directions are sent as
+frames. Every frame starts with a header holding the length of the payload
+and the encoding of the payload, so each message can be decoded on its own.
+"""
+import json
+import struct
+from collections import deque
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+FRAMINGS = ['nul', 'length_prefixed']
+ENCODINGS = ['json', 'msgpack']
+
+# payload length, encoding id
+FRAME_HEADER = struct.Struct('!IB')
+ENCODING_IDS = {
+    'json': 0,
+    'msgpack': 1,
+}
+
+
+def available_encodings():
+    """Get encodings which can be used in this environment
+    """
+    if msgpack is None:
+        return ['json']
+    else:
+        return ['json', 'msgpack']
+
+
+def preferred_encoding():
+    """Get the most compact encoding available
+    """
+    return available_encodings()[-1]
+
+
+def json_compatible(obj):
+    """Convert dictionary keys to strings, as serializing to JSON does
+
+    Messages then look the same to clients regardless of the encoding.
+    """
+    if isinstance(obj, dict):
+        return {str(key): json_compatible(value) for key, value in obj.items()}
+    elif isinstance(obj, (list, tuple)):
+        return [json_compatible(item) for item in obj]
+    else:
+        return obj
+
+
+def encode_payload(msg, encoding):
+    if encoding == 'json':
+        return json.dumps(msg).encode()
+    elif encoding == 'msgpack':
+        return msgpack.packb(json_compatible(msg))
+    else:
+        raise ValueError("Unsupported encoding '{}'".format(encoding))
+
+
+def decode_payload(payload, encoding_id):
+    if encoding_id == ENCODING_IDS['json']:
+        return json.loads(payload.decode())
+    elif encoding_id == ENCODING_IDS['msgpack']:
+        if msgpack is None:
+            raise ValueError("Received msgpack-encoded message, but msgpack is not installed")
+        return msgpack.unpackb(payload)
+    else:
+        raise ValueError("Unknown encoding id {}".format(encoding_id))
+
+
+def encode_message(msg, framing='nul', encoding='json'):
+    """Serialize message for sending over a socket
+
+    Parameters
+    ----------
+    msg : dict
+    framing : str
+        'nul' for '\\0'-terminated JSON, 'length_prefixed' for frames
+    encoding : str
+        Encoding of frame payload, ignored with 'nul' framing
+
+    Returns
+    -------
+    bytes
+    """
+    if framing == 'nul':
+        return (json.dumps(msg) + '\0').encode()
+    elif framing == 'length_prefixed':
+        payload = encode_payload(msg, encoding)
+        return FRAME_HEADER.pack(len(payload), ENCODING_IDS[encoding]) + payload
+    else:
+        raise ValueError("Unsupported framing '{}'".format(framing))
+
+
+class NulDelimitedDecoder:
+    """Incremental decoder of '\\0'-terminated JSON messages
+    """
+    def __init__(self):
+        self.buffer = b''
+
+    def feed(self, data):
+        """Add received data
+
+        Returns
+        -------
+        list of dict
+            Messages completed by the data
+        """
+        *raw_messages, self.buffer = (self.buffer + data).split(b'\0')
+        return [json.loads(raw_msg.decode()) for raw_msg in raw_messages if raw_msg]
+
+
+class BareJSONDecoder:
+    """Incremental decoder of undelimited JSON messages, as sent by clients
+    """
+    def __init__(self):
+        self.buffer = ''
+        self.json_decoder = json.JSONDecoder()
+
+    def feed(self, data):
+        """Add received data
+
+        A message split across several reads is decoded once complete.
+
+        Returns
+        -------
+        list of dict
+            Messages completed by the data
+        """
+        self.buffer += data.decode()
+
+        messages = []
+        offset = 0
+        while offset < len(self.buffer):
+            try:
+                msg, offset = self.json_decoder.raw_decode(self.buffer, offset)
+            except json.JSONDecodeError:
+                break
+            messages.append(msg)
+            while offset < len(self.buffer) and self.buffer[offset].isspace():
+                offset += 1
+
+        self.buffer = self.buffer[offset:]
+        return messages
+
+
+class FrameDecoder:
+    """Incremental decoder of length-prefixed frames
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """Add received data
+
+        Returns
+        -------
+        list of dict
+            Messages completed by the data
+        """
+        self.buffer += data
+
+        messages = []
+        offset = 0
+        while len(self.buffer) - offset >= FRAME_HEADER.size:
+            length, encoding_id = FRAME_HEADER.unpack_from(self.buffer, offset)
+            end = offset + FRAME_HEADER.size + length
+            if len(self.buffer) < end:
+                break
+
+            payload = bytes(self.buffer[offset + FRAME_HEADER.size:end])
+            messages.append(decode_payload(payload, encoding_id))
+            offset = end
+
+        del self.buffer[:offset]
+        return messages
+
+
+def get_decoder(framing):
+    if framing == 'nul':
+        return NulDelimitedDecoder()
+    elif framing == 'length_prefixed':
+        return FrameDecoder()
+    else:
+        raise ValueError("Unsupported framing '{}'".format(framing))
+
+
+class MessageReceiver:
+    """Blocking reader of messages from a socket
+
+    Data is read into the decoder until a whole message is available, so
+    messages split across reads or sent together are handled alike.
+    """
+    def __init__(self, sock, buffer, decoder=None):
+        """
+        Parameters
+        ----------
+        sock : socket
+        buffer : int
+            Size of socket buffer
+        decoder
+            Decoder of received data, FrameDecoder by default
+        """
+        self.socket = sock
+        self.buffer = buffer
+        self.decoder = FrameDecoder() if decoder is None else decoder
+        self.messages = deque()
+
+    def set_decoder(self, decoder):
+        """Decode following data by another decoder
+
+        Data received but not decoded yet, e.g. sent right after the hello
+        settling the framing, is passed to the new decoder.
+        """
+        leftover = self.decoder.buffer
+        if isinstance(leftover, str):
+            leftover = leftover.encode()
+        self.decoder = decoder
+        self.messages.extend(decoder.feed(bytes(leftover)))
+
+    def read_message(self):
+        """Wait for the next message
+
+        Returns
+        -------
+        dict
+        """
+        while not self.messages:
+            data = self.socket.recv(self.buffer)
+            if not data:
+                raise ConnectionResetError("Connection closed by the client")
+            self.messages.extend(self.decoder.feed(data))
+
+        return self.messages.popleft()
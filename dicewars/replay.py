@@ -0,0 +1,200 @@
+"""Random access to states of recorded games
+
+A ReplayIndex keeps full snapshots of the state of a game every `interval`
+events of its event log, so the state before any event is reached by
+replaying less than `interval` events from the nearest snapshot. Indices
+are stored next to the logs, as <log>.idx.npz, and rebuilt whenever they do
+not match their log.
+"""
+import os
+
+import numpy
+
+from dicewars.event_log import EventLog, ReplayState
+
+
+DEFAULT_INTERVAL = 64
+INDEX_SUFFIX = '.idx.npz'
+
+NO_WINNER = -2
+
+
+class ReplayIndex:
+    """Event log with periodic snapshots of its states
+    """
+    def __init__(self, log, snapshots, interval, nb_events):
+        """
+        Parameters
+        ----------
+        log : EventLog
+        snapshots : dict of str: numpy.ndarray
+            'offset', 'owner', 'dice', 'reserves', 'current_player' and
+            'winner' of states before every interval-th event
+        """
+        self.log = log
+        self.snapshots = snapshots
+        self.interval = interval
+        self.nb_events = nb_events
+
+    @classmethod
+    def build(cls, log, interval=DEFAULT_INTERVAL):
+        """Replay a whole log, taking a snapshot every interval events
+        """
+        nb_players = max(log.header['order'])
+        columns = {key: [] for key in ('offset', 'owner', 'dice', 'reserves', 'current_player', 'winner')}
+
+        state = log.initial_state()
+        offset = log.events_offset
+        nb_events = 0
+        while True:
+            columns['offset'].append(offset)
+            columns['owner'].append(state.owner)
+            columns['dice'].append(state.dice)
+            columns['reserves'].append([state.reserves.get(name, 0) for name in range(nb_players + 1)])
+            columns['current_player'].append(state.current_player)
+            columns['winner'].append(NO_WINNER if state.winner is None else state.winner)
+
+            state, offset, nb_applied = log.replay(state.copy(), offset, interval)
+            nb_events += nb_applied
+            if nb_applied < interval:
+                break
+
+        snapshots = {
+            'offset': numpy.array(columns['offset'], dtype=numpy.int64),
+            'owner': numpy.array(columns['owner'], dtype=numpy.int8),
+            'dice': numpy.array(columns['dice'], dtype=numpy.int8),
+            'reserves': numpy.array(columns['reserves'], dtype=numpy.int32),
+            'current_player': numpy.array(columns['current_player'], dtype=numpy.int8),
+            'winner': numpy.array(columns['winner'], dtype=numpy.int8),
+        }
+        return cls(log, snapshots, interval, nb_events)
+
+    @classmethod
+    def open(cls, path, interval=DEFAULT_INTERVAL, save=True):
+        """Map a log from a file along with its index
+
+        Parameters
+        ----------
+        path : str
+            Path of the event log
+        interval : int
+            Interval of snapshots, if the index is to be built
+        save : bool
+            Store a newly built index next to the log
+        """
+        log = EventLog.open(path)
+        index_path = path + INDEX_SUFFIX
+        if os.path.exists(index_path):
+            with numpy.load(index_path) as stored:
+                arrays = dict(stored)
+            if int(arrays.pop('log_size')) == len(log.data):
+                stored_interval = int(arrays.pop('interval'))
+                return cls(log, arrays, stored_interval, int(arrays.pop('nb_events')))
+
+        index = cls.build(log, interval)
+        if save:
+            index.save(index_path)
+        return index
+
+    def save(self, path):
+        with open(path + '.tmp', 'wb') as f:
+            numpy.savez(
+                f, log_size=len(self.log.data), interval=self.interval, nb_events=self.nb_events, **self.snapshots
+            )
+        os.replace(path + '.tmp', path)
+
+    def snapshot(self, i):
+        """Get a copy of the i-th snapshot
+
+        Returns
+        -------
+        ReplayState
+        int
+            Offset of the first event after the snapshot
+        """
+        s = self.snapshots
+        reserves = {name: int(reserve) for name, reserve in enumerate(s['reserves'][i]) if name}
+        winner = int(s['winner'][i])
+        state = ReplayState(
+            s['owner'][i].tolist(), s['dice'][i].tolist(), reserves, int(s['current_player'][i]),
+            None if winner == NO_WINNER else winner,
+        )
+        return state, int(s['offset'][i])
+
+    def seek(self, event):
+        """Get the state before an event
+
+        Parameters
+        ----------
+        event : int
+            Number of the event, from 0 to nb_events; nb_events gives the
+            final state
+
+        Returns
+        -------
+        ReplayState
+        int
+            Offset of the event
+        """
+        if not 0 <= event <= self.nb_events:
+            raise IndexError('Event {} out of range 0 to {}'.format(event, self.nb_events))
+        state, offset = self.snapshot(event // self.interval)
+        state, offset, _ = self.log.replay(state, offset, event % self.interval)
+        return state, offset
+
+    def state_before(self, event):
+        return self.seek(event)[0]
+
+    def event(self, event):
+        """Get an event as yielded by EventLog.events()
+        """
+        if not 0 <= event < self.nb_events:
+            raise IndexError('Event {} out of range 0 to {}'.format(event, self.nb_events - 1))
+        _, offset = self.seek(event)
+        return next(self.log.events(offset))[1]
+
+    def states(self, start=0, stop=None):
+        """Iterate over states before events
+
+        The same ReplayState is changed from one step to the next, copy it
+        to keep it.
+
+        Yields
+        ------
+        int
+            Number of the event
+        ReplayState
+            State before the event
+        """
+        stop = self.nb_events if stop is None else stop
+        state, offset = self.seek(start)
+        for event in range(start, stop + 1):
+            yield event, state
+            if event < stop:
+                state, offset, _ = self.log.replay(state, offset, 1)
+
+    def close(self):
+        self.log.close()
+
+
+def iter_replays(paths, interval=DEFAULT_INTERVAL):
+    """Iterate over recorded games, keeping a single log mapped at a time
+
+    Parameters
+    ----------
+    paths : iterable of str
+        Paths of event logs
+
+    Yields
+    ------
+    str
+        Path of the log
+    ReplayIndex
+        Its index, closed once the next one is requested
+    """
+    for path in paths:
+        index = ReplayIndex.open(path, interval)
+        try:
+            yield path, index
+        finally:
+            index.close()
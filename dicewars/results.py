@@ -0,0 +1,203 @@
+"""Append-only store of results of games
+
+Results are kept in an SQLite database, every game being committed as soon
+as it is added, so a crash loses at most the game being played. Readers go
+through the games one at a time or have SQLite compute the aggregates, so
+that the number of games stored does not matter for memory.
+
+Tables:
+
+    games       id, winner (nickname, NULL if the game was cancelled),
+                nb_battles, duration (seconds of wall time, if measured),
+                board (seed of the board, if known)
+    players     game, seat (position in the order of players, NULL if not
+                known), nickname, elimination (order of being eliminated,
+                NULL for the winner), eliminated_after (number of battles)
+"""
+import itertools
+import sqlite3
+
+from dicewars.server.summary import GameSummary
+
+
+SQLITE_MAGIC = b'SQLite format 3\x00'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id INTEGER PRIMARY KEY,
+    winner TEXT,
+    nb_battles INTEGER NOT NULL,
+    duration REAL,
+    board INTEGER
+);
+CREATE TABLE IF NOT EXISTS players (
+    game INTEGER NOT NULL REFERENCES games(id),
+    seat INTEGER,
+    nickname TEXT NOT NULL,
+    elimination INTEGER,
+    eliminated_after INTEGER
+);
+CREATE INDEX IF NOT EXISTS players_by_game ON players(game);
+"""
+
+
+def is_results_store(path):
+    """Tell whether a file is a results store, rather than e.g. pickled GameSummaries
+    """
+    with open(path, 'rb') as f:
+        return f.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+
+
+class ResultsStore:
+    """Results of games, in the order they were added
+    """
+    def __init__(self, path=':memory:'):
+        """
+        Parameters
+        ----------
+        path : str
+            Database to open or create, in memory by default
+        """
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+
+    def add_game(self, summary, seats=None, duration=None, board=None):
+        """Append the result of a game and commit it
+
+        Parameters
+        ----------
+        summary : GameSummary
+        seats : list of str
+            Nicknames of players in the order of playing, the participants
+            of the summary by default
+        duration : float
+            Wall time of the game in seconds
+        board : int
+            Seed of the board
+
+        Returns
+        -------
+        int
+            Id of the game
+        """
+        with self.connection:
+            game_id = self._insert(summary, seats, duration, board)
+        return game_id
+
+    def add_games(self, summaries):
+        """Append many games at once, in a single transaction
+        """
+        with self.connection:
+            for summary in summaries:
+                self._insert(summary, None, getattr(summary, 'duration', None), None)
+
+    def _insert(self, summary, seats, duration, board):
+        winner = None if summary.winner == '#None' else summary.winner
+        cursor = self.connection.execute(
+            'INSERT INTO games (winner, nb_battles, duration, board) VALUES (?, ?, ?, ?)',
+            (winner, summary.nb_battles, duration, board),
+        )
+        game_id = cursor.lastrowid
+
+        eliminations = {nickname: (i, battles) for i, (nickname, battles) in enumerate(summary.eliminations)}
+        if seats is None:
+            players = [(None, nickname) for nickname, _ in summary.eliminations]
+            if winner is not None:
+                players.append((None, winner))
+        else:
+            players = list(enumerate(seats))
+        self.connection.executemany(
+            'INSERT INTO players (game, seat, nickname, elimination, eliminated_after) VALUES (?, ?, ?, ?, ?)',
+            [(game_id, seat, nickname) + eliminations.get(nickname, (None, None)) for seat, nickname in players],
+        )
+        return game_id
+
+    def extend(self, path):
+        """Append all games of another store
+        """
+        self.connection.execute('ATTACH DATABASE ? AS other', (path,))
+        try:
+            with self.connection:
+                offset = self.connection.execute('SELECT COALESCE(MAX(id), 0) FROM games').fetchone()[0]
+                self.connection.execute(
+                    'INSERT INTO games (id, winner, nb_battles, duration, board) '
+                    'SELECT id + ?, winner, nb_battles, duration, board FROM other.games ORDER BY id', (offset,)
+                )
+                self.connection.execute(
+                    'INSERT INTO players (game, seat, nickname, elimination, eliminated_after) '
+                    'SELECT game + ?, seat, nickname, elimination, eliminated_after FROM other.players', (offset,)
+                )
+        finally:
+            self.connection.execute('DETACH DATABASE other')
+
+    def __len__(self):
+        return self.connection.execute('SELECT COUNT(*) FROM games').fetchone()[0]
+
+    def results(self):
+        """Iterate over games in the order they were added
+
+        Yields
+        ------
+        int
+            Id of the game
+        str
+            Nickname of the winner, None if the game was cancelled
+        list of str
+            Nicknames of the eliminated players, in the order of elimination
+        """
+        rows = self.connection.execute(
+            'SELECT g.id, g.winner, p.nickname FROM games g LEFT JOIN players p '
+            'ON p.game = g.id AND p.elimination IS NOT NULL ORDER BY g.id, p.elimination'
+        )
+        for (game_id, winner), group in itertools.groupby(rows, key=lambda row: row[:2]):
+            yield game_id, winner, [nickname for _, _, nickname in group if nickname is not None]
+
+    def summaries(self):
+        """Iterate over games as GameSummaries
+        """
+        rows = self.connection.execute(
+            'SELECT g.id, g.winner, g.nb_battles, g.duration, p.nickname, p.eliminated_after FROM games g '
+            'LEFT JOIN players p ON p.game = g.id AND p.elimination IS NOT NULL ORDER BY g.id, p.elimination'
+        )
+        for (_, winner, nb_battles, duration), group in itertools.groupby(rows, key=lambda row: row[:4]):
+            summary = GameSummary()
+            summary.set_winner(winner)
+            summary.nb_battles = nb_battles
+            summary.duration = duration
+            summary.eliminations = [(nickname, battles) for *_, nickname, battles in group if nickname is not None]
+            yield summary
+
+    def player_stats(self):
+        """Get numbers of games played and won
+
+        Returns
+        -------
+        dict of str: (int, int)
+            Games and wins by nickname
+        """
+        rows = self.connection.execute(
+            'SELECT p.nickname, COUNT(*), SUM(g.winner IS p.nickname) FROM players p '
+            'JOIN games g ON g.id = p.game GROUP BY p.nickname'
+        )
+        return {nickname: (nb_games, nb_wins) for nickname, nb_games, nb_wins in rows}
+
+    def pair_stats(self):
+        """Get numbers of games played and won against every other player
+
+        Returns
+        -------
+        dict of (str, str): (int, int)
+            Games of the first player with the second one and wins of the
+            first player in them; a player paired with itself gets all of its
+            games
+        """
+        rows = self.connection.execute(
+            'SELECT a.nickname, b.nickname, COUNT(*), SUM(g.winner IS a.nickname) FROM players a '
+            'JOIN players b ON b.game = a.game JOIN games g ON g.id = a.game GROUP BY a.nickname, b.nickname'
+        )
+        return {(a, b): (nb_games, nb_wins) for a, b, nb_games, nb_wins in rows}
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,378 @@
+"""Data of AI-only games for training AIs
+
+Games are played headless and every move is recorded from the point of view
+of the player making it: features of the state as used by dt.wpm_c, the
+attacks possible, the move chosen and the winner of the game. Records are
+written into shards, compressed NumPy archives of a bounded number of
+records, so the memory needed does not grow with the number of games.
+ShardReader reads the shards back lazily.
+
+Arrays of a shard, n being the number of records:
+
+    features            float32 (n, 2 * players) logarithms of score + 1 and
+                        dice + 1 of every player, starting with the mover
+    game                int64 (n,) number of the game
+    player              int8 (n,) name of the player making the move
+    move                int8 (n,) MOVE_END_TURN, MOVE_BATTLE or MOVE_TRANSFER
+    source, target      int16 (n,) areas of a battle or transfer, 0 otherwise
+    chosen              int32 (n,) index of the battle among the candidates,
+                        -1 for other moves
+    candidate_indptr    int64 (n + 1,) candidates of record i are those from
+                        candidate_indptr[i] to candidate_indptr[i + 1]
+    candidate_sources,
+    candidate_targets   int16 areas of possible attacks
+    winner              int8 (n,) winner of the game, -1 if it was cancelled
+"""
+import glob
+import math
+import os
+
+import numpy
+
+from dicewars.headless import HeadlessGame, run_headless_game
+
+
+MOVE_END_TURN = 0
+MOVE_BATTLE = 1
+MOVE_TRANSFER = 2
+MOVE_TYPES = {'end_turn': MOVE_END_TURN, 'battle': MOVE_BATTLE, 'transfer': MOVE_TRANSFER}
+
+DEFAULT_RECORDS_PER_SHARD = 100000
+
+RECORD_DTYPES = {
+    'features': numpy.float32,
+    'game': numpy.int64,
+    'player': numpy.int8,
+    'move': numpy.int8,
+    'source': numpy.int16,
+    'target': numpy.int16,
+    'chosen': numpy.int32,
+    'winner': numpy.int8,
+}
+
+
+def state_features(order, scores, dice):
+    """Get features of a state as computed by dt.wpm_c
+
+    Unlike the agent, the score of every player is that player's own.
+
+    Parameters
+    ----------
+    order : list of int
+        Names of players in the order of playing, starting with the player
+        the features are computed for
+    scores : dict of int: int
+        Sizes of the largest regions of players
+    dice : dict of int: int
+        Numbers of dice of players
+
+    Returns
+    -------
+    list of float
+    """
+    features = []
+    for p in order:
+        features.append(math.log(scores[p] + 1))
+        features.append(math.log(dice[p] + 1))
+    return features
+
+
+class RecordingGame(HeadlessGame):
+    """Headless game recording the moves of its players
+
+    Records are handed to the writer once the game is over, records of an
+    unfinished game are dropped.
+    """
+    def __init__(self, board, area_ownership, connections, game_config, nicknames_order, writer=None, game_id=0):
+        """
+        Parameters
+        ----------
+        writer : ShardWriter
+        game_id : int
+            Number of the game stored with its records
+        """
+        self.writer = writer
+        self.game_id = game_id
+        self.records = []
+        self.winner = -1
+        super().__init__(board, area_ownership, connections, game_config, nicknames_order)
+
+    def process_player_message(self, msg, sender):
+        if msg['type'] in MOVE_TYPES:
+            self.records.append(self.record_move(msg))
+        super().process_player_message(msg, sender)
+
+    def process_win(self, player_nick, player_name):
+        self.winner = player_name
+        super().process_win(player_nick, player_name)
+
+    def report_summary(self):
+        super().report_summary()
+        if self.writer is not None:
+            self.writer.add_game(self.game_id, self.winner, self.records)
+
+    def record_move(self, msg):
+        """Describe the state before the move and the move itself
+
+        Returns
+        -------
+        tuple
+            Features, player, move type, source, target, index of the chosen
+            candidate and the list of candidate attacks
+        """
+        player = self.current_player.get_name()
+        idx = self.players_order.index(player)
+        order = self.players_order[idx:] + self.players_order[:idx]
+        scores = {name: p.get_largest_region(self.board) for name, p in self.players.items()}
+        dice = {name: p.total_dice() for name, p in self.players.items()}
+
+        candidates = self.possible_attacks(player)
+        move = MOVE_TYPES[msg['type']]
+        source = target = 0
+        chosen = -1
+        if move == MOVE_BATTLE:
+            source, target = int(msg['atk']), int(msg['def'])
+            if (source, target) in candidates:
+                chosen = candidates.index((source, target))
+        elif move == MOVE_TRANSFER:
+            source, target = int(msg['src']), int(msg['dst'])
+
+        return state_features(order, scores, dice), player, move, source, target, chosen, candidates
+
+    def possible_attacks(self, player_name):
+        """Get attacks the player can make
+
+        Returns
+        -------
+        list of (int, int)
+            Names of the source and target areas
+        """
+        attacks = []
+        for area in self.players[player_name].get_areas():
+            if area.get_dice() < 2:
+                continue
+            for name in area.get_adjacent_areas_names():
+                if self.board.get_area_by_name(name).get_owner_name() != player_name:
+                    attacks.append((area.get_name(), name))
+        return attacks
+
+
+class ShardWriter:
+    """Writer of records into shards of a bounded size
+
+    Shards are named <prefix>-<number>.npz, each is written to a temporary
+    file first, so that readers never see an incomplete shard.
+    """
+    def __init__(self, directory, prefix='shard', records_per_shard=DEFAULT_RECORDS_PER_SHARD):
+        """
+        Parameters
+        ----------
+        directory : str
+            Where to put the shards, created if needed
+        records_per_shard : int
+            Number of records kept in memory before they are written
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.prefix = prefix
+        self.records_per_shard = records_per_shard
+
+        self.paths = []
+        self.nb_records = 0
+        self.clear()
+
+    def clear(self):
+        self.columns = {key: [] for key in RECORD_DTYPES}
+        self.candidate_counts = []
+        self.candidate_sources = []
+        self.candidate_targets = []
+
+    def add_game(self, game_id, winner, records):
+        """Add records of a finished game
+
+        Parameters
+        ----------
+        game_id : int
+        winner : int
+            Name of the winner, -1 if there is none
+        records : list of tuple
+            Records as made by RecordingGame.record_move()
+        """
+        for features, player, move, source, target, chosen, candidates in records:
+            values = {
+                'features': features, 'game': game_id, 'player': player, 'move': move,
+                'source': source, 'target': target, 'chosen': chosen, 'winner': winner,
+            }
+            for key, value in values.items():
+                self.columns[key].append(value)
+            self.candidate_counts.append(len(candidates))
+            for candidate_source, candidate_target in candidates:
+                self.candidate_sources.append(candidate_source)
+                self.candidate_targets.append(candidate_target)
+
+            if len(self.candidate_counts) >= self.records_per_shard:
+                self.flush()
+
+    def flush(self):
+        """Write the records held into a new shard
+        """
+        if not self.candidate_counts:
+            return
+
+        arrays = {key: numpy.array(values, dtype=RECORD_DTYPES[key]) for key, values in self.columns.items()}
+        arrays['candidate_indptr'] = numpy.zeros(len(self.candidate_counts) + 1, dtype=numpy.int64)
+        numpy.cumsum(self.candidate_counts, out=arrays['candidate_indptr'][1:])
+        arrays['candidate_sources'] = numpy.array(self.candidate_sources, dtype=numpy.int16)
+        arrays['candidate_targets'] = numpy.array(self.candidate_targets, dtype=numpy.int16)
+
+        path = os.path.join(self.directory, '{}-{:05d}.npz'.format(self.prefix, len(self.paths)))
+        with open(path + '.tmp', 'wb') as f:
+            numpy.savez_compressed(f, **arrays)
+        os.replace(path + '.tmp', path)
+
+        self.paths.append(path)
+        self.nb_records += len(self.candidate_counts)
+        self.clear()
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
+
+
+class Shard:
+    """Records of a single shard, each array is read on its first use
+
+    Besides the stored arrays, 'won' tells whether the mover won the game.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.arrays = {}
+
+    def __getitem__(self, key):
+        if key == 'won':
+            return (self['winner'] == self['player']).astype(numpy.int8)
+        if key not in self.arrays:
+            with numpy.load(self.path) as archive:
+                self.arrays[key] = archive[key]
+        return self.arrays[key]
+
+    def __len__(self):
+        return len(self['player'])
+
+    def candidates(self, i):
+        """Get attacks possible in record i
+
+        Returns
+        -------
+        numpy.ndarray
+            Array of shape (k, 2) of the source and target areas
+        """
+        start, end = self['candidate_indptr'][i:i + 2]
+        return numpy.stack([self['candidate_sources'][start:end], self['candidate_targets'][start:end]], axis=1)
+
+
+class ShardReader:
+    """Lazy reader of shards written by ShardWriter
+
+    Only one shard is held in memory at a time.
+    """
+    def __init__(self, paths):
+        """
+        Parameters
+        ----------
+        paths : str or list of str
+            Directory holding the shards, or paths of the shards
+        """
+        if isinstance(paths, str):
+            paths = sorted(glob.glob(os.path.join(paths, '*.npz')))
+        self.paths = list(paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        for path in self.paths:
+            yield Shard(path)
+
+    def batches(self, batch_size, keys=('features', 'won'), rng=None):
+        """Iterate over records in batches
+
+        Parameters
+        ----------
+        batch_size : int
+        keys : iterable of str
+            Arrays to be included in the batches, per-record ones only
+        rng : numpy.random.Generator
+            If given, shards are visited in a random order and records of
+            every shard are shuffled
+
+        Yields
+        ------
+        dict of str: numpy.ndarray
+            Batches of batch_size records, the last one may be smaller
+        """
+        paths = self.paths if rng is None else [self.paths[i] for i in rng.permutation(len(self.paths))]
+
+        pending = {key: [] for key in keys}
+        nb_pending = 0
+        for path in paths:
+            shard = Shard(path)
+            arrays = {key: shard[key] for key in keys}
+            if rng is not None:
+                order = rng.permutation(len(shard))
+                arrays = {key: array[order] for key, array in arrays.items()}
+
+            start = 0
+            nb_records = len(shard)
+            while start < nb_records:
+                end = min(nb_records, start + batch_size - nb_pending)
+                for key in keys:
+                    pending[key].append(arrays[key][start:end])
+                nb_pending += end - start
+                start = end
+                if nb_pending == batch_size:
+                    yield {key: numpy.concatenate(parts) for key, parts in pending.items()}
+                    pending = {key: [] for key in keys}
+                    nb_pending = 0
+
+        if nb_pending:
+            yield {key: numpy.concatenate(parts) for key, parts in pending.items()}
+
+
+def play_recorded_games(ais, games, config, writer, board_library=None):
+    """Play headless games and record their moves
+
+    Parameters
+    ----------
+    ais : list of str
+        AIs of every game, the order of players is rotated from game to game
+    games : iterable of int
+        Numbers of the games to play, the board and dice are seeded by them
+    config : configparser.ConfigParser
+    writer : ShardWriter
+
+    Returns
+    -------
+    list of GameSummary
+    """
+    summaries = []
+    for game_id in games:
+        shift = game_id % len(ais)
+        players = ais[shift:] + ais[:shift]
+        nicknames = ['{} (AI {})'.format(ai, i) for i, ai in enumerate(players, start=1)]
+
+        def game_class(*args):
+            return RecordingGame(*args, writer=writer, game_id=game_id)
+
+        summaries.append(run_headless_game(
+            players, nicknames, config,
+            board_seed=game_id, ownership_seed=game_id, strength_seed=game_id,
+            fixed=game_id, client_seed=game_id,
+            board_library=board_library, game_class=game_class,
+        ))
+    return summaries
@@ -0,0 +1,84 @@
+"""Sequential testing of a win rate, deciding as soon as the games allow it
+
+Wald's sequential probability ratio test (SPRT) compares the hypotheses
+that the win rate is `baseline - margin` (the AI is worse than the baseline)
+and `baseline + margin` (it is better). After every game, the log-likelihood
+ratio of the two is updated and compared to bounds given by the requested
+error rates; once it leaves them, the evaluation can stop. Win rates within
+the margin of the baseline may be decided either way.
+"""
+import math
+
+
+BETTER = 'better'
+WORSE = 'worse'
+
+
+class SPRT:
+    """Sequential probability ratio test of the win rate of a single player
+    """
+    def __init__(self, baseline, margin=0.05, alpha=0.05, beta=0.05):
+        """
+        Parameters
+        ----------
+        baseline : float
+            Win rate to compare to, e.g. 1 / number of players in a game
+        margin : float
+            Half-width of the indifference region around the baseline
+        alpha : float
+            Probability of deciding BETTER for a win rate `baseline - margin`
+        beta : float
+            Probability of deciding WORSE for a win rate `baseline + margin`
+        """
+        self.baseline = baseline
+        self.p0 = baseline - margin
+        self.p1 = baseline + margin
+        if not 0.0 < self.p0 < self.p1 < 1.0:
+            raise ValueError("Win rates {} and {} around the baseline must lie in (0, 1)".format(self.p0, self.p1))
+        if not (0.0 < alpha < 1.0 and 0.0 < beta < 1.0):
+            raise ValueError("Error rates must lie in (0, 1), got {} and {}".format(alpha, beta))
+
+        self.lower = math.log(beta / (1.0 - alpha))
+        self.upper = math.log((1.0 - beta) / alpha)
+        self.win_llr = math.log(self.p1 / self.p0)
+        self.loss_llr = math.log((1.0 - self.p1) / (1.0 - self.p0))
+
+        self.llr = 0.0
+        self.nb_games = 0
+        self.nb_wins = 0
+
+    def add_game(self, won):
+        """Score a game of the tested player
+
+        Returns
+        -------
+        str
+            BETTER or WORSE once decided, None otherwise
+        """
+        self.nb_games += 1
+        if won:
+            self.nb_wins += 1
+            self.llr += self.win_llr
+        else:
+            self.llr += self.loss_llr
+        return self.decision
+
+    @property
+    def decision(self):
+        if self.llr >= self.upper:
+            return BETTER
+        if self.llr <= self.lower:
+            return WORSE
+        return None
+
+    @property
+    def winrate(self):
+        return self.nb_wins / self.nb_games if self.nb_games else float('nan')
+
+    def __str__(self):
+        decision = self.decision
+        return '{} after {} games: {:.2f} % winrate [ {} / {} ], LLR {:.2f} in ({:.2f}, {:.2f}) for {:.2f} % vs. {:.2f} %'.format(
+            'undecided' if decision is None else '{} than {:.2f} %'.format(decision, 100.0 * self.baseline),
+            self.nb_games, 100.0 * self.winrate, self.nb_wins, self.nb_games,
+            self.llr, self.lower, self.upper, 100.0 * self.p0, 100.0 * self.p1,
+        )
@@ -0,0 +1,201 @@
+"""Library of pregenerated boards
+
+The library is a single file which can be memory-mapped and shared by any
+number of servers. It starts with a magic string and a JSON index, followed
+by int32 arrays of every stored board:
+
+    names              n    names of areas, in the order of the board
+    neighbours_indptr  n+1  where neighbours of each area start
+    neighbours         k    names of adjacent areas
+    hexes_indptr       n+1  where hexes of each area start
+    hexes              2h   x and y of every hex
+    ownership          2n   area and player pairs, in the order of assignment
+    dice               n    dice in each area
+
+Boards are keyed by the seeds they were generated from, the number of
+players and the [BOARD] configuration, see `library_key()`.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import hexutil
+import numpy as np
+
+
+MAGIC = b'DWBLIB01'
+HEADER = struct.Struct('<8sQ')
+ARRAYS = ['names', 'neighbours_indptr', 'neighbours', 'hexes_indptr', 'hexes', 'ownership', 'dice']
+
+
+def config_fingerprint(board_config):
+    """Identify the [BOARD] configuration
+
+    Parameters
+    ----------
+    board_config : configparser.SectionProxy
+
+    Returns
+    -------
+    str
+    """
+    canonical = json.dumps(sorted(board_config.items()))
+    return hashlib.sha1(canonical.encode()).hexdigest()[:16]
+
+
+def library_key(board_config, nb_players, board_seed, ownership_seed, strength_seed):
+    """Get key of a board in the library
+
+    Returns
+    -------
+    str
+        None if any of the seeds is missing, such boards are not reproducible
+    """
+    if board_seed is None or ownership_seed is None or strength_seed is None:
+        return None
+    return '{}:{}:{}:{}:{}'.format(config_fingerprint(board_config), nb_players, board_seed, ownership_seed, strength_seed)
+
+
+def board_arrays(board, area_ownership):
+    """Flatten a board set up for a game into arrays of the library
+
+    Parameters
+    ----------
+    board : Board
+        Board with dice assigned
+    area_ownership : dict of int: int
+        Owner of every area
+
+    Returns
+    -------
+    dict of str: numpy.ndarray
+    """
+    names = list(board.get_board())
+    neighbours = [board.get_board()[name]['neighbours'] for name in names]
+    hexes = [board.get_board()[name]['hexes'] for name in names]
+
+    return {
+        'names': np.array(names, dtype=np.int32),
+        'neighbours_indptr': np.cumsum([0] + [len(n) for n in neighbours], dtype=np.int32),
+        'neighbours': np.array([n for ns in neighbours for n in ns], dtype=np.int32),
+        'hexes_indptr': np.cumsum([0] + [len(h) for h in hexes], dtype=np.int32),
+        'hexes': np.array([coord for hs in hexes for h in hs for coord in h], dtype=np.int32),
+        'ownership': np.array([item for pair in area_ownership.items() for item in pair], dtype=np.int32),
+        'dice': np.array([board.areas[name].get_dice() for name in names], dtype=np.int32),
+    }
+
+
+def write_board_library(path, entries):
+    """Store boards as a library, replacing the file atomically
+
+    Parameters
+    ----------
+    path : str
+    entries : dict of str: dict of str: numpy.ndarray
+        Arrays of boards by their keys, see `board_arrays()`
+    """
+    index = {}
+    offset = 0
+    for key, arrays in entries.items():
+        index[key] = {
+            'offset': offset,
+            'lengths': [len(arrays[name]) for name in ARRAYS],
+        }
+        offset += sum(index[key]['lengths']) * 4
+
+    index_data = json.dumps(index).encode()
+    index_data += b' ' * (-(HEADER.size + len(index_data)) % 4)
+
+    tmp_path = '{}.tmp'.format(path)
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(index_data)))
+        f.write(index_data)
+        for arrays in entries.values():
+            for name in ARRAYS:
+                f.write(np.ascontiguousarray(arrays[name], dtype='<i4').tobytes())
+    os.replace(tmp_path, path)
+
+
+class BoardLibrary:
+    """Read-only access to a library of boards
+    """
+    def __init__(self, path):
+        """
+        Parameters
+        ----------
+        path : str
+            Library file
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, index_size = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            raise ValueError("{} is not a board library".format(path))
+        self.index = json.loads(bytes(self.data[HEADER.size:HEADER.size + index_size]).decode())
+        self.data_start = HEADER.size + index_size
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def keys(self):
+        return self.index.keys()
+
+    def get_arrays(self, key):
+        """Get arrays of a board, backed by the mapped file
+
+        Returns
+        -------
+        dict of str: numpy.ndarray
+        """
+        entry = self.index[key]
+        arrays = {}
+        offset = self.data_start + entry['offset']
+        for name, length in zip(ARRAYS, entry['lengths']):
+            arrays[name] = np.frombuffer(self.data, dtype='<i4', count=length, offset=offset)
+            offset += length * 4
+        return arrays
+
+    def get(self, key):
+        """Get a board description as produced by the generator along with its setup
+
+        Returns
+        -------
+        (dict, dict of int: int, dict of int: int)
+            Board description with hexes and neighbours, area ownership, and
+            dice of every area. None if the library does not hold the board.
+        """
+        if key is None or key not in self.index:
+            return None
+
+        arrays = self.get_arrays(key)
+        names = arrays['names'].tolist()
+        neighbours_indptr = arrays['neighbours_indptr'].tolist()
+        neighbours = arrays['neighbours'].tolist()
+        hexes_indptr = arrays['hexes_indptr'].tolist()
+        hexes = arrays['hexes'].tolist()
+
+        board = {}
+        for i, name in enumerate(names):
+            board[name] = {
+                'hexes': [
+                    hexutil.Hex(hexes[2*j], hexes[2*j + 1])
+                    for j in range(hexes_indptr[i], hexes_indptr[i+1])
+                ],
+                'neighbours': neighbours[neighbours_indptr[i]:neighbours_indptr[i+1]],
+            }
+
+        ownership = arrays['ownership'].tolist()
+        area_ownership = dict(zip(ownership[0::2], ownership[1::2]))
+        dice = dict(zip(names, arrays['dice'].tolist()))
+
+        return board, area_ownership, dice
+
+    def close(self):
+        self.data.close()
@@ -1,4 +1,3 @@
-import json
 from json.decoder import JSONDecodeError
 import logging
 import random
@@ -6,11 +5,17 @@ import numpy as np
 import socket
 import sys
 
+from dicewars.protocol import encode_message
+
 from .player import Player
 
 from .summary import GameSummary
 
 
+# Messages informing clients about changes of the game state
+STATE_UPDATE_TYPES = ('battle', 'transfer', 'end_turn')
+
+
 class Game:
     """Instance of the game
     """
@@ -32,6 +37,14 @@ class Game:
             Size of socket buffer
         number_of_players : int
             Number of players
+        state_version : int
+            Number of state updates sent to clients
+        changed_areas : set of int
+            Names of areas changed since the last state update
+        changed_players : set of int
+            Names of players whose score or reserve changed since the last state update
+        event_log : EventLogWriter
+            Where events of the game are recorded, if anywhere
         """
         self.buffer = 65535
         self.logger = logging.getLogger('SERVER')
@@ -44,6 +57,11 @@ class Game:
         self.nb_consecutive_end_of_turns = 0
         self.nb_battles = 0
 
+        self.state_version = 0
+        self.changed_areas = set()
+        self.changed_players = set()
+        self.event_log = None
+
         self.reserve_production_cap = game_config.getint('ReserveProductionCap')
         self.reserve_type = game_config.get('ReserveType')
         self.reserve_cap = game_config.getint('ReserveSizeCap')
@@ -82,21 +100,17 @@ class Game:
         """Main loop of the game
         """
         try:
-            for i in range(1, self.number_of_players + 1):
-                player = self.players[i]
-                self.send_message(player, 'game_state')
+            self.start()
             while True:
                 self.logger.debug("Current player {}".format(self.current_player.get_name()))
                 self.handle_player_turn()
                 if self.check_win_condition():
-                    sys.stdout.write(str(self.summary))
+                    self.report_summary()
                     break
 
         except KeyboardInterrupt:
             self.logger.info("Game interrupted.")
-            for i in range(1, self.number_of_players + 1):
-                player = self.players[i]
-                self.send_message(player, 'close_socket')
+            self.broadcast_message('close_socket')
         except BrokenPipeError as e:
             self.logger.error("Connection to client failed: {0}".format(e), exc_info=True)
         except JSONDecodeError as e:
@@ -109,6 +123,33 @@ class Game:
         except BrokenPipeError:
             pass
 
+    def start(self):
+        """Send the initial game state to all clients
+        """
+        for i in range(1, self.number_of_players + 1):
+            player = self.players[i]
+            self.send_message(player, 'game_state')
+
+    def report_summary(self):
+        """Publish the summary of a finished game
+        """
+        sys.stdout.write(str(self.summary))
+
+    def record_events(self, event_log, seeds=None, board_key=None):
+        """Record the game from its current state on
+
+        Parameters
+        ----------
+        event_log : EventLogWriter
+            Writer to be closed by the caller once the game ends
+        seeds : dict of str: int
+            Seeds the board and the game were created with
+        board_key : str
+            Key of the board in a board library
+        """
+        self.event_log = event_log
+        event_log.start(self, seeds, board_key)
+
     ##############
     # GAME LOGIC #
     ##############
@@ -131,26 +172,38 @@ class Game:
         self.logger.debug("Handling player {} ({}) turn".format(self.current_player.get_name(), self.current_player.nickname))
         player = self.current_player.get_name()
         msg = self.get_message(player)
+        self.process_player_message(msg, self.current_player)
+
+    def process_player_message(self, msg, sender):
+        """Carry out the action requested by the current player
 
+        Parameters
+        ----------
+        msg : dict
+            Message from the client
+        sender : Player
+            Player whose client sent the message, only the current player
+            may do anything but ask for the game state
+        """
         if msg['type'] == 'battle':
             self.nb_consecutive_end_of_turns = 0
             battle = self.battle(self.board.get_area_by_name(msg['atk']), self.board.get_area_by_name(msg['def']))
             self.summary.add_battle()
             self.logger.debug("Battle result: {}".format(battle))
-            for p in self.players:
-                self.send_message(self.players[p], 'battle', battle=battle)
+            self.broadcast_message('battle', battle=battle)
 
         elif msg['type'] == 'end_turn':
             self.nb_consecutive_end_of_turns += 1
             affected_areas = self.end_turn()
-            for p in self.players:
-                self.send_message(self.players[p], 'end_turn', areas=affected_areas)
+            self.broadcast_message('end_turn', areas=affected_areas)
 
         elif msg['type'] == 'transfer':
             self.nb_consecutive_end_of_turns = 0
             transfer = self.transfer(self.board.get_area_by_name(msg['src']), self.board.get_area_by_name(msg['dst']))
-            for p in self.players:
-                self.send_message(self.players[p], 'transfer', transfer=transfer)
+            self.broadcast_message('transfer', transfer=transfer)
+
+        elif msg['type'] == 'get_state':
+            self.send_message(sender, 'game_state')
 
         else:
             self.logger.warning(f'Unexpected message type: {msg["type"]}')
@@ -184,6 +237,49 @@ class Game:
 
         return game_state
 
+    def get_state_delta(self):
+        """Get changes of the game state since the last state update
+
+        Returns
+        -------
+        dict
+            Dictionary containing version of the state, owner and dice of
+            changed areas, as well as score and reserve of affected players
+        """
+        state_delta = {
+            'version': self.state_version,
+            'areas': {},
+            'score': {},
+            'reserves': {},
+        }
+
+        for area_name in self.changed_areas:
+            area = self.board.get_area_by_name(area_name)
+            state_delta['areas'][area_name] = {
+                'owner': area.get_owner_name(),
+                'dice': area.get_dice()
+            }
+
+        for player_name in self.changed_players:
+            player = self.players[player_name]
+            state_delta['score'][player_name] = player.get_largest_region(self.board)
+            state_delta['reserves'][player_name] = player.get_reserve()
+
+        return state_delta
+
+    def mark_changed(self, areas=(), players=()):
+        """Note areas and players to be included in the next state update
+
+        Parameters
+        ----------
+        areas : iterable of int
+            Names of changed areas
+        players : iterable of int
+            Names of affected players
+        """
+        self.changed_areas.update(areas)
+        self.changed_players.update(players)
+
     def battle(self, attacker, defender):
         """Carry out a battle
 
@@ -201,11 +297,12 @@ class Game:
 
         atk_name = attacker.get_owner_name()
         def_name = defender.get_owner_name()
+        self.mark_changed(areas=[attacker.get_name(), defender.get_name()], players=[atk_name, def_name])
 
-        for i in range(0, atk_dice):
-            atk_pwr += random.randint(1, 6)
-        for i in range(0, def_dice):
-            def_pwr += random.randint(1, 6)
+        atk_rolls = [random.randint(1, 6) for i in range(0, atk_dice)]
+        def_rolls = [random.randint(1, 6) for i in range(0, def_dice)]
+        atk_pwr = sum(atk_rolls)
+        def_pwr = sum(def_rolls)
 
         battle = {
             'atk': {
@@ -245,6 +342,10 @@ class Game:
                 'pwr': def_pwr
             }
 
+        if self.event_log is not None:
+            self.event_log.battle(
+                attacker.get_name(), defender.get_name(), atk_rolls, def_rolls, atk_pwr > def_pwr, defender.get_dice()
+            )
         return battle
 
     def transfer(self, source, destination):
@@ -262,6 +363,9 @@ class Game:
 
         source.set_dice(src_dice - dice_moved)
         destination.set_dice(dst_dice + dice_moved)
+        self.mark_changed(areas=[source.get_name(), destination.get_name()])
+        if self.event_log is not None:
+            self.event_log.transfer(source.get_name(), destination.get_name(), dice_moved)
 
         transfer = {
             'src': {
@@ -302,8 +406,17 @@ class Game:
             reserve_dice = 0
 
         self.current_player.set_reserve(reserve_dice)
+        self.mark_changed(
+            areas=[area.get_name() for area in affected_areas],
+            players=[self.current_player.get_name()],
+        )
 
         self.set_next_player()
+        if self.event_log is not None:
+            self.event_log.end_turn(
+                self.current_player.get_name(), reserve_dice,
+                [(area.get_name(), area.get_dice()) for area in affected_areas],
+            )
 
         list_of_areas = {}
         for area in affected_areas:
@@ -414,9 +527,10 @@ class Game:
 
     def process_win(self, player_nick, player_name):
         self.summary.set_winner(player_nick)
+        if self.event_log is not None:
+            self.event_log.game_end(player_name)
         self.logger.info("Player {} ({}) wins!".format(player_nick, player_name))
-        for i in self.players:
-            self.send_message(self.players[i], 'game_end', winner=player_name)
+        self.broadcast_message('game_end', winner=player_name)
 
     ##############
     # NETWORKING #
@@ -431,11 +545,10 @@ class Game:
 
         Returns
         -------
-        str
+        dict
             Decoded message from the client
         """
-        raw_message = self.client_sockets[player].recv(self.buffer)
-        msg = json.loads(raw_message.decode())
+        msg = self.players[player].get_receiver().read_message()
         self.logger.debug("Got message from client {}: {}".format(player, msg))
         return msg
 
@@ -456,6 +569,68 @@ class Game:
             Areas changed during the turn
         """
         self.logger.debug("Sending msg type '{}' to client {}".format(type, client.get_name()))
+        msg = self.compose_message(type, client, battle=battle, winner=winner, areas=areas, transfer=transfer)
+        client.send_message(self.encode_message(msg, *client.get_wire_format()))
+
+    def broadcast_message(self, type, battle=None, winner=None, areas=None, transfer=None):
+        """Send the same message to all clients
+
+        The message is composed only once per kind of state updates and
+        serialized only once per wire format the clients asked for, then the
+        same data is sent to every such client. Not applicable to messages addressing the recepient
+        ('game_start', 'game_state').
+        """
+        self.logger.debug("Broadcasting msg type '{}'".format(type))
+        if type in STATE_UPDATE_TYPES:
+            self.state_version += 1
+
+        msgs = {}
+        data = {}
+        for player in self.players.values():
+            state_updates = player.get_state_updates() if type in STATE_UPDATE_TYPES else 'full'
+            if state_updates not in msgs:
+                msgs[state_updates] = self.compose_message(
+                    type, None, battle=battle, winner=winner, areas=areas, transfer=transfer,
+                    delta=(state_updates == 'delta'),
+                )
+            wire_format = player.get_wire_format()
+            if (state_updates, wire_format) not in data:
+                data[state_updates, wire_format] = self.encode_message(msgs[state_updates], *wire_format)
+            player.send_message(data[state_updates, wire_format])
+
+        if type in STATE_UPDATE_TYPES:
+            self.changed_areas.clear()
+            self.changed_players.clear()
+
+    def compose_message(self, type, client, battle=None, winner=None, areas=None, transfer=None, delta=False):
+        """Create message of a given type
+
+        Parameters
+        ----------
+        type : str
+            Type of message
+        client : Player
+            Recepient of the message, only needed for 'game_start' and 'game_state'
+        delta : bool
+            Describe only changes of the state since the last state update,
+            only applicable to 'battle', 'transfer' and 'end_turn'
+
+        Returns
+        -------
+        dict
+        """
+        if delta:
+            assert type in STATE_UPDATE_TYPES
+            msg = self.get_state_delta()
+            msg['type'] = type
+            if type == 'battle':
+                msg['result'] = battle
+            elif type == 'transfer':
+                msg['result'] = transfer
+            elif type == 'end_turn':
+                msg['current_player'] = self.current_player.get_name()
+            return msg
+
         if type == 'game_start':
             msg = self.get_state()
             msg['type'] = 'game_start'
@@ -464,6 +639,7 @@ class Game:
             msg['current_player'] = self.current_player.get_name()
             msg['board'] = self.board.get_board()
             msg['order'] = self.players_order
+            msg['version'] = self.state_version
 
         elif type == 'game_state':
             msg = self.get_state()
@@ -471,6 +647,10 @@ class Game:
             msg['player'] = client.get_name()
             msg['no_players'] = self.number_of_players
             msg['current_player'] = self.current_player.get_name()
+            msg['reserves'] = {
+                i: self.players[i].get_reserve() for i in self.players
+            }
+            msg['version'] = self.state_version
 
         elif type == 'battle':
             msg = self.get_state()
@@ -500,8 +680,27 @@ class Game:
         elif type == 'close_socket':
             msg = {'type': 'close_socket'}
 
-        msg = json.dumps(msg)
-        client.send_message(msg + '\0')
+        elif type == 'next_game':
+            msg = {'type': 'next_game'}
+
+        return msg
+
+    def encode_message(self, msg, framing='nul', encoding='json'):
+        """Serialize message for sending over a socket
+
+        Parameters
+        ----------
+        msg : dict
+        framing : str
+            'nul' or 'length_prefixed'
+        encoding : str
+            Encoding of framed messages
+
+        Returns
+        -------
+        bytes
+        """
+        return encode_message(msg, framing, encoding)
 
     def create_socket(self):
         """Initiate server socket
@@ -510,6 +709,7 @@ class Game:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             self.socket.bind((self.address, self.port))
+            self.socket.listen(self.number_of_players)
             self.logger.debug("Server socket at {}:{}".format(self.address, self.port))
         except OSError as e:
             self.logger.error("Cannot create socket. {0}.".format(e))
@@ -520,18 +720,30 @@ class Game:
         """
         self.client_sockets = {}
 
-        self.socket.listen(self.number_of_players)
         self.logger.debug("Waiting for clients to connect")
 
         for i in range(1, self.number_of_players + 1):
             self.connect_client(i)
-            hello_msg = self.get_message(i)
-            if hello_msg['type'] != 'client_desc':
-                raise ValueError("Client send a wrong-type hello message '{}'".format(hello_msg))
-            self.players[i].set_nickname(hello_msg['nickname'])
+            self.register_client_desc(i, self.get_message(i))
 
         self.logger.debug("Successfully assigned clients to all players")
 
+    def register_client_desc(self, i, hello_msg):
+        """Set up player according to the hello message of its client
+
+        Parameters
+        ----------
+        i : int
+            Player's name
+        hello_msg : dict
+            The 'client_desc' message
+        """
+        if hello_msg['type'] != 'client_desc':
+            raise ValueError("Client send a wrong-type hello message '{}'".format(hello_msg))
+        self.players[i].set_nickname(hello_msg['nickname'])
+        self.players[i].set_state_updates(hello_msg.get('state_updates', 'full'))
+        self.players[i].set_framing(hello_msg.get('framing', 'nul'), hello_msg.get('encoding', 'json'))
+
     def connect_client(self, i):
         """Assign client to an instance of Player
         """
@@ -567,7 +779,7 @@ class Game:
         """
         player = self.get_unassigned_player()
         if player:
-            player.assign_client(socket, client_address)
+            player.assign_client(socket, client_address, self.buffer)
             return player
         else:
             return False
@@ -2,8 +2,22 @@ import hexutil
 from random import randint, choice as rand_choice, shuffle
 
 
+# States of grid cells
+OUTSIDE = -1
+FREE = 0
+BORDER = 1  # free, but adjacent to a taken cell
+TAKEN = 2
+
+# Offsets of adjacent hexes, in the order of hexutil.Hex.neighbours()
+NEIGHBOUR_OFFSETS = [(2, 0), (1, 1), (-1, 1), (-2, 0), (-1, -1), (1, -1)]
+
+
 class BoardGenerator:
     """Generator of game board
+
+    The grid is kept as a flat list of cell states, padded by a margin of
+    OUTSIDE cells, so that neighbours of any cell on the board can be looked
+    up by adding fixed offsets to its index.
     """
     def __init__(self):
         """
@@ -11,16 +25,47 @@ class BoardGenerator:
         ----------
         min_x, max_x, min_y, max_y : int
             Boundary values for Hex coordinates
+        width : int
+            Number of cells in a row of the padded grid
+        offsets : list of int
+            Index offsets of adjacent cells
+        start_cells : list of int
+            Cells where areas other than the first one may start
         """
         self.min_x = -32
         self.max_x = 30
         self.min_y = -14
         self.max_y = 13
-        self.coordinates = [(x, y) for x in range(self.min_x + 2, self.max_x, 2)
-                            for y in range(self.min_y + 1, self.max_y)]
-        for i in range(len(self.coordinates)):
-            if self.coordinates[i][1] % 2 == 1:
-                self.coordinates[i] = (self.coordinates[i][0] + 1, self.coordinates[i][1])
+
+        self.origin_x = self.min_x - 2
+        self.origin_y = self.min_y - 1
+        self.width = self.max_x + 3 - self.origin_x + 1
+        height = self.max_y + 1 - self.origin_y + 1
+        self.offsets = [dy * self.width + dx for dx, dy in NEIGHBOUR_OFFSETS]
+
+        self.empty_grid = [OUTSIDE] * (self.width * height)
+        for y in range(self.min_y, self.max_y + 1):
+            if y % 2 == 0:
+                xs = range(self.min_x, self.max_x + 1, 2)
+            else:
+                xs = range(self.min_x + 1, self.max_x + 2, 2)
+            for x in xs:
+                self.empty_grid[self.cell(x, y)] = FREE
+
+        coordinates = [(x, y) for x in range(self.min_x + 2, self.max_x, 2)
+                       for y in range(self.min_y + 1, self.max_y)]
+        self.start_cells = [self.cell(x + y % 2, y) for x, y in coordinates]
+
+    def cell(self, x, y):
+        """Get index of a cell in the grid
+        """
+        return (y - self.origin_y) * self.width + x - self.origin_x
+
+    def hex(self, cell):
+        """Get Hex of a cell in the grid
+        """
+        y, x = divmod(cell, self.width)
+        return hexutil.Hex(x + self.origin_x, y + self.origin_y)
 
     def random_hex(self):
         """Get random Hex from the board
@@ -49,27 +94,26 @@ class BoardGenerator:
             Dictionary of areas in the game board. Contains names of adjacent
             areas and coordinates of the hexes of each area
         """
-        self.a = {}
+        self.grid = list(self.empty_grid)
+        self.area_of = [0] * len(self.grid)
         self.areas = {}
-        for i in range(self.min_y, self.max_y + 1):
-            self.a[i] = {}
-            if i % 2 == 0:
-                for j in range(self.min_x, self.max_x + 1, 2):
-                    self.a[i][j] = 0
-            else:
-                for j in range(self.min_x + 1, self.max_x + 2, 2):
-                    self.a[i][j] = 0
 
         for i in range(1, nb_base_areas + randint(0, nb_max_extra_areas)):
             self.__create_area(i)
-        self.__add_neighbours()
-
-        return self.areas
+        neighbours = self.__find_neighbours()
+
+        return {
+            area: {
+                'hexes': [self.hex(cell) for cell in cells],
+                'neighbours': neighbours[area],
+            }
+            for area, cells in self.areas.items()
+        }
 
     def __create_area(self, area):
         """Create an area from Hexes
         """
-        self.possible_hexes = []
+        self.possible_cells = []
         i = 0
         size = randint(12, 18)
         while i < size:
@@ -82,22 +126,27 @@ class BoardGenerator:
     def __fill_area(self, area):
         """Fills empty Hexes inside the area
         """
-        for h in self.areas[area]['hexes']:
-            for n in h.neighbours():
-                counter = 0
-                if n.y not in self.a or n.x not in self.a[n.y] or self.a[n.y][n.x] != 1:
+        grid = self.grid
+        area_of = self.area_of
+        cells = self.areas[area]
+
+        # cells taken here are examined as well
+        i = 0
+        while i < len(cells):
+            c = cells[i]
+            i += 1
+            for offset in self.offsets:
+                n = c + offset
+                if grid[n] != BORDER:
                     break
-                for nn in n.neighbours():
-                    if (nn.y not in self.a or nn.x not in self.a[nn.y]):
-                        counter += 1
-                    elif nn not in self.areas[area]['hexes']:
+                counter = 0
+                for nn_offset in self.offsets:
+                    if area_of[n + nn_offset] != area:
                         counter += 1
-                    if counter > 2:
-                        break
+                        if counter > 2:
+                            break
                 if counter <= 2:
-                    self.__retag_neighbouring_hexes(n)
-                    self.a[n.y][n.x] = 2
-                    self.areas[area]['hexes'].append(n)
+                    self.__take(n, area)
                     break
 
     def __add_hex_to_area(self, area):
@@ -113,88 +162,86 @@ class BoardGenerator:
     def __start_first_area(self):
         """Add first Hex to first area on the board
         """
-        self.h = self.random_hex()
-        self.possible_hexes.append(self.h)
-        self.a[self.h.y][self.h.x] = 2
-        self.__retag_neighbouring_hexes(self.h)
-        self.areas[1] = {
-            'hexes': [self.h],
-            'neighbours': []
-        }
+        h = self.random_hex()
+        self.c = self.cell(h.x, h.y)
+        self.possible_cells.append(self.c)
+        self.areas[1] = []
+        self.__take(self.c, 1)
         return True
 
     def __start_area(self, area):
         """Add first Hex to an area
         """
-        shuffle(self.coordinates)
-        for coord in self.coordinates:
-            x = coord[0]
-            y = coord[1]
-            if self.a[y][x] == 0:
-                h = hexutil.Hex(x, y)
-                for n in h.neighbours():
-                    if n.y in self.a and n.x in self.a[n.y] and self.a[n.y][n.x] == 1:
-                        self.h = h
-                        self.possible_hexes.append(h)
-                        self.a[h.y][h.x] = 2
-                        self.__retag_neighbouring_hexes(h)
-                        self.areas[area] = {
-                            'hexes': [h],
-                            'neighbours': []
-                        }
+        grid = self.grid
+        shuffle(self.start_cells)
+        for c in self.start_cells:
+            if grid[c] == FREE:
+                for offset in self.offsets:
+                    if grid[c + offset] == BORDER:
+                        self.c = c
+                        self.possible_cells.append(c)
+                        self.areas[area] = []
+                        self.__take(c, area)
                         return True
 
     def __grow_area(self, area):
         """Add hex to already existing area
         """
         while True:
-            if self.h != self.areas[area]['hexes'][0] or self.h not in self.possible_hexes:
-                self.h = rand_choice(self.possible_hexes)
+            if self.c != self.areas[area][0] or self.c not in self.possible_cells:
+                self.c = rand_choice(self.possible_cells)
 
             n = self.__neighbour()
-            if n:
-                self.possible_hexes.append(n)
-                self.a[n.y][n.x] = 2
-                self.__retag_neighbouring_hexes(n)
-                self.areas[area]['hexes'].append(n)
+            if n is not None:
+                self.possible_cells.append(n)
+                self.__take(n, area)
                 return True
 
             else:
-                self.possible_hexes.remove(self.h)
-                if not self.possible_hexes:
-                    self.areas.pop(area)
+                self.possible_cells.remove(self.c)
+                if not self.possible_cells:
+                    for c in self.areas.pop(area):
+                        self.area_of[c] = 0
                     return False
 
-    def __retag_neighbouring_hexes(self, hex):
-        """Mark adjacent Hexes as neighbours to already used Hex
+    def __take(self, cell, area):
+        """Add cell to an area and mark adjacent free cells as neighbours of a used one
+
+        Cells of a discarded area stay taken, but do not belong to any area.
         """
-        for n in hex.neighbours():
-            if n.y in self.a and n.x in self.a[n.y]:
-                if self.a[n.y][n.x] == 0:
-                    self.a[n.y][n.x] = 1
+        grid = self.grid
+        grid[cell] = TAKEN
+        for offset in self.offsets:
+            if grid[cell + offset] == FREE:
+                grid[cell + offset] = BORDER
+        self.area_of[cell] = area
+        self.areas[area].append(cell)
 
     def __neighbour(self):
-        """Get random adjacent Hex
+        """Get random adjacent cell not taken yet
         """
-        ns = self.h.neighbours()
+        ns = [self.c + offset for offset in self.offsets]
         shuffle(ns)
         for n in ns:
-            if n.y in self.a and n.x in self.a[n.y]:
-                if self.a[n.y][n.x] != 2:
-                    return n
-        return False
+            if self.grid[n] in (FREE, BORDER):
+                return n
+        return None
 
-    def __add_neighbours(self):
-        """Add neighbours of an area to the areas dict based
+    def __find_neighbours(self):
+        """Find neighbours of all areas
+
+        Returns
+        -------
+        dict of int: list of int
+            Adjacent areas in the order of discovery through the area's hexes
         """
-        for a in self.areas:
-            for h in self.areas[a]['hexes']:
-                for n in h.neighbours():
-                    if (n.y in self.a and n.x in self.a[n.y] and self.a[n.y][n.x] == 2
-                        and n not in self.areas[a]['hexes']):
-                        for k in self.areas:
-                            if a == k:
-                                continue
-                            if n in self.areas[k]['hexes']:
-                                if k not in self.areas[a]['neighbours']:
-                                    self.areas[a]['neighbours'].append(k)
+        neighbours = {}
+        for area, cells in self.areas.items():
+            found = []
+            for c in cells:
+                for offset in self.offsets:
+                    k = self.area_of[c + offset]
+                    if k and k != area and k not in found:
+                        found.append(k)
+            neighbours[area] = found
+        return neighbours
@@ -0,0 +1,476 @@
+import logging
+import random
+import selectors
+import socket
+import sys
+from collections import deque
+
+from dicewars.headless import RandomStream
+from dicewars.protocol import BareJSONDecoder, FrameDecoder
+
+from .board_setup import setup_board
+from .game import Game
+
+
+class ClientConnection:
+    """Connection of a client to the GameServer
+
+    Messages of the client are buffered until the game it takes part in
+    asks for them. A persistent client stays connected once its game is
+    over and introduces itself again by a hello to join its next game.
+
+    The socket is non-blocking. Data for the client is sent as far as the
+    socket takes it, the rest is kept until the selector reports the
+    socket writable, so a slow reader does not hold up other games.
+    """
+    def __init__(self, sock, address, buffer, selector):
+        """
+        Parameters
+        ----------
+        sock : socket
+        address : (str, int)
+            Client's address and port number
+        buffer : int
+            Size of socket buffer
+        selector : selectors.BaseSelector
+            Selector watching the socket
+        """
+        self.socket = sock
+        self.address = address
+        self.buffer = buffer
+        self.selector = selector
+        self.outgoing = bytearray()
+        self.closing = False
+
+        self.decoder = BareJSONDecoder()
+        self.messages = deque()
+        self.hello = None
+        self.persistent = False
+        self.lobby = None
+        self.game = None
+        self.player_name = None
+
+    def receive(self):
+        """Read available data from the socket
+
+        The first 'client_desc' hello is always bare JSON, the framing asked
+        for in it applies to all following messages, including hellos of
+        a persistent client joining its next games.
+
+        Returns
+        -------
+        bool
+            False if the client has closed the connection
+        """
+        try:
+            data = self.socket.recv(self.buffer)
+        except BlockingIOError:
+            return True
+        if not data:
+            return False
+
+        for msg in self.decoder.feed(data):
+            if self.hello is None:
+                if self.persistent and msg.get('type') != 'client_desc':
+                    # sent before the client learnt that its last game was over
+                    continue
+                self.hello = msg
+                self.persistent = bool(msg.get('persistent', False))
+                if msg.get('framing', 'nul') == 'length_prefixed' and isinstance(self.decoder, BareJSONDecoder):
+                    leftover = self.decoder.buffer.encode()
+                    self.decoder = FrameDecoder()
+                    self.messages.extend(self.decoder.feed(leftover))
+                    return True
+            else:
+                self.messages.append(msg)
+        return True
+
+    def reset(self):
+        """Forget the finished game, wait for a hello naming the next one
+        """
+        self.messages.clear()
+        self.hello = None
+        self.lobby = None
+        self.game = None
+        self.player_name = None
+
+    def send(self, data):
+        """Send data without blocking, keep what the socket does not take
+        """
+        self.outgoing += data
+        self.flush()
+
+    def flush(self):
+        """Send as much of the kept data as possible
+
+        Once all data is sent, a connection asked to close gets closed.
+        """
+        while self.outgoing:
+            try:
+                sent = self.socket.send(self.outgoing)
+            except BlockingIOError:
+                break
+            del self.outgoing[:sent]
+
+        if self.closing and not self.outgoing:
+            self.close()
+        elif not self.closed:
+            events = selectors.EVENT_READ | selectors.EVENT_WRITE if self.outgoing else selectors.EVENT_READ
+            if self.selector.get_key(self.socket).events != events:
+                self.selector.modify(self.socket, events, self)
+
+    def close_when_sent(self):
+        """Close the connection once the kept data has been sent
+        """
+        self.closing = True
+        try:
+            self.flush()
+        except OSError:
+            self.close()
+
+    @property
+    def closed(self):
+        return self.socket.fileno() == -1
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self.selector.unregister(self.socket)
+        except (KeyError, ValueError):
+            pass
+        try:
+            self.socket.close()
+        except OSError:
+            pass
+
+
+class HostedGame(Game):
+    """Game played by clients already connected to a GameServer
+
+    Instead of blocking on the current player's socket, the game is handed
+    messages by the server as they arrive.
+    """
+    def __init__(self, name, board, area_ownership, connections, game_config, nicknames_order, random_stream):
+        """
+        Parameters
+        ----------
+        name : str
+            Name of the game
+        connections : list of ClientConnection
+            One connection per player, in the order of connecting
+        random_stream : RandomStream
+            Private random state of the game, entered while it is being created
+        """
+        self.name = name
+        self.connections = connections
+        self.random_stream = random_stream
+        self.finished = False
+        super().__init__(board, area_ownership, len(connections), game_config, None, None, nicknames_order)
+
+        self.player_connections = {}
+        for player_name, player in self.players.items():
+            for connection in self.connections:
+                if connection.socket is player.socket:
+                    connection.player_name = player_name
+                    self.player_connections[player_name] = connection
+
+    def create_socket(self):
+        self.socket = None
+
+    def connect_clients(self):
+        self.client_sockets = {}
+        for i, connection in enumerate(self.connections, start=1):
+            player = self.add_client(connection.socket, connection.address, i)
+            player.set_sender(connection.send)
+            self.register_client_desc(i, connection.hello)
+            connection.game = self
+
+    def report_summary(self):
+        sys.stdout.write('Game: {}\n{}\n'.format(self.name, self.summary))
+        sys.stdout.flush()
+
+    def close_connections(self):
+        self.logger.debug("Closing connections of game {}".format(self.name))
+        for connection in self.connections:
+            if connection.game is self:
+                connection.close_when_sent()
+
+    def release_connection(self, connection):
+        """Keep connection of a persistent client open for its next game
+        """
+        self.send_message(self.players[connection.player_name], 'next_game')
+        connection.reset()
+
+    def answer_state_requests(self):
+        """Send the game state to players asking for it out of turn
+
+        Such clients have missed 'delta' state updates and do not play on
+        until they get the state.
+        """
+        for player_name, connection in self.player_connections.items():
+            if player_name == self.current_player.get_name():
+                continue
+            while connection.messages and connection.messages[0].get('type') == 'get_state':
+                self.process_player_message(connection.messages.popleft(), self.players[player_name])
+
+    def process_pending_messages(self):
+        """Carry out the actions queued by the current player
+
+        Returns
+        -------
+        bool
+            True if the game has ended
+        """
+        with self.random_stream:
+            self.answer_state_requests()
+            while not self.finished:
+                connection = self.player_connections[self.current_player.get_name()]
+                if not connection.messages:
+                    break
+
+                msg = connection.messages.popleft()
+                self.logger.debug("Got message from client {}: {}".format(connection.player_name, msg))
+                self.process_player_message(msg, self.current_player)
+                if self.check_win_condition():
+                    self.report_summary()
+                    self.finished = True
+
+        return self.finished
+
+
+class GameServer:
+    """Server hosting many games at once on a single port
+
+    Clients name the game they want to join by 'game' in their hello, the
+    first client of a game may describe it by 'game_setup', a dictionary
+    with any of 'players', 'board', 'ownership', 'strength', 'fixed' and
+    'order'. What is not given is taken from the server's defaults. Clients
+    not naming any game are grouped into games in the order of connecting.
+    A game starts once all its players have connected.
+
+    Clients asking for 'persistent' in their hello are sent 'next_game'
+    instead of being disconnected when their game is over, they may then
+    join another game by sending a new hello.
+
+    All connections are watched by a single selector. Each game carries on
+    with its turn whenever its current player's message arrives, within its
+    own random stream, so a game plays out just like on a dedicated server
+    given the same seeds.
+    """
+    def __init__(self, addr, port, board_config, game_config, default_setup, board_library=None):
+        """
+        Parameters
+        ----------
+        addr : str
+            IP address of the server
+        port : int
+            Port number
+        board_config : configparser.SectionProxy
+            The [BOARD] section of the config
+        game_config : configparser.SectionProxy
+            The [GAME] section of the config
+        default_setup : dict
+            Setup of games not specifying otherwise
+        board_library : BoardLibrary
+            Pregenerated boards
+        """
+        self.buffer = 65535
+        self.logger = logging.getLogger('SERVER')
+
+        self.address = addr
+        self.port = port
+        self.board_config = board_config
+        self.game_config = game_config
+        self.default_setup = default_setup
+        self.board_library = board_library
+
+        self.lobbies = {}
+        self.unnamed_lobby = None
+        self.nb_unnamed_games = 0
+        self.nb_finished_games = 0
+
+        self.selector = selectors.DefaultSelector()
+        self.create_socket()
+
+    def create_socket(self):
+        try:
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            self.socket.bind((self.address, self.port))
+            self.socket.listen()
+            self.socket.setblocking(False)
+            self.selector.register(self.socket, selectors.EVENT_READ)
+            self.logger.debug("Server socket at {}:{}".format(self.address, self.port))
+        except OSError as e:
+            self.logger.error("Cannot create socket. {0}.".format(e))
+            exit(1)
+
+    def run(self, max_games=None):
+        """Serve games until interrupted
+
+        Parameters
+        ----------
+        max_games : int
+            Stop after this many games have finished
+        """
+        try:
+            while max_games is None or self.nb_finished_games < max_games:
+                for key, events in self.selector.select():
+                    if key.data is None:
+                        self.accept_client()
+                        continue
+                    if events & selectors.EVENT_WRITE:
+                        self.flush_client(key.data)
+                    if events & selectors.EVENT_READ:
+                        self.handle_client(key.data)
+        except KeyboardInterrupt:
+            self.logger.info("Server interrupted.")
+        finally:
+            self.selector.close()
+            self.socket.close()
+
+    def accept_client(self):
+        sock, client_address = self.socket.accept()
+        sock.setblocking(False)
+        self.logger.debug("Client connected from {}".format(client_address))
+        connection = ClientConnection(sock, client_address, self.buffer, self.selector)
+        self.selector.register(sock, selectors.EVENT_READ, connection)
+
+    def flush_client(self, connection):
+        """Send data kept for the client
+        """
+        if connection.closed:
+            return
+
+        try:
+            connection.flush()
+        except OSError as e:
+            self.logger.error("Failed to send to client {}: {}".format(connection.address, e))
+            self.drop_client(connection)
+
+    def handle_client(self, connection):
+        """Process data sent by the client
+        """
+        if connection.closed:
+            # closed along with its game earlier in this round of events
+            return
+
+        try:
+            alive = connection.receive()
+        except (ConnectionResetError, ValueError) as e:
+            self.logger.error("Failed to read from client {}: {}".format(connection.address, e))
+            alive = False
+
+        if not alive:
+            self.drop_client(connection)
+            return
+
+        if connection.game is not None:
+            self.advance_game(connection.game)
+        elif connection.hello is not None and connection.lobby is None:
+            self.join_lobby(connection)
+
+    def drop_client(self, connection):
+        connection.close()
+
+        game = connection.game
+        if game is not None:
+            if not game.finished:
+                self.logger.error("Client {} of game {} disconnected".format(connection.player_name, game.name))
+                self.end_game(game)
+            return
+
+        lobby = self.lobbies.get(connection.lobby)
+        if lobby is not None:
+            lobby['connections'].remove(connection)
+            if not lobby['connections']:
+                del self.lobbies[connection.lobby]
+
+    def join_lobby(self, connection):
+        """Add client to the game named in its hello, start the game once complete
+        """
+        hello = connection.hello
+        if hello.get('type') != 'client_desc':
+            self.logger.error("Client {} sent a wrong-type hello message '{}'".format(connection.address, hello))
+            self.drop_client(connection)
+            return
+
+        name = hello.get('game')
+        if name is None:
+            name = self.get_unnamed_lobby()
+
+        if name not in self.lobbies:
+            setup = dict(self.default_setup)
+            setup.update(hello.get('game_setup', {}))
+            self.lobbies[name] = {'setup': setup, 'connections': []}
+            self.logger.info("Game {} created with setup {}".format(name, setup))
+
+        lobby = self.lobbies[name]
+        lobby['connections'].append(connection)
+        connection.lobby = name
+        if len(lobby['connections']) == lobby['setup']['players']:
+            del self.lobbies[name]
+            self.start_game(name, lobby['setup'], lobby['connections'])
+
+    def get_unnamed_lobby(self):
+        if self.unnamed_lobby not in self.lobbies:
+            self.nb_unnamed_games += 1
+            self.unnamed_lobby = '#{}'.format(self.nb_unnamed_games)
+        return self.unnamed_lobby
+
+    def start_game(self, name, setup, connections):
+        """Create the board and let the game begin
+        """
+        random_stream = RandomStream(setup['board'])
+        try:
+            with random_stream:
+                board, area_ownership = setup_board(
+                    self.board_config, setup['players'], setup['board'], setup['ownership'], setup['strength'],
+                    self.board_library,
+                )
+
+                random.seed(setup['fixed'])
+                game = HostedGame(name, board, area_ownership, connections, self.game_config, setup['order'],
+                                  random_stream)
+                game.start()
+        except Exception as e:
+            self.logger.error("Failed to start game {}: {}".format(name, e), exc_info=True)
+            for connection in connections:
+                connection.close()
+            return
+
+        self.logger.info("Game {} started".format(name))
+        self.advance_game(game)
+
+    def advance_game(self, game):
+        """Carry on with the game, ending only it if anything goes wrong
+        """
+        if game.finished:
+            return
+
+        try:
+            finished = game.process_pending_messages()
+        except Exception as e:
+            self.logger.error("Game {} failed: {}".format(game.name, e), exc_info=True)
+            finished = True
+
+        if finished:
+            self.end_game(game)
+
+    def end_game(self, game):
+        completed = game.finished
+        game.finished = True
+        self.nb_finished_games += 1
+
+        for connection in game.connections:
+            if connection.closed:
+                continue
+            if completed and connection.persistent:
+                try:
+                    game.release_connection(connection)
+                    continue
+                except OSError as e:
+                    self.logger.error("Client {} of game {} is gone: {}".format(connection.player_name, game.name, e))
+                    connection.close()
+        game.close_connections()
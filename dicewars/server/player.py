@@ -1,5 +1,8 @@
 import logging
 import socket
+from collections import deque
+
+from dicewars.protocol import available_encodings, BareJSONDecoder, FrameDecoder, MessageReceiver
 
 
 class Player:
@@ -15,7 +18,11 @@ class Player:
         Attributes
         ----------
         areas : list of Area
-            Areas belonging to the player
+            Areas belonging to the player, grouped by regions
+        largest_region_size : int
+            Number of areas in the player's largest region
+        regions_outdated : bool
+            Indicates whether areas have changed since regions were last examined
         dice_reserve : int
             Number of dice in player's reserve
         client_addr : str
@@ -24,6 +31,17 @@ class Player:
             Client's port number
         socket : socket
             Client's socket
+        state_updates : str
+            How the client wants to be informed about changes of the state,
+            'full' for the whole state or 'delta' for the changes only
+        framing : str
+            How messages are delimited on the wire, 'nul' or 'length_prefixed'
+        encoding : str
+            Encoding of messages sent to the client in frames
+        receiver : MessageReceiver
+            Reader of messages from the client
+        sender : callable
+            Sends data to the client instead of the blocking socket, if set
         """
 
         self.name = name
@@ -31,9 +49,16 @@ class Player:
         self.logger = logging.getLogger('SERVER')
 
         self.areas = []
+        self.largest_region_size = 0
+        self.regions_outdated = False
         self.client_addr = None
         self.client_port = None
         self.socket = None
+        self.state_updates = 'full'
+        self.framing = 'nul'
+        self.encoding = 'json'
+        self.receiver = None
+        self.sender = None
         self.dice_reserve = 0
 
     def set_nickname(self, nick):
@@ -42,6 +67,54 @@ class Player:
     def get_nickname(self):
         return self.nickname
 
+    def set_state_updates(self, state_updates):
+        if state_updates not in ['full', 'delta']:
+            raise ValueError("Unsupported kind of state updates '{}'".format(state_updates))
+        self.state_updates = state_updates
+
+    def get_state_updates(self):
+        return self.state_updates
+
+    def set_framing(self, framing, encoding):
+        """Set how messages are exchanged with the client
+
+        Parameters
+        ----------
+        framing : str
+            'nul' or 'length_prefixed'
+        encoding : str
+            Encoding the client prefers, JSON is used if it is not available
+        """
+        if framing == 'nul':
+            pass
+        elif framing == 'length_prefixed':
+            if encoding not in available_encodings():
+                self.logger.warning("Encoding '{}' requested by client {} is not available, using JSON".format(
+                    encoding, self.name))
+                encoding = 'json'
+            self.encoding = encoding
+            self.receiver.set_decoder(FrameDecoder())
+        else:
+            raise ValueError("Unsupported framing '{}'".format(framing))
+        self.framing = framing
+
+    def get_wire_format(self):
+        """Get framing and encoding of messages sent to the client
+
+        Returns
+        -------
+        (str, str)
+        """
+        return self.framing, self.encoding
+
+    def get_receiver(self):
+        return self.receiver
+
+    def set_sender(self, sender):
+        """Send data to the client by `sender`, e.g. when the socket is non-blocking
+        """
+        self.sender = sender
+
     def add_area(self, area):
         """Add area to player's areas
         """
@@ -49,8 +122,9 @@ class Player:
             self.logger.warning("Area {0} already belonging to player {1}.".format(area.get_name(), self.name))
         else:
             self.areas.append(area)
+            self.regions_outdated = True
 
-    def assign_client(self, socket, client_addr):
+    def assign_client(self, socket, client_addr, buffer):
         """Assign client's socket, IP address, and port number
 
         Parameters
@@ -58,8 +132,12 @@ class Player:
         socket : socket
         client_addr : (str, int)
             IP address and port number
+        buffer : int
+            Size of socket buffer
         """
         self.socket = socket
+        # the hello is bare JSON, it may switch the framing later
+        self.receiver = MessageReceiver(socket, buffer, BareJSONDecoder())
         self.client_addr = client_addr[0]
         self.client_port = client_addr[1]
         self.logger.info("Assigning socket {0} with IP {1}:{2} to player {3}"\
@@ -78,6 +156,9 @@ class Player:
     def get_largest_region(self, board):
         """Get player's score
 
+        Regions are only examined again once the player's areas have changed,
+        otherwise the known size is returned.
+
         Parameters
         ----------
         board : Board
@@ -87,41 +168,45 @@ class Player:
         int
             Player's score
         """
+        if self.regions_outdated:
+            self.update_regions()
+        return self.largest_region_size
+
+    def update_regions(self):
+        """Find player's regions and the size of the largest one
+
+        Areas are reordered so that each region forms a continuous block,
+        listed in breadth-first order from its first area. Regions follow
+        the previous order of their first areas. This order determines how
+        dice get distributed at the end of turn.
+        """
         largest_region_size = 0
-        areas_to_test = self.areas
         player_areas = []
+        areas_seen = set()
 
-        if not areas_to_test:
-            return 0
+        for first_area in self.areas:
+            if first_area in areas_seen:
+                continue
 
-        areas_in_current_region = [areas_to_test[0]]
-
-        while areas_to_test:
-            areas_already_tested = []
+            areas_seen.add(first_area)
+            areas_in_current_region = deque([first_area])
+            current_region_size = 0
             while areas_in_current_region:
-                current_area = areas_in_current_region[0]
-                areas_in_current_region.remove(current_area)
-                areas_already_tested.append(current_area)
+                current_area = areas_in_current_region.popleft()
+                player_areas.append(current_area)
+                current_region_size += 1
 
                 for area in current_area.get_adjacent_areas():
-                    if (area not in areas_already_tested and
-                        area not in areas_in_current_region):
-                        if area.get_owner_name() == self.name:
-                            areas_in_current_region.append(area)
-
-            if len(areas_already_tested) > largest_region_size:
-                largest_region_size = len(areas_already_tested)
-
-            for area in areas_already_tested:
-                if area in areas_to_test:
-                    areas_to_test.remove(area)
-                    player_areas.append(area)
+                    if area not in areas_seen and area.get_owner_name() == self.name:
+                        areas_seen.add(area)
+                        areas_in_current_region.append(area)
 
-            if areas_to_test:
-                areas_in_current_region = [areas_to_test[0]]
+            if current_region_size > largest_region_size:
+                largest_region_size = current_region_size
 
         self.areas = player_areas
-        return largest_region_size
+        self.largest_region_size = largest_region_size
+        self.regions_outdated = False
 
     def get_name(self):
         """Return player's name
@@ -153,12 +238,20 @@ class Player:
                                 self.name))
         else:
             self.areas.remove(area)
+            self.regions_outdated = True
 
-    def send_message(self, msg):
-        """Send message msg to the Player's client
+    def send_message(self, data):
+        """Send serialized message to the Player's client
+
+        Parameters
+        ----------
+        data : bytes
         """
         try:
-            self.socket.sendall(msg.encode())
+            if self.sender is not None:
+                self.sender(data)
+            else:
+                self.socket.sendall(data)
         except socket.error as e:
             self.logger.error("Connection to client {0} broken".format(
                               self.name))
@@ -6,6 +6,7 @@ class GameSummary:
         self.winner = None
         self.nb_battles = 0
         self.eliminations = []
+        self.duration = None
 
     def set_winner(self, winner):
         if winner is None:
@@ -0,0 +1,31 @@
+"""Logging level and nickname helpers of the command line scripts
+
+Unlike utils, this module imports nothing but the standard library, so
+scripts/client.py can use it. Clients are started for every game of a
+tournament, so everything they import adds to the time each game takes.
+"""
+
+
+def get_logging_level(args):
+    """
+    Parse command-line arguments.
+    """
+    if args.debug.lower() == 'debug':
+        logging = 10
+    elif args.debug.lower() == 'info':
+        logging = 20
+    elif args.debug.lower() == 'error':
+        logging = 40
+    else:
+        logging = 30
+
+    return logging
+
+
+def get_nickname(ai_spec):
+    if ai_spec is not None:
+        nick = '{} (AI)'.format(ai_spec)
+    else:
+        nick = 'Human'
+
+    return nick
@@ -1,18 +1,24 @@
 #!/usr/bin/env python3
+import sys
+
+from dicewars.client.startup import StartupProfile
+
+# Measure everything the client imports, before the arguments are parsed
+STARTUP_PROFILE = StartupProfile()
+if '--startup-report' in sys.argv:
+    STARTUP_PROFILE.install()
+
 from argparse import ArgumentParser
 import logging
-from PyQt5.QtWidgets import QApplication
-import sys
 import random
 import configparser
+import json
 
 import importlib
 
-from dicewars.client.game.game import Game
-from dicewars.client import ui
-from dicewars.client.ai_driver import AIDriver
+from dicewars.protocol import FRAMINGS, ENCODINGS
 
-from utils import get_logging_level, get_nickname
+from cli import get_logging_level, get_nickname
 
 
 def get_ai_constructor(ai_specification):
@@ -21,6 +27,43 @@ def get_ai_constructor(ai_specification):
     return ai_module.AI
 
 
+def play_games(args, hello_msg, ai_constructor, ai_driver_config):
+    """Play one game after another over a single connection to the server
+
+    Games are described by lines of JSON on the standard input, each may
+    give the 'game' to join, its 'game_setup' and the 'seed' of the client.
+    A fresh AI is constructed for every game, modules it has imported stay
+    loaded.
+    """
+    from dicewars.client.game.game import Game
+    from dicewars.client.ai_driver import AIDriver
+
+    logger = logging.getLogger('CLIENT')
+    game = None
+    for line in sys.stdin:
+        description = json.loads(line)
+        random.seed(description.get('seed', args.seed))
+
+        game_hello_msg = dict(hello_msg, persistent=True)
+        for key in ['game', 'game_setup']:
+            if key in description:
+                game_hello_msg[key] = description[key]
+
+        game = Game(args.address, args.port, game_hello_msg, previous_game=game)
+        last_msg = AIDriver(game, ai_constructor, ai_driver_config).run()
+        if last_msg['type'] != 'game_end':
+            logger.error("The server aborted the game.")
+            exit(1)
+
+        msg = game.input_queue.get()
+        if msg['type'] != 'next_game':
+            logger.error("The server has not kept the connection for the next game.")
+            exit(1)
+
+    if game is not None:
+        game.socket.close()
+
+
 def main():
     """Client side of Dice Wars
     """
@@ -30,7 +73,25 @@ def main():
     parser.add_argument('-d', '--debug', help="Enable debug output", default='WARN')
     parser.add_argument('-s', '--seed', help="Random seed for a client", type=int)
     parser.add_argument('--ai', help="Ai version")
+    parser.add_argument('--state-updates', help="Receive the whole state or just its changes after every move",
+                        choices=['full', 'delta'], default='full')
+    parser.add_argument('--framing', help="Delimit messages by '\\0' or by a length prefix",
+                        choices=FRAMINGS, default='nul')
+    parser.add_argument('--encoding', help="Encoding of messages from the server, used with length-prefixed framing",
+                        choices=ENCODINGS, default='json')
+    parser.add_argument('--game', help="Name of the game to join on a server hosting multiple games")
+    parser.add_argument('--game-setup', type=json.loads,
+                        help="JSON describing the game when creating it on a server hosting multiple games")
+    parser.add_argument('--persistent', action='store_true',
+                        help="With --ai, play the games given by lines of JSON on stdin over one connection")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="Report durations of the startup phases and the slowest imports on stderr")
     args = parser.parse_args()
+    if args.persistent and not args.ai:
+        parser.error("--persistent requires --ai")
+
+    profile = STARTUP_PROFILE
+    profile.phase('standard imports and argument parsing')
 
     random.seed(args.seed)
 
@@ -38,8 +99,6 @@ def main():
     config.read('dicewars.config')
     ai_driver_config = config['AI_DRIVER']
 
-    ui.MAX_TRANSFERS_PER_TURN = ai_driver_config.getint('MaxTransfersPerTurn')
-
     log_level = get_logging_level(args)
 
     logging.basicConfig(level=log_level)
@@ -47,15 +106,50 @@ def main():
     hello_msg = {
         'type': 'client_desc',
         'nickname': get_nickname(args.ai),
+        'state_updates': args.state_updates,
+        'framing': args.framing,
+        'encoding': args.encoding,
     }
+    if args.game is not None:
+        hello_msg['game'] = args.game
+    if args.game_setup is not None:
+        hello_msg['game_setup'] = args.game_setup
+    # The GUI and the AI are imported only by the clients which use them
+    from dicewars.client.game.game import Game
+    profile.phase('client imports')
+
+    if args.persistent:
+        ai_constructor = get_ai_constructor(args.ai)
+        profile.phase('AI imports')
+        if args.startup_report:
+            profile.uninstall()
+            profile.report()
+        play_games(args, hello_msg, ai_constructor, ai_driver_config)
+        return
+
     game = Game(args.address, args.port, hello_msg)
+    profile.phase('joining the game')
 
     if args.ai:
-        ai = AIDriver(game, get_ai_constructor(args.ai), ai_driver_config)
+        from dicewars.client.ai_driver import AIDriver
+        ai_constructor = get_ai_constructor(args.ai)
+        profile.phase('AI imports')
+        ai = AIDriver(game, ai_constructor, ai_driver_config)
+        profile.phase('AI construction')
+        if args.startup_report:
+            profile.uninstall()
+            profile.report()
         ai.run()
     else:
+        from PyQt5.QtWidgets import QApplication
+        from dicewars.client import ui
+        ui.MAX_TRANSFERS_PER_TURN = ai_driver_config.getint('MaxTransfersPerTurn')
         app = QApplication(sys.argv)
         human_ui = ui.ClientUI(game)
+        profile.phase('GUI setup')
+        if args.startup_report:
+            profile.uninstall()
+            profile.report()
         sys.exit(app.exec_())
 
 
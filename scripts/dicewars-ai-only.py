@@ -4,7 +4,7 @@ from signal import signal, SIGCHLD
 from argparse import ArgumentParser
 
 from dicewars.server.summary import get_win_rates
-from utils import run_ai_only_game, ListStats, BoardDefinition
+from utils import run_ai_only_game, run_ai_only_game_headless, run_ai_only_games_parallel, ListStats, BoardDefinition
 
 
 parser = ArgumentParser(prog='Dice_Wars')
@@ -20,6 +20,11 @@ parser.add_argument('-l', '--logdir', help="Folder to store last running logs in
 parser.add_argument('-d', '--debug', action='store_true')
 parser.add_argument('--ai', help="Specify AI versions as a sequence of ints.", nargs='+')
 parser.add_argument('-r', '--report', help="State the game number on the stdout", action='store_true')
+parser.add_argument('--headless', help="Play the games within this process, without server and clients", action='store_true')
+parser.add_argument('--board-library', help="Take boards from this library when possible")
+parser.add_argument('-j', '--jobs', help="Number of games played at once, on consecutive ports", type=int, default=1)
+parser.add_argument('--persistent-clients', action='store_true',
+                    help="Keep the server and AI clients of every job running from one game to the next")
 
 procs = []
 
@@ -44,27 +49,84 @@ def main():
     """
     args = parser.parse_args()
 
-    signal(SIGCHLD, signal_handler)
-
     if len(args.ai) < 2 or len(args.ai) > 8:
         print("Unsupported number of AIs")
         exit(1)
 
+    if args.jobs > 1 or (args.persistent_clients and not args.headless):
+        summaries = play_in_parallel(args)
+    else:
+        signal(SIGCHLD, signal_handler)
+        summaries = play_sequentially(args)
+
+    win_numbers = get_win_rates(summaries, len(args.ai))
+    sys.stdout.write("Win counts {}\n".format(win_numbers))
+
+    nb_battles_stats = ListStats([s.nb_battles for s in summaries])
+    sys.stdout.write("Nb battles {}\n".format(nb_battles_stats))
+
+
+def board_definition(args, i):
+    board_seed = None if args.board is None else args.board + i
+    return BoardDefinition(board_seed, args.ownership, args.strength)
+
+
+def play_in_parallel(args):
+    games = [
+        {
+            'ais': args.ai,
+            'board_definition': board_definition(args, i),
+            'fixed': args.fixed,
+            'client_seed': args.client_seed,
+            'board_library': args.board_library,
+        }
+        for i in range(args.nb_games)
+    ]
+
+    summaries = []
+    try:
+        for i, game_summary in run_ai_only_games_parallel(
+                games, args.jobs, args.port, args.address,
+                logdir=args.logdir, debug=args.debug, headless=args.headless,
+                persistent=args.persistent_clients):
+            if args.report:
+                sys.stdout.write('\r{}'.format(i))
+            if game_summary is not None:
+                summaries.append(game_summary)
+    except KeyboardInterrupt:
+        pass
+    if args.report:
+        sys.stdout.write('\r')
+
+    return summaries
+
+
+def play_sequentially(args):
     summaries = []
     for i in range(args.nb_games):
         if args.report:
             sys.stdout.write('\r{}'.format(i))
         try:
-            board_seed = None if args.board is None else args.board + i
-            board_definition = BoardDefinition(board_seed, args.ownership, args.strength)
-            game_summary = run_ai_only_game(
-                args.port, args.address, procs, args.ai,
-                board_definition,
-                fixed=args.fixed,
-                client_seed=args.client_seed,
-                logdir=args.logdir,
-                debug=args.debug,
-            )
+            if args.headless:
+                game_summary = run_ai_only_game_headless(
+                    args.ai,
+                    board_definition(args, i),
+                    fixed=args.fixed,
+                    client_seed=args.client_seed,
+                    logdir=args.logdir,
+                    debug=args.debug,
+                    board_library=args.board_library,
+                )
+            else:
+                game_summary = run_ai_only_game(
+                    args.port, args.address, procs, args.ai,
+                    board_definition(args, i),
+                    fixed=args.fixed,
+                    client_seed=args.client_seed,
+                    logdir=args.logdir,
+                    debug=args.debug,
+                    board_library=args.board_library,
+                )
             summaries.append(game_summary)
         except KeyboardInterrupt:
             for p in procs:
@@ -76,11 +138,7 @@ def main():
     if args.report:
         sys.stdout.write('\r')
 
-    win_numbers = get_win_rates(summaries, len(args.ai))
-    sys.stdout.write("Win counts {}\n".format(win_numbers))
-
-    nb_battles_stats = ListStats([s.nb_battles for s in summaries])
-    sys.stdout.write("Nb battles {}\n".format(nb_battles_stats))
+    return summaries
 
 
 if __name__ == '__main__':
@@ -4,7 +4,9 @@ from argparse import ArgumentParser
 
 import math
 import itertools
-from utils import run_ai_only_game, get_nickname, BoardDefinition, SingleLineReporter, PlayerPerformance
+import os
+import time
+from utils import run_ai_only_game, run_ai_only_game_headless, run_ai_only_games_parallel, get_nickname, BoardDefinition, SingleLineReporter, PlayerPerformance
 from utils import TournamentCombatantsProvider, EvaluationCombatantsProvider
 from utils import column_t
 import random
@@ -12,6 +14,9 @@ import traceback
 import sys
 import pickle
 
+from dicewars.results import ResultsStore, is_results_store
+from dicewars.sequential import SPRT
+
 
 parser = ArgumentParser(prog='Dice_Wars')
 parser.add_argument('-p', '--port', help="Server port", type=int, default=5005)
@@ -22,10 +27,22 @@ parser.add_argument('-g', '--game-size', help="How many players should play a ga
 parser.add_argument('-s', '--seed', help="Seed sampling players for a game", type=int)
 parser.add_argument('-l', '--logdir', help="Folder to store last running logs in.")
 parser.add_argument('--ai-under-test', help="Only play this AI against others")
+parser.add_argument('--players', help="AIs taking part instead of the default selection", nargs='+')
 parser.add_argument('-d', '--debug', action='store_true')
 parser.add_argument('-r', '--report', help="State the game number on the stdout", action='store_true')
-parser.add_argument('--save', help="Where to put pickled GameSummaries")
-parser.add_argument('--load', help="Which GameSummaries to start from")
+parser.add_argument('--save', help="Results store to append the games to, as they finish")
+parser.add_argument('--load', help="Results store, or pickled GameSummaries, to start from")
+parser.add_argument('--headless', help="Play the games within this process, without server and clients", action='store_true')
+parser.add_argument('--board-library', help="Take boards from this library when possible")
+parser.add_argument('-j', '--jobs', help="Number of games played at once, on consecutive ports", type=int, default=1)
+parser.add_argument('--persistent-clients', action='store_true',
+                    help="Keep the server and AI clients of every job running from one game to the next")
+parser.add_argument('--sprt', action='store_true',
+                    help="Stop evaluating --ai-under-test as soon as a sequential test decides about its winrate")
+parser.add_argument('--baseline', type=float, help="Winrate the AI under test is compared to, 1 / game size by default")
+parser.add_argument('--margin', type=float, default=0.05, help="Winrates this close to the baseline may be decided either way")
+parser.add_argument('--alpha', type=float, default=0.05, help="Probability of wrongly deciding the AI is better")
+parser.add_argument('--beta', type=float, default=0.05, help="Probability of wrongly deciding the AI is worse")
 
 procs = []
 
@@ -59,8 +76,6 @@ PLAYING_AIs = [
 ]
 UNIVERSAL_SEED = 42
 
-players_info = {ai: {'games': []} for ai in PLAYING_AIs}
-
 
 def board_definitions(initial_board_seed):
     board_seed = initial_board_seed
@@ -88,34 +103,58 @@ def rotational_permunations_generator(players):
     return len(players), all_rotations(players)
 
 
-def main():
-    args = parser.parse_args()
-    if args.ai_under_test is not None:
-        combatants_provider = EvaluationCombatantsProvider(PLAYING_AIs, args.ai_under_test)
-    else:
-        combatants_provider = TournamentCombatantsProvider(PLAYING_AIs)
-    random.seed(args.seed)
+def scheduled_games(args, combatants_provider):
+    """Decide all games of the tournament in advance
 
-    signal(SIGCHLD, signal_handler)
+    Returns
+    -------
+    list of (str, list of str, BoardDefinition)
+        Description, AIs, and board of every game
+    """
+    games = []
+    boards_played = 0
+    for board_definition in board_definitions(args.board):
+        if boards_played == args.nb_boards:
+            break
+        boards_played += 1
 
-    if args.load:
-        with open(args.load, 'rb') as f:
-            all_games = pickle.load(f)
-    else:
-        all_games = []
+        combatants = combatants_provider.get_combatants(args.game_size)
+        nb_permutations, permutations_generator = rotational_permunations_generator(combatants)
+        for i, permuted_combatants in enumerate(permutations_generator):
+            description = '{} {}/{} {}'.format(boards_played, i+1, nb_permutations, ' vs. '.join(permuted_combatants))
+            games.append((description, permuted_combatants, board_definition))
 
-    boards_played = 0
-    reporter = SingleLineReporter(not args.report)
-    try:
-        for board_definition in board_definitions(args.board):
-            if boards_played == args.nb_boards:
-                break
-            boards_played += 1
+    return games
 
-            combatants = combatants_provider.get_combatants(args.game_size)
-            nb_permutations, permutations_generator = rotational_permunations_generator(combatants)
-            for i, permuted_combatants in enumerate(permutations_generator):
-                reporter.report('\r{} {}/{} {}'.format(boards_played, i+1, nb_permutations, ' vs. '.join(permuted_combatants)))
+
+def decided(sprt, args, game_summary):
+    """Score a game in the sequential test, if any, and tell whether it has decided
+    """
+    if sprt is None:
+        return False
+    return sprt.add_game(game_summary.winner == get_nickname(args.ai_under_test)) is not None
+
+
+def play_sequentially(args, games, results, reporter, sprt=None):
+    """Play the games one by one, return the number of games started
+    """
+    nb_started = 0
+    try:
+        for description, permuted_combatants, board_definition in games:
+            nb_started += 1
+            reporter.report('\r{}'.format(description))
+            start = time.perf_counter()
+            if args.headless:
+                game_summary = run_ai_only_game_headless(
+                    permuted_combatants,
+                    board_definition,
+                    fixed=UNIVERSAL_SEED,
+                    client_seed=UNIVERSAL_SEED,
+                    logdir=args.logdir,
+                    debug=args.debug,
+                    board_library=args.board_library,
+                )
+            else:
                 game_summary = run_ai_only_game(
                     args.port, args.address, procs, permuted_combatants,
                     board_definition,
@@ -123,26 +162,109 @@ def main():
                     client_seed=UNIVERSAL_SEED,
                     logdir=args.logdir,
                     debug=args.debug,
+                    board_library=args.board_library,
                 )
-                all_games.append(game_summary)
+            results.add_game(
+                game_summary, [get_nickname(ai) for ai in permuted_combatants],
+                time.perf_counter() - start, board_definition.board,
+            )
+            if decided(sprt, args, game_summary):
+                break
     except (Exception, KeyboardInterrupt) as e:
         sys.stderr.write("Breaking the tournament because of {}\n".format(traceback.format_exc()))
         for p in procs:
             p.kill()
+    return nb_started
+
+
+def play_in_parallel(args, games, results, reporter, sprt=None):
+    """Play the games by --jobs workers, return the number of games started
+    """
+    started = set()
+    game_arguments = [
+        {
+            'ais': permuted_combatants,
+            'board_definition': board_definition,
+            'fixed': UNIVERSAL_SEED,
+            'client_seed': UNIVERSAL_SEED,
+            'board_library': args.board_library,
+        }
+        for _, permuted_combatants, board_definition in games
+    ]
+
+    finished_games = run_ai_only_games_parallel(
+        game_arguments, args.jobs, args.port, args.address,
+        logdir=args.logdir, debug=args.debug, headless=args.headless,
+        persistent=args.persistent_clients, started=started,
+    )
+    try:
+        for i, game_summary in finished_games:
+            _, permuted_combatants, board_definition = games[i]
+            reporter.report('\r{}'.format(games[i][0]))
+            if game_summary is not None:
+                results.add_game(
+                    game_summary, [get_nickname(ai) for ai in permuted_combatants],
+                    game_summary.duration, board_definition.board,
+                )
+                if decided(sprt, args, game_summary):
+                    # kills the workers along with the games still being played
+                    finished_games.close()
+                    break
+    except (Exception, KeyboardInterrupt) as e:
+        sys.stderr.write("Breaking the tournament because of {}\n".format(traceback.format_exc()))
+    return len(started)
+
+
+def main():
+    args = parser.parse_args()
+    playing_ais = args.players if args.players else PLAYING_AIs
+    if args.ai_under_test is not None:
+        combatants_provider = EvaluationCombatantsProvider(playing_ais, args.ai_under_test)
+    else:
+        combatants_provider = TournamentCombatantsProvider(playing_ais)
+    random.seed(args.seed)
+
+    sprt = None
+    if args.sprt:
+        if args.ai_under_test is None:
+            parser.error('--sprt evaluates the --ai-under-test')
+        baseline = 1.0 / args.game_size if args.baseline is None else args.baseline
+        try:
+            sprt = SPRT(baseline, args.margin, args.alpha, args.beta)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.save and os.path.exists(args.save) and os.path.getsize(args.save) > 0 and not is_results_store(args.save):
+        parser.error("--save {0} is not a results store, e.g. it holds pickled games of an older version; "
+                     "continue into a new store by --load {0} --save <new file>".format(args.save))
+
+    results = ResultsStore(args.save) if args.save else ResultsStore()
+    if args.load:
+        if not is_results_store(args.load):
+            with open(args.load, 'rb') as f:
+                results.add_games(pickle.load(f))
+        elif args.save is None or not os.path.samefile(args.load, args.save):
+            results.extend(args.load)
+
+    games = scheduled_games(args, combatants_provider)
+
+    reporter = SingleLineReporter(not args.report)
+    if args.jobs > 1 or (args.persistent_clients and not args.headless):
+        nb_started = play_in_parallel(args, games, results, reporter, sprt)
+    else:
+        signal(SIGCHLD, signal_handler)
+        nb_started = play_sequentially(args, games, results, reporter, sprt)
 
     reporter.clean()
 
-    if args.save:
-        with open(args.save, 'wb') as f:
-            pickle.dump(all_games, f)
+    if sprt is not None:
+        print('{} {}, {} of {} games never started'.format(
+            args.ai_under_test, sprt, len(games) - nb_started, len(games)))
 
-    for game in all_games:
-        participants = game.participants()
-        for player in players_info:
-            if get_nickname(player) in participants:
-                players_info[player]['games'].append(game)
+    pair_stats = results.pair_stats()
+    results.close()
 
-    performances = [PlayerPerformance(player, info['games'], PLAYING_AIs) for player, info in players_info.items()]
+    performances = [PlayerPerformance(player, pair_stats, playing_ais) for player in playing_ais]
     performances.sort(key=lambda perf: perf.winrate, reverse=True)
 
     perf_strings = [performances[0].competitors_header()] + [str(perf) for perf in performances]
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+
+import argparse
+
+from dicewars.ai.xzahor04.inference import NUMPY_FILE, TORCH_FILE, export_weights
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export weights of the xzahor04 Q-network for evaluation without torch')
+    parser.add_argument('--model', help='state dict saved by torch', default=TORCH_FILE)
+    parser.add_argument('--output', help='NumPy weight file to write', default=NUMPY_FILE)
+    args = parser.parse_args()
+
+    export_weights(args.model, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+import argparse
+import importlib
+import time
+
+import numpy
+
+from dicewars.ai.dt.wpm import FEATURES, WEIGHTS_FILE, fit_weights, log_loss, write_weights
+from dicewars.selfplay import ShardReader
+
+
+def read_records(paths):
+    """Get scores, dice and outcomes of finished games by the number of players
+    """
+    columns = {}
+    for path in paths:
+        for shard in ShardReader([path] if path.endswith('.npz') else path):
+            finished = shard['winner'] >= 0
+            features = shard['features'][finished].astype(numpy.float64)
+            nb_players = features.shape[1] // 2
+            parts = columns.setdefault(nb_players, {'scores': [], 'dice': [], 'won': [], 'game': []})
+            parts['scores'].append(numpy.rint(numpy.expm1(features[:, 0::2])))
+            parts['dice'].append(numpy.rint(numpy.expm1(features[:, 1::2])))
+            parts['won'].append(shard['won'][finished])
+            parts['game'].append(shard['game'][finished])
+
+    return {
+        nb_players: {key: numpy.concatenate(values) for key, values in parts.items()}
+        for nb_players, parts in columns.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('data', nargs='+', help='folders with shards of scripts/generate-selfplay-data.py, or shards')
+    parser.add_argument('--agents', nargs='+', choices=sorted(FEATURES), default=sorted(FEATURES))
+    parser.add_argument('--l2', help='weight of the L2 penalty', type=float, default=1.0)
+    parser.add_argument('--held-out', help='fraction of games used for evaluation only', type=float, default=0.2)
+    parser.add_argument('--seed', help='seed for choosing the held out games', type=int, default=0)
+    parser.add_argument('--output', help='weight file to create or update', default=WEIGHTS_FILE)
+    parser.add_argument('--dry-run', help='only report the evaluation', action='store_true')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    records = read_records(args.data)
+    loaded = time.perf_counter()
+
+    rng = numpy.random.default_rng(args.seed)
+    held_out = {}
+    for nb_players, columns in records.items():
+        games = numpy.unique(columns['game'])
+        chosen = rng.choice(games, int(round(args.held_out * len(games))), replace=False)
+        held_out[nb_players] = numpy.isin(columns['game'], chosen)
+
+    weights, evaluation = fit_weights(
+        {n: c['scores'] for n, c in records.items()},
+        {n: c['dice'] for n, c in records.items()},
+        {n: c['won'] for n, c in records.items()},
+        args.agents, args.l2, held_out,
+    )
+    fitted = time.perf_counter()
+    print('{} records read in {:.2f} s, fitted in {:.2f} s'.format(
+        sum(len(c['won']) for c in records.values()), loaded - start, fitted - loaded
+    ))
+
+    print('{:>6} {:>7} {:>8} {:>8} | {:>8} {:>8} | {:>8} {:>8}'.format(
+        'agent', 'players', 'train', 'test', 'loss', 'accuracy', 'built-in', 'accuracy'
+    ))
+    for agent, nb_players in sorted(weights):
+        mask = held_out[nb_players]
+        line = '{:>6} {:>7} {:>8} {:>8}'.format(agent, nb_players, (~mask).sum(), mask.sum())
+        if (agent, nb_players) in evaluation:
+            built_in = importlib.import_module('dicewars.ai.dt.{}'.format(agent)).WEIGHTS[nb_players]
+            columns = records[nb_players]
+            features = FEATURES[agent](columns['scores'][mask], columns['dice'][mask])
+            line += ' | {:8.4f} {:8.4f} | {:8.4f} {:8.4f}'.format(
+                *evaluation[agent, nb_players], *log_loss(features, columns['won'][mask], built_in)
+            )
+        print(line)
+
+    if not args.dry_run:
+        write_weights(weights, args.output)
+        print('weights written to {}'.format(args.output))
+
+
+if __name__ == '__main__':
+    main()
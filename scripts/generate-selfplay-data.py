@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+import argparse
+import configparser
+import logging
+import sys
+
+from dicewars.selfplay import DEFAULT_RECORDS_PER_SHARD, ShardWriter, play_recorded_games
+from dicewars.server.board_library import BoardLibrary
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ai', help='AIs playing every game', nargs='+', required=True)
+    parser.add_argument('--output', help='folder to put the shards in', required=True)
+    parser.add_argument('-n', '--nb-games', help='number of games', type=int, default=1)
+    parser.add_argument('-g', '--first-game', help='number of the first game, seeding the boards and dice', type=int, default=0)
+    parser.add_argument('--prefix', help='prefix of shard names, distinct for every run into one folder', default='shard')
+    parser.add_argument('--records-per-shard', type=int, default=DEFAULT_RECORDS_PER_SHARD)
+    parser.add_argument('--board-library', help='take boards from this library when possible')
+    parser.add_argument('-r', '--report', help='state the game number on the stdout', action='store_true')
+    args = parser.parse_args()
+
+    if len(args.ai) < 2 or len(args.ai) > 8:
+        print("Unsupported number of AIs")
+        exit(1)
+
+    config = configparser.ConfigParser()
+    config.read('dicewars.config')
+    logging.getLogger().setLevel(logging.WARNING)
+    board_library = BoardLibrary(args.board_library) if args.board_library else None
+
+    with ShardWriter(args.output, args.prefix, args.records_per_shard) as writer:
+        for game in range(args.first_game, args.first_game + args.nb_games):
+            if args.report:
+                sys.stdout.write('\r{}'.format(game))
+                sys.stdout.flush()
+            play_recorded_games(args.ai, [game], config, writer, board_library)
+    if args.report:
+        sys.stdout.write('\r')
+
+    print('{} records in {} shards'.format(writer.nb_records, len(writer.paths)))
+
+
+if __name__ == '__main__':
+    main()
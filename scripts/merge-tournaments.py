@@ -1,24 +1,28 @@
 #!/usr/bin/env python3
 
 import argparse
-import numpy as np
 import pickle
 
+from dicewars.results import ResultsStore, is_results_store
+
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument('--output', required=True, help='where to put all the games')
-    parser.add_argument('games', nargs='*', help='where the games are stored')
+    parser.add_argument('--output', required=True, help='results store to append all the games to')
+    parser.add_argument('games', nargs='*', help='results stores, or pickled GameSummaries, where the games are stored')
     args = parser.parse_args()
 
-    all_games = []
+    results = ResultsStore(args.output)
 
     for fn in args.games:
-        with open(fn, 'rb') as f:
-            all_games.extend(pickle.load(f))
+        if is_results_store(fn):
+            results.extend(fn)
+        else:
+            with open(fn, 'rb') as f:
+                results.add_games(pickle.load(f))
 
-    with open(args.output, 'wb') as f:
-        pickle.dump(all_games, f)
+    print('{} games in {}'.format(len(results), args.output))
+    results.close()
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import argparse
+import configparser
+import os
+
+from dicewars.server.board_library import BoardLibrary, board_arrays, library_key, write_board_library
+from dicewars.server.board_setup import setup_board
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--library', required=True, help='board library to create or extend')
+    parser.add_argument('-b', '--board', help='seed of the first board', type=int, required=True)
+    parser.add_argument('-n', '--nb-boards', help='number of consecutive board seeds', type=int, default=1)
+    parser.add_argument('-o', '--ownership', help='seed for province assignment', type=int, required=True)
+    parser.add_argument('-s', '--strength', help='seed for dice assignment', type=int, required=True)
+    parser.add_argument('-g', '--game-sizes', help='numbers of players', type=int, nargs='+', required=True)
+    args = parser.parse_args()
+
+    config = configparser.ConfigParser()
+    config.read('dicewars.config')
+    board_config = config['BOARD']
+
+    entries = {}
+    if os.path.exists(args.library):
+        library = BoardLibrary(args.library)
+        for key in library.keys():
+            entries[key] = {name: array.copy() for name, array in library.get_arrays(key).items()}
+        library.close()
+
+    nb_new = 0
+    for board_seed in range(args.board, args.board + args.nb_boards):
+        for nb_players in args.game_sizes:
+            key = library_key(board_config, nb_players, board_seed, args.ownership, args.strength)
+            if key in entries:
+                continue
+            board, area_ownership = setup_board(board_config, nb_players, board_seed, args.ownership, args.strength)
+            entries[key] = board_arrays(board, area_ownership)
+            nb_new += 1
+
+    write_board_library(args.library, entries)
+    print('{} boards added, {} in total'.format(nb_new, len(entries)))
+
+
+if __name__ == '__main__':
+    main()
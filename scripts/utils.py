@@ -1,12 +1,26 @@
+import configparser
+import json
+import logging
+import multiprocessing
 import os
+import queue
+import signal
 import sys
-from subprocess import Popen
+from subprocess import PIPE, Popen
 import tempfile
+import time
+import traceback
+from collections import deque
 import numpy as np
 import random
 
+from dicewars.headless import run_headless_game
+from dicewars.server.board_library import BoardLibrary
+from dicewars.protocol import preferred_encoding
 from dicewars.server.summary import GameSummary
 
+from cli import get_logging_level, get_nickname  # re-exported for the scripts
+
 
 class BoardDefinition:
     def __init__(self, board, ownership, strength):
@@ -31,31 +45,6 @@ class BoardDefinition:
         return "board: {}, ownership: {}, strength: {}".format(self.board, self.ownership, self.strength)
 
 
-def get_logging_level(args):
-    """
-    Parse command-line arguments.
-    """
-    if args.debug.lower() == 'debug':
-        logging = 10
-    elif args.debug.lower() == 'info':
-        logging = 20
-    elif args.debug.lower() == 'error':
-        logging = 40
-    else:
-        logging = 30
-
-    return logging
-
-
-def get_nickname(ai_spec):
-    if ai_spec is not None:
-        nick = '{} (AI)'.format(ai_spec)
-    else:
-        nick = 'Human'
-
-    return nick
-
-
 def log_file_producer(logdir, process):
     if logdir is None:
         return open(os.devnull, 'w')
@@ -66,7 +55,7 @@ def log_file_producer(logdir, process):
 def run_ai_only_game(
         port, address, process_list, ais,
         board_definition=None, fixed=None, client_seed=None,
-        logdir=None, debug=False):
+        logdir=None, debug=False, board_library=None):
     logs = []
     process_list.clear()
 
@@ -84,6 +73,8 @@ def run_ai_only_game(
         server_cmd.extend(board_definition.to_args())
     if fixed is not None:
         server_cmd.extend(['-f', str(fixed)])
+    if board_library is not None:
+        server_cmd.extend(['--board-library', board_library])
     if debug:
         server_cmd.extend(['--debug', 'DEBUG'])
 
@@ -97,6 +88,8 @@ def run_ai_only_game(
             "-p", str(port),
             "-a", str(address),
             "--ai", str(ai_version),
+            "--framing", "length_prefixed",
+            "--encoding", preferred_encoding(),
         ]
         if client_seed is not None:
             client_cmd.extend(['-s', str(client_seed)])
@@ -118,6 +111,353 @@ def run_ai_only_game(
     return game_summary
 
 
+class PersistentGames:
+    """Games played one after another by persistent AI clients
+
+    Unlike run_ai_only_game(), a server hosting many games and a client of
+    every AI are started once and kept running, so the AIs are imported and
+    their models loaded once per process instead of once per game. Every
+    game is seeded just as by run_ai_only_game().
+    """
+    def __init__(self, port, address, process_list, logdir=None, debug=False, board_library=None):
+        """
+        Parameters
+        ----------
+        process_list : list of Popen
+            The server and clients are appended to it, once started
+        """
+        self.port = port
+        self.address = address
+        self.process_list = process_list
+        self.logdir = logdir
+        self.debug = debug
+
+        self.logs = []
+        self.clients = {}
+        self.nb_games = 0
+
+        server_cmd = [
+            "./scripts/server.py",
+            "--multi-game",
+            "-p", str(port),
+            "-a", str(address),
+        ]
+        if board_library is not None:
+            server_cmd.extend(['--board-library', board_library])
+        if debug:
+            server_cmd.extend(['--debug', 'DEBUG'])
+
+        self.logs.append(log_file_producer(logdir, 'server.txt'))
+        self.server = Popen(server_cmd, stdout=PIPE, stderr=self.logs[-1], text=True)
+        process_list.append(self.server)
+
+    def get_client(self, ai_version, seat):
+        """Get client of an AI, starting it if needed
+
+        Parameters
+        ----------
+        seat : int
+            Number of other players of the same AI coming before this one in
+            a game, each of them needs a client of its own
+        """
+        key = (ai_version, seat)
+        if key not in self.clients:
+            client_cmd = [
+                "./scripts/client.py",
+                "-p", str(self.port),
+                "-a", str(self.address),
+                "--ai", str(ai_version),
+                "--framing", "length_prefixed",
+                "--encoding", preferred_encoding(),
+                "--persistent",
+            ]
+            if self.debug:
+                client_cmd.extend(['--debug', 'DEBUG'])
+
+            self.logs.append(log_file_producer(self.logdir, 'client-{}-{}.log'.format(ai_version, seat)))
+            self.clients[key] = Popen(client_cmd, stdin=PIPE, stderr=self.logs[-1], text=True)
+            self.process_list.append(self.clients[key])
+        return self.clients[key]
+
+    def play(self, ais, board_definition=None, fixed=None, client_seed=None):
+        """Play a game, see run_ai_only_game()
+
+        Returns
+        -------
+        GameSummary
+        """
+        if board_definition is None:
+            board_definition = BoardDefinition(None, None, None)
+
+        self.nb_games += 1
+        name = 'game-{}'.format(self.nb_games)
+        setup = {
+            'players': len(ais),
+            'board': board_definition.board,
+            'ownership': board_definition.ownership,
+            'strength': board_definition.strength,
+            'fixed': fixed,
+            'order': [get_nickname(ai) for ai in ais],
+        }
+        description = json.dumps({'game': name, 'game_setup': setup, 'seed': client_seed})
+
+        for i, ai_version in enumerate(ais):
+            client = self.get_client(ai_version, ais[:i].count(ai_version))
+            client.stdin.write(description + '\n')
+            client.stdin.flush()
+
+        return self.read_summary(name)
+
+    def read_summary(self, name):
+        """Wait for the server to report the summary of a game
+        """
+        header = 'Game: {}\n'.format(name)
+        for line in self.server.stdout:
+            if line == header:
+                break
+        else:
+            raise RuntimeError("The server exited before game {} finished".format(name))
+
+        lines = []
+        for line in self.server.stdout:
+            if line == '\n':
+                break
+            lines.append(line)
+        return GameSummary.from_repr(''.join(lines))
+
+    def close(self):
+        """Let the clients disconnect and stop the server
+        """
+        for client in self.clients.values():
+            client.stdin.close()
+        for client in self.clients.values():
+            client.wait()
+        self.server.terminate()
+        self.server.wait()
+
+        for log in self.logs:
+            log.close()
+
+
+def headless_log_handler(logdir):
+    if logdir is None:
+        return logging.NullHandler()
+    else:
+        return logging.FileHandler('{}/headless.log'.format(logdir), mode='w')
+
+
+_board_libraries = {}
+
+
+def open_board_library(path):
+    """Open board library, once per process
+    """
+    if path not in _board_libraries:
+        _board_libraries[path] = BoardLibrary(path)
+    return _board_libraries[path]
+
+
+def run_ai_only_game_headless(
+        ais, board_definition=None, fixed=None, client_seed=None,
+        logdir=None, debug=False, board_library=None):
+    """Play the same game as run_ai_only_game() does, but within this process
+    """
+    if board_definition is None:
+        board_definition = BoardDefinition(None, None, None)
+
+    config = configparser.ConfigParser()
+    config.read('dicewars.config')
+
+    # the loggers of the server, clients and AIs all propagate to the root
+    root_logger = logging.getLogger()
+    root_level = root_logger.level
+    log_handler = headless_log_handler(logdir)
+    root_logger.addHandler(log_handler)
+    root_logger.setLevel(logging.DEBUG if debug else logging.WARNING)
+
+    try:
+        game_summary = run_headless_game(
+            ais, [get_nickname(ai) for ai in ais], config,
+            board_seed=board_definition.board,
+            ownership_seed=board_definition.ownership,
+            strength_seed=board_definition.strength,
+            fixed=fixed,
+            client_seed=client_seed,
+            board_library=open_board_library(board_library) if board_library else None,
+        )
+    finally:
+        root_logger.removeHandler(log_handler)
+        root_logger.setLevel(root_level)
+        log_handler.close()
+
+    return game_summary
+
+
+WORKER_POLL_INTERVAL = 1.0
+
+
+def _game_worker(job, tasks, results, port, address, logdir, debug, headless, persistent):
+    """Play games from `tasks` until a None arrives, put their summaries into `results`
+
+    The worker leads a process group of its own, containing the servers and
+    clients of its games, and kills them whenever one of them exits, just
+    like the scripts do when playing a single game at a time. With
+    `persistent`, the server and clients are kept for all games of the
+    worker, and started anew only after a game fails.
+    """
+    os.setpgrp()
+
+    procs = []
+
+    def kill_game(signum, frame):
+        for p in procs:
+            try:
+                p.kill()
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGCHLD, kill_game)
+
+    if logdir is not None:
+        logdir = '{}/job-{}'.format(logdir, job)
+        os.makedirs(logdir, exist_ok=True)
+
+    persistent_games = None
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        index, game = task
+        start = time.perf_counter()
+        try:
+            if headless:
+                game_summary = run_ai_only_game_headless(logdir=logdir, debug=debug, **game)
+            elif persistent:
+                board_library = game.pop('board_library', None)
+                if persistent_games is None:
+                    procs.clear()
+                    persistent_games = PersistentGames(port, address, procs, logdir, debug, board_library)
+                game_summary = persistent_games.play(**game)
+            else:
+                game_summary = run_ai_only_game(port, address, procs, logdir=logdir, debug=debug, **game)
+            game_summary.duration = time.perf_counter() - start
+            results.put((job, index, game_summary, None))
+        except Exception:
+            kill_game(None, None)
+            persistent_games = None
+            results.put((job, index, None, traceback.format_exc()))
+
+    if persistent_games is not None:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        persistent_games.close()
+
+
+def run_ai_only_games_parallel(games, nb_jobs, port, address, logdir=None, debug=False, headless=False,
+                               persistent=False, started=None):
+    """Play games in several worker processes at once
+
+    Worker `i` plays on port `port + i` and keeps its logs in `logdir/job-i`.
+    A worker is handed its next game only once it has reported the last
+    one, so the game of a worker which dies is always known. With
+    `persistent`, each worker plays its games by PersistentGames.
+
+    Parameters
+    ----------
+    games : list of dict
+        Keyword arguments of run_ai_only_game() for each game, i.e. `ais`,
+        `board_definition`, `fixed` and `client_seed`
+    nb_jobs : int
+        Number of games played at once
+    started : set
+        If given, indices of games are added to it as they are handed to
+        workers
+
+    Yields
+    ------
+    (int, GameSummary)
+        Index of the game in `games` and its summary, or None if the game
+        failed. Games are yielded in the order of `games`, no matter when
+        they finish. Games of workers which die, e.g. killed for lack of
+        memory, are reported as failed.
+    """
+    pending = deque(enumerate(games))
+    results = multiprocessing.Queue()
+    tasks = []
+    # index of the game handed to each worker and not reported yet
+    playing = [None] * nb_jobs
+
+    def hand_out(job):
+        if pending:
+            playing[job] = pending[0][0]
+            if started is not None:
+                started.add(playing[job])
+            tasks[job].put(pending.popleft())
+        else:
+            playing[job] = None
+            tasks[job].put(None)
+
+    workers = []
+    for job in range(nb_jobs):
+        tasks.append(multiprocessing.Queue())
+        worker = multiprocessing.Process(
+            target=_game_worker,
+            args=(job, tasks[job], results, port + job, address, logdir, debug, headless, persistent),
+            daemon=True,
+        )
+        worker.start()
+        workers.append(worker)
+        hand_out(job)
+
+    try:
+        finished = {}
+
+        def fail(index, error):
+            sys.stderr.write("Game {} failed: {}\n".format(index, error))
+            finished[index] = None
+
+        alive = set(range(nb_jobs))
+        dying = []
+        for next_index in range(len(games)):
+            while next_index not in finished:
+                try:
+                    job, index, game_summary, error = results.get(timeout=WORKER_POLL_INTERVAL)
+                except queue.Empty:
+                    # results sent by workers found dead at the last timeout have arrived by now
+                    for job in dying:
+                        if playing[job] is not None:
+                            fail(playing[job], "worker {} died with exit code {}".format(job, workers[job].exitcode))
+                            playing[job] = None
+                    if dying and not alive:
+                        while pending:
+                            fail(pending.popleft()[0], "no worker is left to play it")
+                    dying = [job for job in alive if not workers[job].is_alive()]
+                    alive.difference_update(dying)
+                    continue
+
+                if playing[job] != index:
+                    # already reported as failed
+                    continue
+                if error is not None:
+                    sys.stderr.write("Game {} failed: {}\n".format(index, error))
+                finished[index] = game_summary
+                if job in alive:
+                    hand_out(job)
+                else:
+                    playing[job] = None
+            yield next_index, finished.pop(next_index)
+    except BaseException:
+        for worker in workers:
+            try:
+                os.killpg(worker.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        raise
+    finally:
+        for worker in workers:
+            worker.join()
+
+
 class ListStats:
     def __init__(self, the_list):
         self.min = min(the_list)
@@ -150,10 +490,16 @@ class SingleLineReporter:
 
 
 class PlayerPerformance:
-    def __init__(self, name, games, players):
+    def __init__(self, name, pair_stats, players):
+        """
+        Parameters
+        ----------
+        pair_stats : dict of (str, str): (int, int)
+            Games and wins of players against each other by nicknames, see
+            ResultsStore.pair_stats()
+        """
         nickname = get_nickname(name)
-        self.nb_games = len(games)
-        self.nb_wins = sum(game.winner == nickname for game in games)
+        self.nb_games, self.nb_wins = pair_stats.get((nickname, nickname), (0, 0))
         self.players = players
         if self.nb_games > 0:
             self.winrate = self.nb_wins/self.nb_games
@@ -163,11 +509,11 @@ class PlayerPerformance:
 
         self.per_competitor_winrate = {}
         for competitor in self.players:
-            his_games = [game for game in games if get_nickname(competitor) in game.participants()]
-            if his_games:
-                self.per_competitor_winrate[competitor] = (sum(game.winner == nickname for game in his_games)/len(his_games), len(his_games))
+            nb_games, nb_wins = pair_stats.get((nickname, get_nickname(competitor)), (0, 0))
+            if nb_games:
+                self.per_competitor_winrate[competitor] = (nb_wins/nb_games, nb_games)
             else:
-                self.per_competitor_winrate[competitor] = (float('nan'), len(his_games))
+                self.per_competitor_winrate[competitor] = (float('nan'), nb_games)
 
     def __str__(self):
         per_competitor_str = ' '.join('{:.1f}/{}'.format(100.0*winrate[0], winrate[1]) for ai, winrate in self.per_competitor_winrate.items())
@@ -179,7 +525,7 @@ class PlayerPerformance:
 
 class TournamentCombatantsProvider:
     def __init__(self, players):
-        self.game_numbers = np.zeros((len(players), len(players)), dtype=np.int)
+        self.game_numbers = np.zeros((len(players), len(players)), dtype=int)
         self.players = players
 
     def get_combatants(self, nb_combatants):
@@ -210,7 +556,7 @@ class TournamentCombatantsProvider:
 
 class EvaluationCombatantsProvider:
     def __init__(self, players, ai_under_test):
-        self.game_numbers = np.zeros((len(players), len(players)), dtype=np.int)
+        self.game_numbers = np.zeros((len(players), len(players)), dtype=int)
         self.players = players
         self.put = ai_under_test
         assert(self.put in self.players)
@@ -221,7 +567,9 @@ class EvaluationCombatantsProvider:
         if self.game_numbers[pivot_ind][pivot_ind] == 0:
             rare_opponent_ind = (pivot_ind + 1) % len(self.players)
         else:
-            rare_opponent_ind = np.argmin(self.game_numbers[pivot_ind])
+            opponents_numbers = self.game_numbers[pivot_ind].copy()
+            opponents_numbers[pivot_ind] = opponents_numbers.max() + 1
+            rare_opponent_ind = np.argmin(opponents_numbers)
         assert(rare_opponent_ind != pivot_ind)
 
         possible_competitors = [self.players.index(ai) for ai in self.players if self.players.index(ai) not in [pivot_ind, rare_opponent_ind]]
@@ -5,17 +5,19 @@ import sys
 
 from dicewars.client.game.debugger_game import StaticGame
 from dicewars.client import debugger_ui
+from dicewars.event_log import is_event_log
+from dicewars.replay import ReplayIndex
 
 
 from dicewars.ai.kb.xlogin42.utils import attacker_advantage
 
 
 class DetailedAreaReporter:
-    def __init__(self, board):
-        self.board = board
+    def __init__(self, game):
+        self.game = game
 
     def __call__(self, area):
-        neighbours = [self.board.get_area(a) for a in area.get_adjacent_areas_names()]
+        neighbours = [self.game.board.get_area(a) for a in area.get_adjacent_areas_names()]
         enemy_neighbours = [a for a in neighbours if a.get_owner_name() != area.get_owner_name()]
         return '{}: {} -- {}\n'.format(
             area.get_name(),
@@ -26,13 +28,18 @@ class DetailedAreaReporter:
 
 def main():
     parser = argparse.ArgumentParser()
-    parser.add_argument('savegame')
+    parser.add_argument('savegame', help="state saved by save_state() or an event log of a game")
+    parser.add_argument('-e', '--event', type=int, default=0, help="with an event log, show the state before this event")
+    parser.add_argument('-p', '--player', type=int, help="with an event log, the player to take the point of view of")
     args = parser.parse_args()
 
-    with open(args.savegame, 'rb') as f:
-        game = StaticGame(f)
+    if is_event_log(args.savegame):
+        game = StaticGame.from_replay(ReplayIndex.open(args.savegame), args.event, args.player)
+    else:
+        with open(args.savegame, 'rb') as f:
+            game = StaticGame(f)
 
-    area_describer = DetailedAreaReporter(game.board)
+    area_describer = DetailedAreaReporter(game)
     debugger_ui.on_area_activation = area_describer
 
     app = QApplication(sys.argv)
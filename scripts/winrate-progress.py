@@ -5,6 +5,8 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pickle
 
+from dicewars.results import ResultsStore, is_results_store
+
 
 class PlayerRecord:
     def __init__(self):
@@ -33,25 +35,35 @@ class PlayerRecord:
         return 100.0 * self.nb_wins / self.nb_games
 
 
+def read_results(path):
+    """Iterate over winners and eliminated players of games
+    """
+    if is_results_store(path):
+        results = ResultsStore(path)
+        for _, winner, eliminated in results.results():
+            yield '#None' if winner is None else winner, eliminated
+        results.close()
+    else:
+        with open(path, 'rb') as f:
+            for game in pickle.load(f):
+                yield game.winner, [e[0] for e in game.eliminations]
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('--xmin', type=int, default=0, help='how many game shall be skipped in the graph')
     parser.add_argument('--noplot', action='store_true', help='do not plot, only report winrates')
-    parser.add_argument('games', help='where the games are stored')
+    parser.add_argument('games', help='results store, or pickled GameSummaries, where the games are stored')
     args = parser.parse_args()
 
-    with open(args.games, 'rb') as f:
-        games = pickle.load(f)
-
     players = {}
     nb_games_processed = 0
-    for game in games:
+    for winner, eliminated in read_results(args.games):
         nb_games_processed += 1
-        if game.winner not in players:
-            players[game.winner] = PlayerRecord()
-        players[game.winner].score_game(nb_games_processed, True)
+        if winner not in players:
+            players[winner] = PlayerRecord()
+        players[winner].score_game(nb_games_processed, True)
 
-        eliminated = [e[0] for e in game.eliminations]
         for loser in eliminated:
             if loser not in players:
                 players[loser] = PlayerRecord()
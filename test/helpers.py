@@ -0,0 +1,35 @@
+"""Helpers shared by tests reading the config or playing headless games
+"""
+import configparser
+import os
+
+from dicewars.headless import run_headless_game
+
+
+CONFIG_PATH = os.path.join(os.path.dirname(__file__), '..', 'dicewars.config')
+
+
+def read_config():
+    config = configparser.ConfigParser()
+    config.read(CONFIG_PATH)
+    return config
+
+
+def ai_nicknames(ais):
+    return ['{} (AI)'.format(ai) for ai in ais]
+
+
+def play_headless(ais, seed=None, **kwargs):
+    """Play a headless game with the default config
+
+    Parameters
+    ----------
+    ais : list of str
+    seed : int
+        Seed of everything not seeded by `kwargs`
+    kwargs
+        Further arguments of run_headless_game()
+    """
+    seeds = {name: seed for name in ['board_seed', 'ownership_seed', 'strength_seed', 'fixed', 'client_seed']}
+    seeds.update(kwargs)
+    return run_headless_game(ais, ai_nicknames(ais), read_config(), **seeds)
@@ -0,0 +1,56 @@
+import random
+import unittest
+
+from dicewars.ai.utils import BoardArrays, possible_attacks, probability_of_holding_area, probability_of_successful_attack
+from dicewars.client.game.board import Board
+
+
+def random_board(rng, width=6, height=5):
+    """Board of areas in a grid, with random owners and dice
+    """
+    def neighbours(x, y):
+        candidates = [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1), (x + 1, y + 1)]
+        return [cy * width + cx + 1 for cx, cy in candidates if 0 <= cx < width and 0 <= cy < height]
+
+    areas = {}
+    board = {}
+    for y in range(height):
+        for x in range(width):
+            name = str(y * width + x + 1)
+            areas[name] = {'owner': rng.randint(1, 3), 'dice': rng.randint(1, 8)}
+            board[name] = {'neighbours': [], 'hexes': [[x, y]]}
+    for y in range(height):
+        for x in range(width):
+            for n in neighbours(x, y):
+                board[str(y * width + x + 1)]['neighbours'].append(n)
+                board[str(n)]['neighbours'].append(y * width + x + 1)
+    return Board(areas, board)
+
+
+class BoardArraysTests(unittest.TestCase):
+    def test_matches_scalar_evaluation(self):
+        rng = random.Random(0)
+        for _ in range(20):
+            board = random_board(rng)
+            arrays = BoardArrays(board)
+            for player in (1, 2, 3):
+                analysis = arrays.analyse_attacks(player)
+                expected = list(possible_attacks(board, player))
+                self.assertEqual(
+                    list(zip(analysis.sources.tolist(), analysis.targets.tolist())),
+                    [(s.get_name(), t.get_name()) for s, t in expected],
+                )
+                for i, (source, target) in enumerate(expected):
+                    self.assertAlmostEqual(
+                        analysis.success[i],
+                        probability_of_successful_attack(board, source.get_name(), target.get_name()),
+                    )
+                    self.assertAlmostEqual(
+                        analysis.hold[i],
+                        probability_of_holding_area(board, target.get_name(), source.get_dice() - 1, player),
+                    )
+
+    def test_no_attacks(self):
+        board = random_board(random.Random(1))
+        analysis = BoardArrays(board).analyse_attacks(4)
+        self.assertEqual(len(analysis), 0)
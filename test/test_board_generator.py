@@ -0,0 +1,23 @@
+import hashlib
+import random
+import unittest
+
+from dicewars.server.generator import BoardGenerator
+
+
+class BoardGeneratorTests(unittest.TestCase):
+    def generate(self, seed):
+        random.seed(seed)
+        return BoardGenerator().generate_board(35)
+
+    def test_boards_of_known_seeds(self):
+        # digests of boards produced by the original dict-based generator
+        for seed, digest in [(0, 'e19754250706531695fa2e5cafa3d4f5'), (1337, 'd78a7161e7355e544d9bf09d06af0deb')]:
+            board = self.generate(seed)
+            self.assertEqual(hashlib.md5(repr(list(board.items())).encode()).hexdigest(), digest)
+
+    def test_adjacency_is_symmetric(self):
+        board = self.generate(7)
+        for name, area in board.items():
+            for neighbour in area['neighbours']:
+                self.assertIn(name, board[neighbour]['neighbours'])
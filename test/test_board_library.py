@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from dicewars.server.board_library import BoardLibrary, board_arrays, library_key, write_board_library
+from dicewars.server.board_setup import setup_board
+
+from helpers import read_config
+
+
+class BoardLibraryTests(unittest.TestCase):
+    def setUp(self):
+        self.board_config = read_config()['BOARD']
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'boards.lib')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_stored_board_is_set_up_identically(self):
+        board, ownership = setup_board(self.board_config, 3, 5, 6, 7)
+        key = library_key(self.board_config, 3, 5, 6, 7)
+        write_board_library(self.path, {key: board_arrays(board, ownership)})
+
+        library = BoardLibrary(self.path)
+        try:
+            stored_board, stored_ownership = setup_board(self.board_config, 3, 5, 6, 7, library)
+        finally:
+            library.close()
+
+        self.assertEqual(stored_board.get_board(), board.get_board())
+        self.assertEqual(list(stored_ownership.items()), list(ownership.items()))
+        self.assertEqual(
+            {name: area.get_dice() for name, area in stored_board.areas.items()},
+            {name: area.get_dice() for name, area in board.areas.items()},
+        )
+
+    def test_unseeded_boards_have_no_key(self):
+        self.assertIsNone(library_key(self.board_config, 2, None, 1, 1))
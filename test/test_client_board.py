@@ -0,0 +1,150 @@
+import copy
+import random
+import unittest
+
+from dicewars.client.game.board import Board
+
+
+def line_board(owners):
+    """Board of areas in a row, named from 1, with 2 dice each
+    """
+    nb_areas = len(owners)
+    areas = {str(name): {'owner': owner, 'dice': 2} for name, owner in enumerate(owners, start=1)}
+    board = {
+        str(name): {
+            'neighbours': [n for n in (name - 1, name + 1) if 1 <= n <= nb_areas],
+            'hexes': [[2 * name, 0]],
+        }
+        for name in range(1, nb_areas + 1)
+    }
+    return Board(areas, board)
+
+
+class BoardCopyTests(unittest.TestCase):
+    def setUp(self):
+        self.board = line_board([1, 1, 2, 2])
+
+    def test_copy_is_independent(self):
+        board_copy = self.board.copy()
+        board_copy.get_area(2).set_owner(2)
+        board_copy.get_area(2).dice -= 1
+
+        self.assertEqual(self.board.get_area(2).get_owner_name(), 1)
+        self.assertEqual(self.board.get_area(2).get_dice(), 2)
+        self.assertEqual([a.get_name() for a in board_copy.get_player_areas(2)], [2, 3, 4])
+
+    def test_copy_shares_static_data(self):
+        board_copy = self.board.copy()
+        self.assertIs(board_copy.get_area(1).hexes, self.board.get_area(1).hexes)
+        self.assertIs(board_copy.get_area(1).neighbours, self.board.get_area(1).neighbours)
+
+    def test_deepcopy_keeps_areas_of_the_board(self):
+        area = self.board.get_area(3)
+        board_copy, area_copy = copy.deepcopy((self.board, area))
+        self.assertIs(area_copy, board_copy.get_area(3))
+
+
+class BoardIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.board = line_board([1, 1, 2, 2, 1])
+
+    def names(self, areas):
+        return [area.get_name() for area in areas]
+
+    def check_against_scan(self, board):
+        for player in (1, 2, 3):
+            self.assertEqual(
+                self.names(board.get_player_areas(player)),
+                [a.get_name() for a in board.areas.values() if a.get_owner_name() == player],
+            )
+        for area in board.areas.values():
+            foreign = [n for n in area.neighbours if board.get_area(n).get_owner_name() != area.get_owner_name()]
+            self.assertEqual(board.is_at_border(area), bool(foreign))
+
+    def test_initial_indexes(self):
+        self.assertEqual(self.names(self.board.get_player_areas(1)), [1, 2, 5])
+        self.assertEqual(self.names(self.board.get_player_border(1)), [2, 5])
+        self.assertEqual(self.names(self.board.get_player_border(2)), [3, 4])
+        self.assertEqual(self.board.nb_players_alive(), 2)
+
+    def test_conquest_updates_indexes(self):
+        self.board.get_area(3).set_owner(1)
+        self.assertEqual(self.names(self.board.get_player_areas(1)), [1, 2, 3, 5])
+        self.assertEqual(self.names(self.board.get_player_border(1)), [3, 5])
+        self.check_against_scan(self.board)
+
+        self.board.get_area(4).set_owner(1)
+        self.assertEqual(self.board.get_player_border(1), [])
+        self.assertEqual(self.board.nb_players_alive(), 1)
+        self.check_against_scan(self.board)
+
+    def test_returned_lists_are_not_shared(self):
+        self.board.get_player_areas(1).clear()
+        self.assertEqual(self.names(self.board.get_player_areas(1)), [1, 2, 5])
+
+    def test_copy_keeps_own_indexes(self):
+        board_copy = self.board.copy()
+        board_copy.get_area(1).set_owner(3)
+        self.check_against_scan(board_copy)
+        self.check_against_scan(self.board)
+        self.assertEqual(self.names(self.board.get_player_border(1)), [2, 5])
+
+
+def grid_board(owners, width):
+    """Board of areas in a grid, each adjacent to areas above, below, and to the sides
+    """
+    def neighbours(i):
+        x, y = i % width, i // width
+        candidates = [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]
+        return [cy * width + cx + 1 for cx, cy in candidates if 0 <= cx < width and 0 <= cy < len(owners) // width]
+
+    areas = {str(i + 1): {'owner': owner, 'dice': 2} for i, owner in enumerate(owners)}
+    board = {str(i + 1): {'neighbours': neighbours(i), 'hexes': [[i, 0]]} for i in range(len(owners))}
+    return Board(areas, board)
+
+
+def flood_fill_largest(board, player_name, owned):
+    largest = 0
+    remaining = set(owned)
+    while remaining:
+        to_test = [remaining.pop()]
+        size = 1
+        while to_test:
+            for n in board.get_area(to_test.pop()).neighbours:
+                if n in remaining:
+                    remaining.remove(n)
+                    to_test.append(n)
+                    size += 1
+        largest = max(largest, size)
+    return largest
+
+
+class RegionsTests(unittest.TestCase):
+    def test_regions_in_board_order(self):
+        board = line_board([1, 2, 1, 1, 2, 1])
+        self.assertEqual(board.get_players_regions(1), [[1], [3, 4], [6]])
+        self.assertEqual(board.get_players_regions(1, skip_area=3), [[1], [4], [6]])
+        self.assertEqual(board.get_players_regions(3), [[]])
+        self.assertEqual(board.get_regions(1).get_largest_regions(), [[3, 4]])
+
+    def test_what_if_queries_match_flood_fill(self):
+        rng = random.Random(0)
+        for _ in range(50):
+            board = grid_board([rng.choice([1, 2]) for _ in range(30)], 6)
+            owned = {a.name for a in board.get_player_areas(1)}
+            regions = board.get_regions(1)
+            self.assertEqual(regions.largest_size, flood_fill_largest(board, 1, owned))
+            for name in range(1, 31):
+                if name in owned:
+                    expected = flood_fill_largest(board, 1, owned - {name})
+                    self.assertEqual(regions.get_size_without(name), expected)
+                else:
+                    expected = flood_fill_largest(board, 1, owned | {name})
+                    self.assertEqual(regions.get_size_with(name), expected)
+
+    def test_regions_follow_owner_changes(self):
+        board = line_board([1, 1, 2, 1, 1])
+        self.assertEqual(board.get_largest_region_size(1), 2)
+        board.get_area(3).set_owner(1)
+        self.assertEqual(board.get_largest_region_size(1), 5)
+        self.assertEqual(board.get_largest_region_size(2), 0)
@@ -0,0 +1,108 @@
+import json
+import unittest
+
+from dicewars.headless import HeadlessClientGame
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, data):
+        self.sent.append(json.loads(data.decode()))
+        return len(data)
+
+
+def game_start_msg():
+    return {
+        'type': 'game_start',
+        'player': 1,
+        'no_players': 2,
+        'current_player': 1,
+        'order': [1, 2],
+        'version': 0,
+        'areas': {
+            '1': {'adjacent_areas': [2], 'owner': 1, 'dice': 3},
+            '2': {'adjacent_areas': [1, 3], 'owner': 2, 'dice': 1},
+            '3': {'adjacent_areas': [2], 'owner': 2, 'dice': 2},
+        },
+        'board': {
+            '1': {'neighbours': [2], 'hexes': [[0, 0]]},
+            '2': {'neighbours': [1, 3], 'hexes': [[2, 0]]},
+            '3': {'neighbours': [2], 'hexes': [[4, 0]]},
+        },
+        'score': {'1': 1, '2': 2},
+    }
+
+
+class DeltaStateUpdatesTests(unittest.TestCase):
+    def setUp(self):
+        self.connection = RecordingConnection()
+        self.game = HeadlessClientGame(self.connection, game_start_msg())
+
+    def test_battle_delta(self):
+        self.game.process_battle_msg({
+            'type': 'battle',
+            'version': 1,
+            'areas': {'1': {'owner': 1, 'dice': 1}, '2': {'owner': 1, 'dice': 2}},
+            'score': {'1': 2, '2': 1},
+            'reserves': {'1': 0, '2': 0},
+            'result': {},
+        })
+
+        self.assertEqual(self.game.board.get_area(2).get_owner_name(), 1)
+        self.assertEqual(self.game.board.get_area(2).get_dice(), 2)
+        self.assertEqual(self.game.board.get_area(1).get_dice(), 1)
+        self.assertEqual(self.game.players[1].get_score(), 2)
+        self.assertEqual(self.game.players[2].get_score(), 1)
+        self.assertEqual(self.connection.sent, [])
+
+    def test_end_turn_delta(self):
+        self.game.process_end_turn_msg({
+            'type': 'end_turn',
+            'version': 1,
+            'areas': {'1': {'owner': 1, 'dice': 5}},
+            'score': {'1': 1},
+            'reserves': {'1': 3},
+            'current_player': 2,
+        })
+
+        self.assertEqual(self.game.board.get_area(1).get_dice(), 5)
+        self.assertEqual(self.game.players[1].get_reserve(), 3)
+        self.assertEqual(self.game.current_player.get_name(), 2)
+
+    def test_missed_update_requests_full_state(self):
+        self.game.process_transfer_msg({
+            'type': 'transfer',
+            'version': 2,
+            'areas': {},
+            'score': {},
+            'reserves': {},
+            'result': {},
+        })
+        self.assertEqual(self.connection.sent, [{'type': 'get_state'}])
+        self.assertTrue(self.game.awaiting_state)
+
+        self.game.process_end_turn_msg({
+            'type': 'end_turn',
+            'version': 3,
+            'areas': {'1': {'owner': 1, 'dice': 5}},
+            'score': {'1': 1},
+            'reserves': {'1': 3},
+            'current_player': 2,
+        })
+        self.assertEqual(self.game.board.get_area(1).get_dice(), 3)
+        self.assertEqual(self.game.current_player.get_name(), 2)
+        self.assertEqual(self.connection.sent, [{'type': 'get_state'}])
+
+        self.game.process_game_state_msg({
+            'type': 'game_state',
+            'version': 3,
+            'areas': {'1': {'owner': 1, 'dice': 5}},
+            'score': {'1': 1, '2': 2},
+            'reserves': {'1': 3, '2': 0},
+            'current_player': 2,
+        })
+        self.assertFalse(self.game.awaiting_state)
+        self.assertEqual(self.game.state_version, 3)
+        self.assertEqual(self.game.board.get_area(1).get_dice(), 5)
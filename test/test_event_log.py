@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from dicewars.event_log import BATTLE_LOST, BATTLE_WON, GAME_END, EventLog
+from dicewars.headless import HeadlessGame
+
+from helpers import play_headless
+
+
+class EventLogTests(unittest.TestCase):
+    def test_replay_reaches_final_state(self):
+        games = []
+
+        def game_class(*args):
+            games.append(HeadlessGame(*args))
+            return games[-1]
+
+        ais = ['dt.sdc', 'dt.rand', 'kb.xlogin00']
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'game.log')
+            summary = play_headless(
+                ais, board_seed=3, ownership_seed=4, strength_seed=5, fixed=6, client_seed=7,
+                game_class=game_class, event_log=path,
+            )
+
+            log = EventLog.open(path)
+            state, _, nb_events = log.replay()
+            events = [event for _, event in log.events()]
+            log.close()
+
+        game = games[0]
+        self.assertEqual(nb_events, len(events))
+        self.assertEqual(events[-1][0], GAME_END)
+        self.assertEqual(sum(event[0] in (BATTLE_WON, BATTLE_LOST) for event in events), summary.nb_battles)
+        self.assertEqual(log.header['seeds']['fixed'], 6)
+        self.assertEqual(game.players[state.winner].get_nickname(), summary.winner)
+        for name, area in game.board.areas.items():
+            self.assertEqual((state.owner[name], state.dice[name]), (area.get_owner_name(), area.get_dice()))
+        self.assertEqual(state.reserves, {name: player.get_reserve() for name, player in game.players.items()})
@@ -1,6 +1,6 @@
 import unittest
 
-from dicewars.server.game.summary import GameSummary
+from dicewars.server.summary import GameSummary
 
 
 class GameSummaryTests(unittest.TestCase):
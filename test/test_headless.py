@@ -0,0 +1,15 @@
+import unittest
+
+from helpers import play_headless as play
+
+
+class HeadlessGameTests(unittest.TestCase):
+    def test_game_finishes(self):
+        summary = play(['dt.sdc', 'dt.rand'], 1)
+        self.assertEqual(sorted(summary.participants()), ['dt.rand (AI)', 'dt.sdc (AI)'])
+        self.assertGreater(summary.nb_battles, 0)
+
+    def test_seeds_reproduce_game(self):
+        first = play(['dt.sdc', 'dt.rand', 'kb.xlogin00'], 7)
+        second = play(['dt.sdc', 'dt.rand', 'kb.xlogin00'], 7)
+        self.assertEqual(repr(first), repr(second))
@@ -0,0 +1,69 @@
+import json
+import selectors
+import socket
+import unittest
+
+from dicewars.protocol import encode_message
+from dicewars.server.multi_game import ClientConnection
+
+
+class ClientConnectionTests(unittest.TestCase):
+    def setUp(self):
+        self.server_end, self.client_end = socket.socketpair()
+        self.server_end.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.connection = ClientConnection(self.server_end, ('local', 0), 65535, self.selector)
+        self.selector.register(self.server_end, selectors.EVENT_READ, self.connection)
+
+    def tearDown(self):
+        self.connection.close()
+        self.client_end.close()
+        self.selector.close()
+
+    def test_sending_does_not_block(self):
+        data = b'x' * 1024
+        while not self.connection.outgoing:
+            self.connection.send(data)
+        self.assertEqual(self.selector.get_key(self.server_end).events, selectors.EVENT_READ | selectors.EVENT_WRITE)
+
+        self.connection.close_when_sent()
+        self.client_end.setblocking(False)
+        while not self.connection.closed:
+            try:
+                while self.client_end.recv(65535):
+                    pass
+            except BlockingIOError:
+                pass
+            self.connection.flush()
+        self.assertEqual(self.connection.outgoing, bytearray())
+
+    def test_framing_switches_after_hello(self):
+        hello = {'type': 'client_desc', 'nickname': 'a', 'game': 'g', 'framing': 'length_prefixed'}
+        end_turn = {'type': 'end_turn'}
+        self.client_end.sendall(json.dumps(hello).encode() + encode_message(end_turn, 'length_prefixed', 'json'))
+
+        self.assertTrue(self.connection.receive())
+        self.assertEqual(self.connection.hello, hello)
+        self.assertEqual(list(self.connection.messages), [end_turn])
+
+    def test_closed_connection(self):
+        self.client_end.close()
+        self.assertFalse(self.connection.receive())
+
+    def test_persistent_client_says_hello_again(self):
+        hello = {'type': 'client_desc', 'nickname': 'a', 'framing': 'length_prefixed', 'persistent': True}
+        self.client_end.sendall(json.dumps(hello).encode())
+        self.assertTrue(self.connection.receive())
+        self.assertTrue(self.connection.persistent)
+
+        self.connection.reset()
+        next_hello = dict(hello, game='g2')
+        late_end_turn = {'type': 'end_turn'}
+        self.client_end.sendall(
+            encode_message(late_end_turn, 'length_prefixed', 'json')
+            + encode_message(next_hello, 'length_prefixed', 'json')
+        )
+
+        self.assertTrue(self.connection.receive())
+        self.assertEqual(self.connection.hello, next_hello)
+        self.assertEqual(list(self.connection.messages), [])
@@ -0,0 +1,53 @@
+import itertools
+import unittest
+from fractions import Fraction
+
+import numpy
+
+from dicewars.ai.probabilities import BattleTable, DEFAULT_MAX_DICE, attack_success_probability, battle_table
+
+
+def enumerated_success(atk, df, sides):
+    wins = 0
+    total = 0
+    for roll in itertools.product(range(1, sides + 1), repeat=atk + df):
+        wins += sum(roll[:atk]) > sum(roll[atk:])
+        total += 1
+    return wins / total
+
+
+class BattleTableTests(unittest.TestCase):
+    def test_matches_enumeration(self):
+        table = BattleTable(3, sides=4)
+        for atk in range(1, 4):
+            for df in range(1, 4):
+                self.assertAlmostEqual(table.success_probability(atk, df), enumerated_success(atk, df, 4))
+
+    def test_matches_published_values(self):
+        self.assertEqual(round(attack_success_probability(2, 1), 8), 0.83796296)
+        self.assertEqual(round(attack_success_probability(8, 8), 8), 0.47109073)
+        self.assertEqual(round(attack_success_probability(4, 6), 8), 0.08342284)
+
+    def test_default_table_correctly_rounded(self):
+        # AIs compare these probabilities, the slightest error changes games played with fixed seeds
+        sums = [{0: 1}]
+        for _ in range(DEFAULT_MAX_DICE):
+            sums.append({})
+            for s, count in sums[-2].items():
+                for face in range(1, 7):
+                    sums[-1][s + face] = sums[-1].get(s + face, 0) + count
+
+        for atk, df in itertools.product(range(1, DEFAULT_MAX_DICE + 1), repeat=2):
+            wins = sum(a_count * d_count for a, a_count in sums[atk].items() for d, d_count in sums[df].items() if a > d)
+            self.assertEqual(attack_success_probability(atk, df), float(Fraction(wins, 6 ** (atk + df))))
+
+    def test_vectorized_lookup(self):
+        table = battle_table()
+        atk = numpy.array([2, 5, 8])
+        df = numpy.array([8, 3, 1])
+        expected = [table.success_probability(a, d) for a, d in zip(atk, df)]
+        numpy.testing.assert_allclose(table.success_probabilities(atk, df), expected)
+
+    def test_more_dice_than_default(self):
+        self.assertAlmostEqual(attack_success_probability(12, 12), battle_table(12).success_probability(12, 12))
+        self.assertGreater(attack_success_probability(12, 8), attack_success_probability(8, 8))
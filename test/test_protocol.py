@@ -0,0 +1,64 @@
+import json
+import socket
+import unittest
+
+from dicewars.protocol import (
+    encode_message, BareJSONDecoder, FrameDecoder, MessageReceiver, NulDelimitedDecoder, available_encodings,
+)
+
+
+MSGS = [
+    {'type': 'battle', 'version': 3, 'areas': {'1': {'owner': 2, 'dice': 1}}, 'score': {'2': 7}},
+    {'type': 'end_turn', 'areas': {}, 'score': {}, 'reserves': {'1': 0}, 'current_player': 2},
+]
+
+
+class FrameDecoderTests(unittest.TestCase):
+    def check_roundtrip(self, data, decoder):
+        received = []
+        for i in range(0, len(data), 3):
+            received.extend(decoder.feed(data[i:i+3]))
+        self.assertEqual(received, MSGS)
+
+    def test_json_frames_split_and_coalesced(self):
+        data = b''.join(encode_message(msg, 'length_prefixed', 'json') for msg in MSGS)
+        self.check_roundtrip(data, FrameDecoder())
+        self.assertEqual(FrameDecoder().feed(data), MSGS)
+
+    @unittest.skipUnless('msgpack' in available_encodings(), "msgpack not installed")
+    def test_msgpack_frames_keep_string_keys(self):
+        msg = {'type': 'game_state', 'score': {1: 4, 2: 3}}
+        data = encode_message(msg, 'length_prefixed', 'msgpack')
+        self.assertEqual(FrameDecoder().feed(data), [{'type': 'game_state', 'score': {'1': 4, '2': 3}}])
+
+    def test_nul_delimited(self):
+        data = b''.join(encode_message(msg) for msg in MSGS)
+        self.check_roundtrip(data, NulDelimitedDecoder())
+
+    def test_bare_json(self):
+        data = b''.join(json.dumps(msg).encode() for msg in MSGS)
+        self.check_roundtrip(data, BareJSONDecoder())
+
+
+class MessageReceiverTests(unittest.TestCase):
+    def setUp(self):
+        self.server_end, self.client_end = socket.socketpair()
+
+    def tearDown(self):
+        self.server_end.close()
+        self.client_end.close()
+
+    def test_bare_json_sent_together(self):
+        receiver = MessageReceiver(self.server_end, 65535, BareJSONDecoder())
+        self.client_end.sendall(b''.join(json.dumps(msg).encode() for msg in MSGS))
+        self.assertEqual([receiver.read_message(), receiver.read_message()], MSGS)
+
+    def test_framing_switched_after_hello(self):
+        receiver = MessageReceiver(self.server_end, 65535, BareJSONDecoder())
+        hello = {'type': 'client_desc', 'framing': 'length_prefixed'}
+        self.client_end.sendall(json.dumps(hello).encode() + encode_message(MSGS[0], 'length_prefixed', 'json'))
+        self.assertEqual(receiver.read_message(), hello)
+
+        receiver.set_decoder(FrameDecoder())
+        self.client_end.sendall(encode_message(MSGS[1], 'length_prefixed', 'json'))
+        self.assertEqual([receiver.read_message(), receiver.read_message()], MSGS)
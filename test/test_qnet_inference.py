@@ -0,0 +1,23 @@
+import unittest
+
+import numpy as np
+
+from dicewars.ai.xzahor04.inference import NumpyQNet, read_torch_state_dict
+
+
+class NumpyQNetTests(unittest.TestCase):
+    def test_exported_weights_match_torch_file(self):
+        weights = read_torch_state_dict()
+        self.assertEqual(weights['linear1.weight'].shape, (256, 7))
+        self.assertEqual(weights['linear2.bias'].shape, (2,))
+
+        model = NumpyQNet.load()
+        np.testing.assert_array_equal(model.w1, weights['linear1.weight'].T)
+        np.testing.assert_array_equal(model.b2, weights['linear2.bias'])
+
+    def test_batch_equals_single_states(self):
+        model = NumpyQNet.load()
+        states = np.random.RandomState(0).randint(0, 9, size=(20, 7))
+        batched = model.get_actions(states)
+        self.assertEqual(batched, [model.get_actions([state])[0] for state in states])
+        self.assertTrue(all(sum(action) == 1 for action in batched))
@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+from dicewars.client.game.debugger_game import StaticGame
+from dicewars.event_log import EventLog
+from dicewars.replay import INDEX_SUFFIX, ReplayIndex, iter_replays
+
+from helpers import play_headless
+
+
+class ReplayIndexTests(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'game.log')
+        play_headless(
+            ['dt.sdc', 'dt.rand'], board_seed=1, ownership_seed=2, strength_seed=3, fixed=4, client_seed=5, event_log=self.path,
+        )
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_seek_matches_sequential_replay(self):
+        index = ReplayIndex.open(self.path, interval=8)
+        self.assertTrue(os.path.exists(self.path + INDEX_SUFFIX))
+        with open(self.path, 'rb') as f:
+            log = EventLog(f.read())
+
+        for event, state in index.states():
+            expected, _, _ = log.replay(nb_events=event)
+            self.assertEqual(vars(state), vars(expected))
+            self.assertEqual(vars(index.state_before(event)), vars(expected))
+        self.assertIsNotNone(state.winner)
+        index.close()
+
+        [(path, reopened)] = list(iter_replays([self.path]))
+        self.assertEqual((reopened.interval, reopened.nb_events), (8, index.nb_events))
+
+    def test_static_game_from_replay(self):
+        index = ReplayIndex.open(self.path)
+        game = StaticGame.from_replay(index, 10)
+        state = index.state_before(10)
+        self.assertEqual(game.current_player.get_name(), state.current_player)
+        for name in index.log.header['areas']:
+            area = game.board.get_area(name)
+            self.assertEqual((area.get_owner_name(), area.get_dice()), (state.owner[name], state.dice[name]))
+
+        game.seek(index.nb_events)
+        winner = index.state_before(index.nb_events).winner
+        self.assertEqual(len(game.board.get_player_areas(winner)), len(index.log.header['areas']))
+        index.close()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+
+from dicewars.results import ResultsStore, is_results_store
+from dicewars.server.summary import GameSummary
+
+
+def summary(winner, *eliminations):
+    game = GameSummary()
+    game.set_winner(winner)
+    for nickname, battles in eliminations:
+        game.nb_battles = battles
+        game.add_elimination(nickname, battles)
+    game.nb_battles += 1
+    return game
+
+
+class ResultsStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.games = [
+            summary('joe', ('looser', 3), ('mediocore', 5)),
+            summary('mediocore', ('joe', 2), ('looser', 4)),
+            summary(None, ('looser', 1)),
+        ]
+        self.seats = [['joe', 'looser', 'mediocore'], ['looser', 'mediocore', 'joe'], ['mediocore', 'joe', 'looser']]
+
+    def test_summaries_round_trip(self):
+        results = ResultsStore()
+        for game, seats in zip(self.games, self.seats):
+            results.add_game(game, seats, duration=0.5, board=7)
+
+        self.assertEqual(len(results), 3)
+        self.assertEqual([repr(game) for game in results.summaries()], [repr(game) for game in self.games])
+        self.assertEqual(
+            [(winner, eliminated) for _, winner, eliminated in results.results()],
+            [('joe', ['looser', 'mediocore']), ('mediocore', ['joe', 'looser']), (None, ['looser'])],
+        )
+        results.close()
+
+    def test_stats(self):
+        results = ResultsStore()
+        for game, seats in zip(self.games, self.seats):
+            results.add_game(game, seats)
+
+        self.assertEqual(results.player_stats(), {'joe': (3, 1), 'looser': (3, 0), 'mediocore': (3, 1)})
+        pair_stats = results.pair_stats()
+        self.assertEqual(pair_stats[('joe', 'mediocore')], (3, 1))
+        self.assertEqual(pair_stats[('mediocore', 'mediocore')], (3, 1))
+        results.close()
+
+    def test_extend(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'results.sqlite')
+            stored = ResultsStore(path)
+            stored.add_games(self.games[:2])
+            stored.close()
+            self.assertTrue(is_results_store(path))
+
+            results = ResultsStore()
+            results.add_games(self.games[2:])
+            results.extend(path)
+            self.assertEqual(
+                [repr(game) for game in results.summaries()],
+                [repr(game) for game in self.games[2:] + self.games[:2]],
+            )
+            results.close()
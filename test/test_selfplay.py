@@ -0,0 +1,35 @@
+import tempfile
+import unittest
+
+import numpy
+
+from dicewars.selfplay import MOVE_BATTLE, ShardReader, ShardWriter, play_recorded_games
+
+from helpers import read_config
+
+
+class SelfPlayTests(unittest.TestCase):
+    def test_records_read_back(self):
+        config = read_config()
+
+        with tempfile.TemporaryDirectory() as directory:
+            with ShardWriter(directory, records_per_shard=50) as writer:
+                play_recorded_games(['dt.sdc', 'dt.rand'], [1, 2], config, writer)
+
+            reader = ShardReader(directory)
+            self.assertEqual(len(reader), len(writer.paths))
+            self.assertGreater(len(reader), 1)
+
+            nb_records = 0
+            for shard in reader:
+                self.assertEqual(shard['features'].shape, (len(shard), 4))
+                nb_records += len(shard)
+                for i in numpy.flatnonzero(shard['move'] == MOVE_BATTLE):
+                    candidates = shard.candidates(i)
+                    self.assertGreaterEqual(shard['chosen'][i], 0)
+                    self.assertEqual(tuple(candidates[shard['chosen'][i]]), (shard['source'][i], shard['target'][i]))
+            self.assertEqual(nb_records, writer.nb_records)
+
+            batches = list(reader.batches(32, rng=numpy.random.default_rng(0)))
+            self.assertTrue(all(len(batch['won']) == 32 for batch in batches[:-1]))
+            self.assertEqual(sum(len(batch['features']) for batch in batches), nb_records)
@@ -0,0 +1,31 @@
+import random
+import unittest
+
+from dicewars.sequential import BETTER, SPRT, WORSE
+
+
+class SPRTTests(unittest.TestCase):
+    def play(self, winrate, seed):
+        rng = random.Random(seed)
+        sprt = SPRT(0.25, margin=0.05)
+        for _ in range(10000):
+            decision = sprt.add_game(rng.random() < winrate)
+            if decision is not None:
+                return sprt
+        self.fail('SPRT did not decide')
+
+    def test_decides_clear_winrates(self):
+        for seed in range(10):
+            self.assertEqual(self.play(0.5, seed).decision, BETTER)
+            self.assertEqual(self.play(0.05, seed).decision, WORSE)
+
+    def test_stops_early(self):
+        sprt = self.play(0.6, 0)
+        self.assertLess(sprt.nb_games, 50)
+        self.assertEqual(sprt.nb_wins / sprt.nb_games, sprt.winrate)
+
+    def test_invalid_hypotheses(self):
+        with self.assertRaises(ValueError):
+            SPRT(0.5, margin=0.5)
+        with self.assertRaises(ValueError):
+            SPRT(0.5, alpha=0.0)
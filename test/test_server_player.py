@@ -0,0 +1,44 @@
+import unittest
+
+from dicewars.server.board import Board
+from dicewars.server.player import Player
+
+
+def line_board(nb_areas):
+    return Board({
+        name: {'neighbours': [n for n in (name - 1, name + 1) if 1 <= n <= nb_areas]}
+        for name in range(1, nb_areas + 1)
+    })
+
+
+def take(player, area):
+    area.set_owner_name(player.get_name())
+    player.add_area(area)
+
+
+class LargestRegionTests(unittest.TestCase):
+    def setUp(self):
+        self.board = line_board(5)
+        self.player = Player(1)
+        for name in [5, 1, 2, 4]:
+            take(self.player, self.board.areas[name])
+
+    def test_largest_region(self):
+        self.assertEqual(self.player.get_largest_region(self.board), 2)
+
+    def test_areas_grouped_by_regions(self):
+        self.player.get_largest_region(self.board)
+        self.assertEqual([a.get_name() for a in self.player.get_areas()], [5, 4, 1, 2])
+
+    def test_gaining_area_merges_regions(self):
+        self.player.get_largest_region(self.board)
+        take(self.player, self.board.areas[3])
+        self.assertEqual(self.player.get_largest_region(self.board), 5)
+
+    def test_losing_area_splits_region(self):
+        take(self.player, self.board.areas[3])
+        self.player.get_largest_region(self.board)
+
+        self.board.areas[2].set_owner_name(2)
+        self.player.remove_area(self.board.areas[2])
+        self.assertEqual(self.player.get_largest_region(self.board), 3)
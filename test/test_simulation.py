@@ -0,0 +1,134 @@
+import json
+import random
+import unittest
+
+from dicewars.ai.simulation import Rules, Simulation, TranspositionTable
+from dicewars.client.game.board import Board
+from dicewars.headless import HeadlessGame, LoopbackConnection, MessageDecoder, RandomStream, get_ai_constructor
+from dicewars.server.board_setup import setup_board
+
+from helpers import ai_nicknames, read_config
+
+
+class ShadowedGame(HeadlessGame):
+    """Server which replays every move in a Simulation and compares the states
+    """
+    def start(self):
+        super().start()
+        state = json.loads(json.dumps(self.get_state()))
+        board = Board(state['areas'], json.loads(json.dumps(self.board.get_board())))
+        self.simulation = Simulation(
+            board, self.players_order, self.current_player.get_name(),
+            rules=Rules.from_config(self.game_config),
+            player_areas={name: [a.get_name() for a in p.get_areas()] for name, p in self.players.items()},
+        )
+        self.nb_checked = 0
+
+    def process_player_message(self, msg, sender):
+        simulation = self.simulation
+        rng = random.Random()
+        rng.setstate(random.getstate())
+        if msg['type'] == 'battle':
+            simulation.battle(simulation.positions[msg['atk']], simulation.positions[msg['def']], rng=rng)
+        elif msg['type'] == 'transfer':
+            simulation.transfer(simulation.positions[msg['src']], simulation.positions[msg['dst']])
+        elif msg['type'] == 'end_turn':
+            simulation.end_turn(rng=rng)
+
+        super().process_player_message(msg, sender)
+
+        for name, area in self.board.areas.items():
+            position = simulation.positions[name]
+            assert simulation.owners[position] == area.get_owner_name()
+            assert simulation.dice[position] == area.get_dice()
+        for name, player in self.players.items():
+            assert simulation.reserves[name] == player.get_reserve()
+            assert simulation.largest_region[name] == player.get_largest_region(self.board)
+        assert simulation.current_player == self.current_player.get_name()
+        assert simulation.hash == simulation.compute_hash()
+        self.nb_checked += 1
+
+    def check_win_condition(self):
+        over = super().check_win_condition()
+        assert over == self.simulation.is_over()
+        return over
+
+
+def play_shadowed(ais, seed):
+    config = read_config()
+    nicknames = ai_nicknames(ais)
+    decoder = MessageDecoder()
+    connections = [
+        LoopbackConnection(get_ai_constructor(ai), nickname, config['AI_DRIVER'], RandomStream(seed), decoder)
+        for ai, nickname in zip(ais, nicknames)
+    ]
+    with RandomStream(seed):
+        board, area_ownership = setup_board(config['BOARD'], len(ais), seed, seed, seed)
+        random.seed(seed)
+        game = ShadowedGame(board, area_ownership, connections, config['GAME'], nicknames)
+        game.game_config = config['GAME']
+        game.run()
+    return game
+
+
+def line_board(owners, dice):
+    nb_areas = len(owners)
+    areas = {str(name): {'owner': owner, 'dice': d} for name, (owner, d) in enumerate(zip(owners, dice), start=1)}
+    board = {
+        str(name): {'neighbours': [n for n in (name - 1, name + 1) if 1 <= n <= nb_areas], 'hexes': [[name, 0]]}
+        for name in range(1, nb_areas + 1)
+    }
+    return Board(areas, board)
+
+
+class SimulationTests(unittest.TestCase):
+    def test_follows_server(self):
+        game = play_shadowed(['dt.sdc', 'dt.rand', 'kb.stei_adt'], 3)
+        self.assertGreater(game.nb_checked, 100)
+
+    def test_undo_restores_state(self):
+        simulation = Simulation(line_board([1, 1, 2, 2, 1, 3], [3, 8, 2, 5, 1, 2]), [1, 2, 3], 1)
+        initial = (list(simulation.owners), list(simulation.dice), dict(simulation.reserves),
+                   {p: list(a) for p, a in simulation.player_areas.items()}, simulation.hash)
+
+        rng = random.Random(0)
+        nb_moves = 0
+        while nb_moves < 200 and not simulation.is_over():
+            moves = simulation.possible_attacks() + simulation.possible_transfers()
+            if moves and rng.random() < 0.8:
+                src, dst = rng.choice(moves)
+                if simulation.owners[dst] == simulation.current_player:
+                    simulation.transfer(src, dst)
+                else:
+                    simulation.battle(src, dst, rng=rng)
+            else:
+                simulation.end_turn(rng=rng)
+            self.assertEqual(simulation.hash, simulation.compute_hash())
+            nb_moves += 1
+
+        for _ in range(nb_moves):
+            simulation.undo()
+        self.assertEqual(
+            (simulation.owners, simulation.dice, simulation.reserves, simulation.player_areas, simulation.hash),
+            initial,
+        )
+
+    def test_conquest_eliminates_player(self):
+        simulation = Simulation(line_board([1, 2], [8, 1]), [1, 2], 1)
+        self.assertTrue(simulation.battle(0, 1, won=True))
+        self.assertEqual(simulation.winner(), 1)
+        self.assertEqual(simulation.dice, [1, 7])
+        simulation.undo()
+        self.assertIsNone(simulation.winner())
+
+
+class TranspositionTableTests(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        table = TranspositionTable(max_entries=2)
+        table.put(1, 'a')
+        table.put(2, 'b')
+        table.get(1)
+        table.put(3, 'c')
+        self.assertNotIn(2, table)
+        self.assertEqual(table.get(1), 'a')
+        self.assertEqual(len(table), 2)
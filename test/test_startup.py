@@ -0,0 +1,49 @@
+import importlib
+import io
+import sys
+import types
+import unittest
+
+from dicewars.client.startup import StartupProfile
+from dicewars.lazy import lazy_import
+
+
+class LazyImportTests(unittest.TestCase):
+    def tearDown(self):
+        sys.modules.pop('tabnanny', None)
+
+    def test_module_executes_on_first_use(self):
+        sys.modules.pop('tabnanny', None)
+        module = lazy_import('tabnanny')
+        self.assertIsNot(type(module), types.ModuleType)
+        self.assertTrue(callable(module.check))
+        self.assertIs(type(module), types.ModuleType)
+        self.assertIs(lazy_import('tabnanny'), module)
+
+    def test_missing_module(self):
+        with self.assertRaises(ModuleNotFoundError):
+            lazy_import('dicewars.no_such_module')
+
+
+class StartupProfileTests(unittest.TestCase):
+    def tearDown(self):
+        sys.modules.pop('wave', None)
+
+    def test_records_imports_and_phases(self):
+        sys.modules.pop('wave', None)
+        profile = StartupProfile()
+        profile.install()
+        try:
+            importlib.import_module('wave')
+        finally:
+            profile.uninstall()
+        profile.phase('importing wave')
+
+        self_time, cumulative = profile.imports['wave']
+        self.assertLessEqual(self_time, cumulative)
+        self.assertEqual([name for name, _ in profile.phases], ['importing wave'])
+
+        stream = io.StringIO()
+        profile.report(stream=stream)
+        self.assertIn('| wave\n', stream.getvalue())
+        self.assertIn('| importing wave\n', stream.getvalue())
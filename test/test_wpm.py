@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+
+import numpy
+
+from dicewars.ai.dt.wpm import fit_logistic, fit_weights, load_weights, write_weights
+
+
+class FitTests(unittest.TestCase):
+    def test_recovers_weights(self):
+        rng = numpy.random.default_rng(0)
+        true_weights = numpy.array([1.5, -0.5, -1.0])
+        features = rng.normal(size=(20000, 3))
+        won = rng.random(20000) < 1.0 / (1.0 + numpy.exp(-(features @ true_weights)))
+
+        weights = fit_logistic({'model': (features, won)}, l2=0.0)
+        numpy.testing.assert_allclose(weights['model'], true_weights, atol=0.1)
+
+    def test_fits_every_number_of_players(self):
+        rng = numpy.random.default_rng(1)
+        scores = {n: rng.integers(0, 10, size=(500, n)) for n in (2, 3)}
+        dice = {n: rng.integers(0, 40, size=(500, n)) for n in (2, 3)}
+        won = {n: scores[n][:, 0] > scores[n][:, 1:].max(axis=1) for n in (2, 3)}
+        held_out = {n: numpy.arange(500) % 5 == 0 for n in (2, 3)}
+
+        weights, evaluation = fit_weights(scores, dice, won, ['wpm_c', 'wpm_s'], held_out=held_out)
+        self.assertEqual(weights['wpm_c', 3].shape, (6,))
+        self.assertEqual(weights['wpm_s', 2].shape, (2,))
+        self.assertGreater(weights['wpm_s', 2][0], 0)
+        self.assertEqual(set(evaluation), set(weights))
+
+
+class WeightFileTests(unittest.TestCase):
+    def test_stored_weights_replace_default(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'weights.npz')
+            default = numpy.array([1.0, -1.0])
+            self.assertIs(load_weights('wpm_s', 2, default, path), default)
+
+            write_weights({('wpm_s', 2): [2.0, -2.0]}, path)
+            write_weights({('wpm_d', 2): [3.0, -3.0]}, path)
+            numpy.testing.assert_array_equal(load_weights('wpm_s', 2, default, path), [2.0, -2.0])
+            numpy.testing.assert_array_equal(load_weights('wpm_d', 2, default, path), [3.0, -3.0])
+            self.assertIs(load_weights('wpm_s', 3, default, path), default)